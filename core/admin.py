@@ -2,8 +2,9 @@ from django.contrib import admin
 from .models import (
     Usuario, GrupoArticulo, LineaArticulo, Articulo, ListaPrecio,
     TipoIdentificacion, CanalCliente, Cliente, Vendedor,
-    OrdenCompraCliente, ItemOrdenCompraCliente
+    OrdenCompraCliente, ItemOrdenCompraCliente, SecuenciaPedido
 )
+from .secuencias import siguiente_nro_pedido
 
 @admin.register(Usuario)
 class UsuarioAdmin(admin.ModelAdmin):
@@ -67,9 +68,25 @@ class OrdenCompraClienteAdmin(admin.ModelAdmin):
     search_fields = ['nro_pedido', 'cliente__nombres', 'vendedor__nombres']
     readonly_fields = ['pedido_id', 'nro_pedido', 'importe']
 
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        # El admin guarda dentro de una transacción: el número se reserva antes
+        if object_id is None and request.method == 'POST':
+            request.nro_pedido = siguiente_nro_pedido()
+        return super().changeform_view(request, object_id, form_url, extra_context)
+
+    def save_model(self, request, obj, form, change):
+        if not obj.nro_pedido:
+            obj.nro_pedido = request.nro_pedido
+        super().save_model(request, obj, form, change)
+
 @admin.register(ItemOrdenCompraCliente)
 class ItemOrdenCompraClienteAdmin(admin.ModelAdmin):
     list_display = ['pedido', 'articulo', 'cantidad', 'precio_unitario', 'total_item']
     list_filter = ['estado', 'fecha_creacion']
     search_fields = ['pedido__nro_pedido', 'articulo__descripcion']
-    readonly_fields = ['item_id', 'total_item']
\ No newline at end of file
+    readonly_fields = ['item_id', 'total_item']
+
+@admin.register(SecuenciaPedido)
+class SecuenciaPedidoAdmin(admin.ModelAdmin):
+    list_display = ['tienda', 'ultimo_numero', 'fecha_modificacion']
+    readonly_fields = ['fecha_modificacion']
\ No newline at end of file
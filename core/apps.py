@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Registrar receptores de señales del catálogo
+        from . import signals, search, escaner, cache_articulos, taxonomia, referencias, documentos  # noqa: F401
@@ -0,0 +1,124 @@
+# core/benchmarks.py
+"""
+Utilidades compartidas por los comandos de benchmark y pruebas de carga.
+
+Los datos sintéticos usan códigos con un prefijo propio (BENCH- por defecto)
+para poder limpiarlos sin tocar el catálogo real.
+"""
+import math
+import sys
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from pos_project.choices import EstadoEntidades
+from .models import (
+    Articulo, GrupoArticulo, LineaArticulo, ListaPrecio,
+    TipoIdentificacion, CanalCliente, Cliente, Vendedor, Usuario,
+    OrdenCompraCliente, ItemOrdenCompraCliente
+)
+
+PREFIJO = 'BENCH'
+LOTE_INSERCION = 5000
+
+
+def preparar_catalogo(cantidad, prefijo=PREFIJO, stock=100, precio=Decimal('10.00'), descripciones=None, desde=0):
+    """Crea `cantidad` artículos con precio (numerados desde `desde`); devuelve la lista de artículos"""
+    grupo, _ = GrupoArticulo.objects.get_or_create(nombre_grupo=f'{prefijo} Grupo')
+    linea, _ = LineaArticulo.objects.get_or_create(nombre_linea=f'{prefijo} Línea', grupo=grupo)
+
+    creados = []
+    for inicio in range(desde, desde + cantidad, LOTE_INSERCION):
+        articulos = Articulo.objects.bulk_create([
+            Articulo(
+                codigo_articulo=f'{prefijo}-{numero:07d}',
+                codigo_barras=f'77{numero:011d}',
+                descripcion=descripciones(numero) if descripciones else f'{prefijo} Artículo {numero}',
+                grupo=grupo,
+                linea=linea,
+                stock=stock,
+                estado=EstadoEntidades.ACTIVO
+            )
+            for numero in range(inicio, min(inicio + LOTE_INSERCION, desde + cantidad))
+        ])
+        ListaPrecio.objects.bulk_create([
+            ListaPrecio(articulo=articulo, precio_1=precio) for articulo in articulos
+        ])
+        creados.extend(articulos)
+    return creados
+
+
+def preparar_referencias(prefijo=PREFIJO):
+    """Devuelve (usuario, cliente, vendedor) para crear órdenes sintéticas"""
+    usuario, _ = Usuario.objects.get_or_create(
+        username=f'{prefijo.lower()}_cajero',
+        defaults={'email': f'{prefijo.lower()}@sistema.com'}
+    )
+    tipo_id = TipoIdentificacion.objects.filter(estado=EstadoEntidades.ACTIVO).first()
+    if not tipo_id:
+        tipo_id = TipoIdentificacion.objects.create(nombre_tipo_identificacion='DNI')
+    canal = CanalCliente.objects.filter(estado=EstadoEntidades.ACTIVO).first()
+    if not canal:
+        canal = CanalCliente.objects.create(nombre_canal='Presencial')
+    cliente, _ = Cliente.objects.get_or_create(
+        correo_electronico=usuario.email,
+        defaults={
+            'nombres': f'{prefijo} Cliente',
+            'nro_documento': '00000000',
+            'tipo_identificacion': tipo_id,
+            'canal': canal,
+        }
+    )
+    vendedor, _ = Vendedor.objects.get_or_create(
+        correo_electronico=f'{prefijo.lower()}_vendedor@sistema.com',
+        defaults={'nombres': f'{prefijo} Vendedor'}
+    )
+    return usuario, cliente, vendedor
+
+
+def limpiar(prefijo=PREFIJO):
+    """Elimina las órdenes, artículos y referencias sintéticas del prefijo"""
+    articulos = Articulo.objects.filter(codigo_articulo__startswith=f'{prefijo}-')
+    pedidos = ItemOrdenCompraCliente.objects.filter(articulo__in=articulos).values('pedido_id')
+    ordenes = OrdenCompraCliente.objects.filter(pedido_id__in=pedidos)
+    ItemOrdenCompraCliente.objects.filter(pedido__in=ordenes).delete()
+    ordenes.delete()
+    articulos.delete()
+    LineaArticulo.objects.filter(nombre_linea=f'{prefijo} Línea').delete()
+    GrupoArticulo.objects.filter(nombre_grupo=f'{prefijo} Grupo').delete()
+    OrdenCompraCliente.objects.filter(cliente__correo_electronico=f'{prefijo.lower()}@sistema.com').delete()
+    Cliente.objects.filter(correo_electronico=f'{prefijo.lower()}@sistema.com').delete()
+    Vendedor.objects.filter(correo_electronico=f'{prefijo.lower()}_vendedor@sistema.com').delete()
+    Usuario.objects.filter(username=f'{prefijo.lower()}_cajero').delete()
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) por el método del rango más cercano"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+@contextmanager
+def cronometro():
+    """Mide segundos transcurridos: `with cronometro() as t: ...; t()`"""
+    inicio = time.perf_counter()
+    fin = []
+    yield lambda: (fin[0] if fin else time.perf_counter()) - inicio
+    fin.append(time.perf_counter())
+
+
+def memoria_maxima_mb():
+    """Máximo de memoria residente del proceso en MB (None si no se puede medir)"""
+    if resource is None:
+        return None
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / (1024 * 1024) if sys.platform == 'darwin' else maximo / 1024
@@ -0,0 +1,192 @@
+# core/cache_articulos.py
+"""
+Caché de lectura versionada para las fichas de artículos.
+
+Cada artículo tiene un número de versión guardado en la caché 'articulos';
+los datos cacheados (el artículo con su precio vigente, los relacionados)
+se guardan bajo claves que incluyen esa versión. Al guardar o eliminar un
+Articulo o su ListaPrecio (señal articulos_modificados) se le asigna una
+versión nueva, y las entradas anteriores dejan de leerse: la invalidación
+es exacta y no depende de un TTL. ARTICULOS_CACHE_TIMEOUT solo acota
+cuánto tiempo ocupan memoria las entradas huérfanas.
+
+Los relacionados dependen además de la línea del artículo y de la tabla de
+compras conjuntas, así que su clave incluye también esas versiones.
+
+El backend se elige con ARTICULOS_CACHE_BACKEND (ver settings): memoria
+local en desarrollo; archivo o base de datos cuando hay varios procesos
+y todos deben ver las mismas versiones.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.dispatch import receiver
+
+from pos_project.choices import EstadoEntidades
+from .models import Articulo
+from .relacionados import relacionados_ids
+from .signals import articulos_modificados
+
+# Relacionados que se muestran en la ficha
+MAXIMO_RELACIONADOS = 4
+
+# Campos cuyo cambio no altera la lista de relacionados de una línea
+CAMPOS_SIN_EFECTO_EN_LINEA = {'stock', 'precio', 'fecha_modificacion'}
+
+_AUSENTE = object()
+
+
+class Estadisticas:
+    """Contadores de aciertos y fallos de la caché en este proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.aciertos = 0
+            self.fallos = 0
+
+    def registrar(self, acierto, cantidad=1):
+        with self._lock:
+            if acierto:
+                self.aciertos += cantidad
+            else:
+                self.fallos += cantidad
+
+    def como_dict(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else None,
+            }
+
+
+estadisticas = Estadisticas()
+
+
+def _cache():
+    return caches['articulos']
+
+
+def _nueva_version():
+    # Un valor distinto en cada cambio (no un incremento): dos procesos que
+    # invalidan a la vez nunca terminan en la misma versión.
+    return time.time_ns()
+
+
+def _clave_version(tipo, pk):
+    return f'{tipo}:{pk}:version'
+
+
+def _versiones(claves):
+    """Versión vigente de cada (tipo, pk); crea las que falten"""
+    cache = _cache()
+    por_clave = {_clave_version(tipo, pk): (tipo, pk) for tipo, pk in claves}
+    encontradas = cache.get_many(por_clave)
+    versiones = {por_clave[clave]: version for clave, version in encontradas.items()}
+
+    faltantes = {clave: _nueva_version() for clave in por_clave if clave not in encontradas}
+    if faltantes:
+        # add() no pisa una versión creada por otro proceso entre medio
+        for clave, version in faltantes.items():
+            if not cache.add(clave, version, timeout=None):
+                version = cache.get(clave, version)
+            versiones[por_clave[clave]] = version
+    return versiones
+
+
+def invalidar_articulos(articulo_ids, linea_ids=()):
+    """Asigna versiones nuevas a los artículos (y líneas) indicados"""
+    nuevas = {_clave_version('articulo', pk): _nueva_version() for pk in articulo_ids}
+    nuevas.update({_clave_version('linea', pk): _nueva_version() for pk in linea_ids})
+    if nuevas:
+        _cache().set_many(nuevas, timeout=None)
+
+
+def invalidar_relacionados():
+    """Invalida todas las listas de relacionados (tras reconstruir la tabla)"""
+    _cache().set(_clave_version('relacionados', 'todos'), _nueva_version(), timeout=None)
+
+
+def obtener_articulos(articulo_ids):
+    """
+    Devuelve {articulo_id: Articulo} de los artículos activos indicados, con
+    grupo, línea y precio vigente ya cargados. Los que no están en caché se
+    leen en una sola consulta.
+    """
+    cache = _cache()
+    versiones = {pk: version for (_, pk), version in _versiones(
+        [('articulo', pk) for pk in articulo_ids]
+    ).items()}
+    claves = {f'articulo:{pk}:{version}': pk for pk, version in versiones.items()}
+    encontrados = cache.get_many(claves)
+    articulos = {claves[clave]: articulo for clave, articulo in encontrados.items()}
+    estadisticas.registrar(True, len(articulos))
+
+    faltantes = [pk for pk in articulo_ids if pk not in articulos]
+    if faltantes:
+        estadisticas.registrar(False, len(faltantes))
+        leidos = Articulo.objects.filter(
+            articulo_id__in=faltantes, estado=EstadoEntidades.ACTIVO
+        ).select_related('grupo', 'linea').con_precio()
+        nuevos = {}
+        for articulo in leidos:
+            articulo.listaprecio  # calcular antes de guardar en caché
+            articulos[articulo.pk] = articulo
+            nuevos[f'articulo:{articulo.pk}:{versiones[articulo.pk]}'] = articulo
+        if nuevos:
+            cache.set_many(nuevos, timeout=settings.ARTICULOS_CACHE_TIMEOUT)
+    return articulos
+
+
+def obtener_articulo(articulo_id):
+    """El artículo activo con grupo, línea y precio cargados, o None"""
+    return obtener_articulos([articulo_id]).get(articulo_id)
+
+
+def obtener_relacionados(articulo, limite=MAXIMO_RELACIONADOS):
+    """
+    Artículos más comprados junto con `articulo` (ver core/relacionados.py).
+    La lista cambia con las ventas del artículo (que renuevan su versión),
+    con los cambios de su línea (relleno para artículos sin historial) y al
+    reconstruir la tabla.
+    """
+    cache = _cache()
+    partes = [('articulo', articulo.pk), ('linea', articulo.linea_id), ('relacionados', 'todos')]
+    versiones = _versiones(partes)
+    clave = 'relacionados:{}:{}:{}'.format(
+        articulo.pk, ':'.join(str(versiones[parte]) for parte in partes), limite
+    )
+    ids = cache.get(clave, _AUSENTE)
+    if ids is _AUSENTE:
+        estadisticas.registrar(False)
+        ids = relacionados_ids(articulo, limite)
+        cache.set(clave, ids, timeout=settings.ARTICULOS_CACHE_TIMEOUT)
+    else:
+        estadisticas.registrar(True)
+
+    articulos = obtener_articulos(ids)
+    return [articulos[pk] for pk in ids if pk in articulos]
+
+
+@receiver(articulos_modificados)
+def _invalidar(sender, articulo_ids, campos=None, **kwargs):
+    """
+    Invalida los artículos modificados (y sus líneas, salvo que solo cambien
+    stock o precio) al confirmarse la transacción: invalidar antes permitiría
+    que otra request cachee los datos viejos bajo la versión nueva.
+    """
+    linea_ids = ()
+    if campos is None or not campos <= CAMPOS_SIN_EFECTO_EN_LINEA:
+        linea_ids = set(
+            Articulo.objects.filter(pk__in=articulo_ids)
+            .exclude(linea_id=None).values_list('linea_id', flat=True)
+        )
+    transaction.on_commit(lambda: invalidar_articulos(articulo_ids, linea_ids))
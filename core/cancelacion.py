@@ -0,0 +1,88 @@
+# core/cancelacion.py
+"""
+Cancelación de órdenes pendientes con reposición de stock por conjuntos.
+
+Cancelar ya no recorre los items guardando cada artículo: por lote de
+órdenes se marcan las PENDIENTES como CANCELADAS con un UPDATE, se suman
+las cantidades por artículo con una consulta agregada y se reponen con un
+UPDATE multi-fila (core/stock.py). Solo se repone el stock de las órdenes
+que esta transacción pasó a CANCELADA: una orden ya cancelada (o
+completada) en otra caja no se repone dos veces. En la misma transacción
+se restan sus compras conjuntas de la tabla de productos relacionados
+(core/relacionados.py), que no cuenta las órdenes canceladas.
+
+`expirar_pendientes` aplica lo mismo a las órdenes que nunca se
+completaron (manage.py expire_pending_orders), una transacción por lote
+para no bloquear el stock mientras se procesan miles de órdenes.
+"""
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from pos_project.choices import EstadoOrden
+from .models import OrdenCompraCliente, ItemOrdenCompraCliente
+from .relacionados import descontar_ordenes
+from .signals import notificar_articulos
+from .stock import reponer_stock
+
+# Órdenes por transacción al expirar pendientes
+LOTE_EXPIRACION = 500
+
+
+def cancelar_ordenes(pedido_ids):
+    """
+    Cancela las órdenes PENDIENTES de `pedido_ids` y repone su stock.
+    Debe ejecutarse dentro de transaction.atomic().
+
+    Devuelve (pedido_ids cancelados, unidades repuestas).
+    """
+    if not connection.in_atomic_block:
+        raise transaction.TransactionManagementError(
+            'cancelar_ordenes debe ejecutarse dentro de transaction.atomic()'
+        )
+
+    # En PostgreSQL se bloquean las órdenes; en SQLite la transacción
+    # IMMEDIATE ya serializa a los escritores
+    pendientes = OrdenCompraCliente.objects.filter(pk__in=list(pedido_ids), estado=EstadoOrden.PENDIENTE)
+    if connection.features.has_select_for_update:
+        pendientes = pendientes.select_for_update()
+    canceladas = list(pendientes.order_by().values_list('pk', flat=True))
+    if not canceladas:
+        return [], 0
+
+    # Antes de marcarlas: la resta solo ve órdenes no canceladas
+    descontar_ordenes(canceladas)
+    OrdenCompraCliente.objects.filter(pk__in=canceladas).update(estado=EstadoOrden.CANCELADA)
+    cantidades = dict(
+        ItemOrdenCompraCliente.objects.filter(pedido_id__in=canceladas)
+        .values('articulo_id').annotate(total=Sum('cantidad')).order_by()
+        .values_list('articulo_id', 'total')
+    )
+    reponer_stock(cantidades)
+    # UPDATE masivo sin señales de modelo: el aviso va a mano. También
+    # invalida los relacionados cacheados de estos artículos, los únicos
+    # cuyos pares cambiaron (la versión del artículo es parte de la clave)
+    notificar_articulos(list(cantidades), campos={'stock'})
+    return canceladas, sum(cantidades.values())
+
+
+def expirar_pendientes(antes_de, lote=LOTE_EXPIRACION, progreso=None):
+    """
+    Cancela las órdenes PENDIENTES creadas antes de `antes_de`, por lotes de
+    `lote` órdenes en transacciones separadas. `progreso(ordenes)` se llama
+    tras cada lote. Devuelve (órdenes canceladas, unidades repuestas).
+    """
+    vencidas = OrdenCompraCliente.objects.filter(
+        estado=EstadoOrden.PENDIENTE, fecha_creacion__lt=antes_de
+    ).order_by('fecha_creacion', 'pedido_id').values_list('pk', flat=True)
+
+    ordenes = unidades = 0
+    while True:
+        candidatas = list(vencidas[:lote])
+        if not candidatas:
+            return ordenes, unidades
+        with transaction.atomic():
+            canceladas, repuestas = cancelar_ordenes(candidatas)
+        ordenes += len(canceladas)
+        unidades += repuestas
+        if progreso:
+            progreso(ordenes)
@@ -1,61 +1,99 @@
 # core/cart.py
-from decimal import Decimal
-from django.conf import settings
+import uuid
 from .models import Articulo
+from .cart_store import get_almacen
+from .money import Dinero
 
 class Cart:
     """
-    Clase para gestionar el carrito de compras mediante sesiones
+    Clase para gestionar el carrito de compras; las líneas se guardan en el
+    almacén configurado en CART_BACKEND (ver core/cart_store.py)
+    
+    Los agregados (cantidad, total) y las líneas con los datos del catálogo
+    se calculan una vez por request y se descartan en cada modificación.
     """
     
     def __init__(self, request):
         """
         Inicializa el carrito
         """
-        self.session = request.session
-        cart = self.session.get('cart')
-        if not cart:
-            # Crear un carrito vacío si no existe
-            cart = self.session['cart'] = {}
-        self.cart = cart
+        self.almacen = get_almacen(request)
+        self.cart = self.almacen.lineas()
+        self._memo = {}
     
     def add(self, articulo, cantidad=1, update_cantidad=False):
         """
         Añadir un producto al carrito o actualizar su cantidad
         """
+        articulo_id = self._linea(articulo)
+        self._sumar(articulo_id, cantidad, update_cantidad, articulo.stock)
+    
+    def add_lote(self, articulos, update_cantidad=False):
+        """
+        Añadir varios productos con una sola escritura al almacén;
+        `articulos` es una lista de (articulo, cantidad)
+        """
+        articulo_ids = []
+        for articulo, cantidad in articulos:
+            articulo_id = self._linea(articulo)
+            self._sumar(articulo_id, cantidad, update_cantidad, articulo.stock, guardar=False)
+            articulo_ids.append(articulo_id)
+        self._memo.clear()
+        self.almacen.guardar_varias(self.cart, list(dict.fromkeys(articulo_ids)))
+    
+    def _linea(self, articulo):
+        """
+        Crear la línea del artículo si no existe; devuelve su clave
+        """
         articulo_id = str(articulo.articulo_id)
         if articulo_id not in self.cart:
-            # Obtener el precio del artículo
+            # Precio del artículo al momento de agregarlo
             try:
                 lista_precio = articulo.listaprecio
-                precio = float(lista_precio.precio_1) if lista_precio else 0
+                precio = lista_precio.precio_1 if lista_precio else None
             except:
-                precio = 0
+                precio = None
             
-            self.cart[articulo_id] = {
-                'cantidad': 0,
-                'precio': precio,
-                'descripcion': articulo.descripcion,
-                'codigo': articulo.codigo_articulo,
-                'stock_disponible': articulo.stock
-            }
+            self.cart[articulo_id] = {'cantidad': 0, 'centavos': Dinero.desde(precio).centavos}
+        return articulo_id
+    
+    def add_escaneado(self, entrada, cantidad=1):
+        """
+        Añadir un artículo resuelto por el índice de códigos de barras
+        (core/escaner.py), sin consultar la base de datos
+        """
+        articulo_id = str(entrada.articulo_id)
+        if articulo_id not in self.cart:
+            self.cart[articulo_id] = {'cantidad': 0, 'centavos': Dinero.desde(entrada.precio).centavos}
         
+        self._sumar(articulo_id, cantidad, False, entrada.stock)
+        return self.cart[articulo_id]
+    
+    def _sumar(self, articulo_id, cantidad, update_cantidad, stock, guardar=True):
+        """
+        Actualizar la cantidad de un item sin exceder el stock
+        """
         if update_cantidad:
             self.cart[articulo_id]['cantidad'] = cantidad
         else:
             self.cart[articulo_id]['cantidad'] += cantidad
         
         # Verificar que no exceda el stock
-        if self.cart[articulo_id]['cantidad'] > articulo.stock:
-            self.cart[articulo_id]['cantidad'] = articulo.stock
+        if self.cart[articulo_id]['cantidad'] > stock:
+            self.cart[articulo_id]['cantidad'] = stock
         
-        self.save()
+        if guardar:
+            self.save(articulo_id)
     
-    def save(self):
+    def save(self, articulo_id=None):
         """
-        Guardar los cambios en la sesión
+        Guardar los cambios en el almacén (solo la línea indicada, si se indica)
         """
-        self.session.modified = True
+        self._memo.clear()
+        if articulo_id:
+            self.almacen.guardar(self.cart, articulo_id)
+        else:
+            self.almacen.guardar_varias(self.cart, list(self.cart))
     
     def remove(self, articulo):
         """
@@ -64,36 +102,66 @@ class Cart:
         articulo_id = str(articulo.articulo_id)
         if articulo_id in self.cart:
             del self.cart[articulo_id]
-            self.save()
+            self._memo.clear()
+            self.almacen.eliminar(self.cart, articulo_id)
     
     def __iter__(self):
         """
-        Iterar sobre los elementos en el carrito y obtener los artículos de la base de datos
+        Iterar sobre los elementos en el carrito con los datos de presentación
+        del catálogo; las líneas guardadas no se modifican
         """
-        articulo_ids = self.cart.keys()
-        articulos = Articulo.objects.filter(articulo_id__in=articulo_ids).select_related('grupo', 'linea')
-        
-        cart = self.cart.copy()
-        for articulo in articulos:
-            cart[str(articulo.articulo_id)]['articulo'] = articulo
+        if 'items' not in self._memo:
+            self._memo['items'] = self._hidratar()
+        return iter(self._memo['items'])
+    
+    def _hidratar(self):
+        """
+        Líneas con su artículo, en una consulta; cada item es un diccionario nuevo
+        """
+        articulos = Articulo.objects.filter(
+            articulo_id__in=list(self.cart)
+        ).select_related('grupo', 'linea').in_bulk()
         
-        for item in cart.values():
-            if 'articulo' in item:  # Solo procesar items que tienen artículo válido
-                item['precio'] = Decimal(str(item['precio']))
-                item['total_precio'] = item['precio'] * item['cantidad']
-                yield item
+        items = []
+        for articulo_id, linea in self.cart.items():
+            articulo = articulos.get(uuid.UUID(articulo_id))
+            if articulo is None:  # Artículo eliminado del catálogo
+                continue
+            precio = Dinero(linea['centavos'])
+            items.append({
+                'articulo': articulo,
+                'cantidad': linea['cantidad'],
+                'precio': precio,
+                'total_precio': precio * linea['cantidad'],
+                'descripcion': articulo.descripcion,
+                'codigo': articulo.codigo_articulo,
+                'stock_disponible': articulo.stock,
+            })
+        return items
+    
+    def _agregados(self):
+        """
+        Cantidad total y total en centavos, en una sola pasada por las líneas
+        """
+        if 'cantidad' not in self._memo:
+            cantidad = centavos = 0
+            for linea in self.cart.values():
+                cantidad += linea['cantidad']
+                centavos += linea['centavos'] * linea['cantidad']
+            self._memo['cantidad'], self._memo['total'] = cantidad, Dinero(centavos)
+        return self._memo
     
     def __len__(self):
         """
         Contar todos los items en el carrito
         """
-        return sum(item['cantidad'] for item in self.cart.values())
+        return self._agregados()['cantidad']
     
     def get_total_price(self):
         """
-        Calcular el costo total de los items
+        Calcular el costo total de los items (Dinero)
         """
-        return sum(Decimal(str(item['precio'])) * item['cantidad'] for item in self.cart.values())
+        return self._agregados()['total']
     
     def get_total_items(self):
         """
@@ -103,10 +171,11 @@ class Cart:
     
     def clear(self):
         """
-        Eliminar el carrito de la sesión
+        Eliminar todas las líneas del carrito
         """
-        del self.session['cart']
-        self.save()
+        self.cart = {}
+        self._memo.clear()
+        self.almacen.vaciar()
     
     def update_item(self, articulo, cantidad):
         """
@@ -122,7 +191,7 @@ class Cart:
                     self.cart[articulo_id]['cantidad'] = cantidad
                 else:
                     self.cart[articulo_id]['cantidad'] = articulo.stock
-                self.save()
+                self.save(articulo_id)
     
     def get_item(self, articulo):
         """
@@ -0,0 +1,224 @@
+# core/cart_store.py
+"""
+Almacenes de las líneas del carrito (setting CART_BACKEND).
+
+- 'bd':     tabla carrito_lineas, una fila por línea. Agregar o quitar un
+            artículo es un UPSERT/DELETE de esa fila; la sesión solo guarda
+            el id del carrito (se escribe una vez, al crearlo).
+- 'cache':  un diccionario por carrito en la caché CART_CACHE_ALIAS (p. ej.
+            un backend local de clave-valor). Tampoco toca la sesión.
+- 'sesion': las líneas dentro de request.session, como hasta ahora; cada
+            cambio reescribe la fila completa de django_session.
+
+Las líneas se leen solo cuando una vista crea un Cart, así que las páginas
+que no usan el carrito no pagan su deserialización.
+
+Cada línea es {'cantidad': int, 'centavos': int}: solo la cantidad y el
+precio unitario capturado al agregarla, en centavos. Descripción, código y
+stock se leen del catálogo al mostrar el carrito. En la sesión y en la caché
+las líneas se guardan en un formato compacto y versionado (ver codificar);
+los carritos del formato anterior se migran al leerlos. Con 'bd' y 'cache',
+un carrito que todavía está en la sesión (de antes de cambiar de almacén) se
+importa en la primera lectura y se quita de la sesión.
+"""
+import base64
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .models import Articulo, LineaCarrito
+from .money import Dinero
+
+# Clave de sesión con el id del carrito (almacenes 'bd' y 'cache')
+CLAVE_CARRITO_ID = 'carrito_id'
+# Clave de sesión con las líneas (almacén 'sesion')
+CLAVE_CARRITO_SESION = 'cart'
+# Versión del formato compacto de las líneas
+VERSION_LINEAS = 2
+
+
+def _id_compacto(articulo_id):
+    # Los 16 bytes del UUID en base64 (22 caracteres en lugar de 36)
+    return base64.urlsafe_b64encode(uuid.UUID(articulo_id).bytes).decode().rstrip('=')
+
+
+def _id_uuid(compacto):
+    return str(uuid.UUID(bytes=base64.urlsafe_b64decode(compacto + '==')))
+
+
+def codificar(lineas):
+    """
+    Líneas en formato compacto: {'v': 2, 'l': [[id, cantidad, centavos], ...]},
+    con el id del artículo en base64
+    """
+    return {
+        'v': VERSION_LINEAS,
+        'l': [
+            [_id_compacto(articulo_id), linea['cantidad'], linea['centavos']]
+            for articulo_id, linea in lineas.items()
+        ],
+    }
+
+
+def decodificar(valor):
+    """
+    Líneas guardadas con codificar, o en el formato anterior (v1: un
+    diccionario por artículo con 'cantidad', 'precio' en float y datos de
+    presentación), que se convierte al leerlo. Lo usan los tres almacenes:
+    'bd' y 'cache' lo aplican al importar el carrito que quedó en la sesión
+    """
+    if not valor:
+        return {}
+    if valor.get('v') == VERSION_LINEAS:
+        return {
+            _id_uuid(compacto): {'cantidad': cantidad, 'centavos': centavos}
+            for compacto, cantidad, centavos in valor['l']
+        }
+    return {
+        articulo_id: {
+            'cantidad': int(linea['cantidad']),
+            'centavos': Dinero.desde(linea.get('precio')).centavos,
+        }
+        for articulo_id, linea in valor.items()
+    }
+
+
+class AlmacenSesion:
+    """Líneas dentro de la sesión"""
+
+    def __init__(self, request):
+        self.session = request.session
+
+    def lineas(self):
+        return decodificar(self.session.get(CLAVE_CARRITO_SESION))
+
+    def guardar(self, lineas, articulo_id):
+        self.session[CLAVE_CARRITO_SESION] = codificar(lineas)
+        self.session.modified = True
+
+    def guardar_varias(self, lineas, articulo_ids):
+        self.guardar(lineas, None)
+
+    def eliminar(self, lineas, articulo_id):
+        self.guardar(lineas, articulo_id)
+
+    def vaciar(self):
+        self.session.pop(CLAVE_CARRITO_SESION, None)
+        self.session.modified = True
+
+
+class _AlmacenConId:
+    """Base de los almacenes fuera de la sesión: la sesión solo guarda el id"""
+
+    def __init__(self, request):
+        self.session = request.session
+
+    @property
+    def carrito_id(self):
+        carrito_id = self.session.get(CLAVE_CARRITO_ID)
+        if carrito_id is None:
+            carrito_id = self.session[CLAVE_CARRITO_ID] = uuid.uuid4().hex
+        return carrito_id
+
+    def _importar_sesion(self):
+        """
+        Líneas de un carrito guardado en la sesión (v1 o v2) antes de usar
+        este almacén: se guardan aquí y se quitan de la sesión
+        """
+        lineas = decodificar(self.session.pop(CLAVE_CARRITO_SESION, None))
+        # Los artículos eliminados desde entonces se descartan
+        existentes = {
+            str(pk) for pk in Articulo.objects.filter(pk__in=list(lineas)).values_list('pk', flat=True)
+        }
+        lineas = {articulo_id: linea for articulo_id, linea in lineas.items() if articulo_id in existentes}
+        if lineas:
+            self.guardar_varias(lineas, list(lineas))
+        return lineas
+
+
+class AlmacenBD(_AlmacenConId):
+    """Una fila por línea en carrito_lineas"""
+
+    def lineas(self):
+        carrito_id = self.session.get(CLAVE_CARRITO_ID)
+        if carrito_id is None:
+            return self._importar_sesion() if CLAVE_CARRITO_SESION in self.session else {}
+        return {
+            str(articulo_id): {'cantidad': cantidad, 'centavos': Dinero.desde(precio).centavos}
+            for articulo_id, cantidad, precio in LineaCarrito.objects.filter(
+                carrito_id=carrito_id
+            ).values_list('articulo_id', 'cantidad', 'precio')
+        }
+
+    def guardar(self, lineas, articulo_id):
+        self.guardar_varias(lineas, [articulo_id])
+
+    def guardar_varias(self, lineas, articulo_ids):
+        """Un solo UPSERT para todas las líneas indicadas"""
+        carrito_id, ahora = self.carrito_id, timezone.now()
+        LineaCarrito.objects.bulk_create(
+            [
+                LineaCarrito(
+                    carrito_id=carrito_id,
+                    articulo_id=articulo_id,
+                    cantidad=lineas[articulo_id]['cantidad'],
+                    precio=Dinero(lineas[articulo_id]['centavos']).a_decimal(),
+                    fecha_modificacion=ahora,
+                )
+                for articulo_id in articulo_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['carrito_id', 'articulo'],
+            update_fields=['cantidad', 'precio', 'fecha_modificacion'],
+        )
+
+    def eliminar(self, lineas, articulo_id):
+        LineaCarrito.objects.filter(carrito_id=self.carrito_id, articulo_id=articulo_id).delete()
+
+    def vaciar(self):
+        carrito_id = self.session.get(CLAVE_CARRITO_ID)
+        if carrito_id is not None:
+            LineaCarrito.objects.filter(carrito_id=carrito_id).delete()
+
+
+class AlmacenCache(_AlmacenConId):
+    """Un diccionario por carrito en la caché CART_CACHE_ALIAS"""
+
+    def _clave(self, carrito_id):
+        return f'carrito:{carrito_id}'
+
+    def lineas(self):
+        carrito_id = self.session.get(CLAVE_CARRITO_ID)
+        if carrito_id is None:
+            return self._importar_sesion() if CLAVE_CARRITO_SESION in self.session else {}
+        return decodificar(caches[settings.CART_CACHE_ALIAS].get(self._clave(carrito_id)))
+
+    def guardar(self, lineas, articulo_id):
+        caches[settings.CART_CACHE_ALIAS].set(
+            self._clave(self.carrito_id), codificar(lineas), timeout=settings.SESSION_COOKIE_AGE
+        )
+
+    def guardar_varias(self, lineas, articulo_ids):
+        self.guardar(lineas, None)
+
+    def eliminar(self, lineas, articulo_id):
+        self.guardar(lineas, articulo_id)
+
+    def vaciar(self):
+        carrito_id = self.session.get(CLAVE_CARRITO_ID)
+        if carrito_id is not None:
+            caches[settings.CART_CACHE_ALIAS].delete(self._clave(carrito_id))
+
+
+ALMACENES = {
+    'bd': AlmacenBD,
+    'cache': AlmacenCache,
+    'sesion': AlmacenSesion,
+}
+
+
+def get_almacen(request):
+    """Almacén configurado en CART_BACKEND para la request"""
+    return ALMACENES[settings.CART_BACKEND](request)
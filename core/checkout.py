@@ -0,0 +1,179 @@
+# core/checkout.py
+"""
+Motor de escritura del checkout.
+
+Convierte el carrito en una orden con un número fijo de sentencias:
+la reserva de stock por lote de artículos (ver core/stock.py), un INSERT
+de la orden con su importe ya calculado, uno de sus tareas en segundo
+plano (PDF y correo) y un INSERT masivo de los items.
+
+Cada envío del formulario trae un token de idempotencia emitido con la
+página. Lo primero que hace la transacción es guardarlo (único por
+usuario) junto al id de la orden que va a crear: un segundo envío con el
+mismo token, aunque llegue a la vez, espera a que el primero termine y
+falla por la restricción única, sin reservar stock (CheckoutDuplicado con
+la orden original). La vista consulta el token antes de todo para
+responder los reintentos sin tocar el carrito.
+"""
+import logging
+import secrets
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from pos_project.choices import EstadoOrden
+from .models import OrdenCompraCliente, ItemOrdenCompraCliente, TokenCheckout
+from . import documentos
+from .money import Dinero, total_lineas
+from .secuencias import siguiente_nro_pedido
+from .signals import notificar_articulos
+from .relacionados import registrar_orden
+from .stock import reservar_stock, StockInsuficiente
+
+logger = logging.getLogger(__name__)
+
+
+class ContadorConsultas:
+    """Cuenta las sentencias SQL ejecutadas mientras está instalado en la conexión"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+class CheckoutDuplicado(Exception):
+    """El token ya se usó; `pedido_id` es la orden que creó el primer envío"""
+
+    def __init__(self, pedido_id):
+        self.pedido_id = pedido_id
+        super().__init__(f'El checkout ya se procesó (orden {pedido_id})')
+
+
+def nuevo_token():
+    """Token de idempotencia para un formulario de checkout"""
+    return secrets.token_urlsafe(32)
+
+
+def pedido_del_token(usuario, token):
+    """Id de la orden creada con el token, o None"""
+    return TokenCheckout.objects.filter(usuario=usuario, token=token).values_list('pedido_id', flat=True).first()
+
+
+def _ajustar_lineas(lineas, reservado):
+    """Reparte lo reservado entre las líneas del carrito, en su orden original"""
+    restante = dict(reservado)
+    ajustadas = []
+    for linea in lineas:
+        articulo_id = linea['articulo'].pk
+        cantidad = min(linea['cantidad'], restante.get(articulo_id, 0))
+        if cantidad <= 0:
+            continue
+        restante[articulo_id] -= cantidad
+        ajustadas.append(dict(linea, cantidad=cantidad))
+    return ajustadas
+
+
+def procesar_checkout(cart, cliente, vendedor, usuario, notas='', permitir_parcial=False, token=None):
+    """
+    Crea la orden y sus items a partir del carrito y descuenta el stock.
+
+    Con `token`, un envío repetido lanza CheckoutDuplicado con la orden
+    original en lugar de crear otra.
+
+    Con `permitir_parcial`, las líneas sin stock suficiente se ajustan a lo
+    disponible (y se omiten si no queda nada); las líneas ajustadas quedan en
+    el atributo `lineas_ajustadas` de la orden. Devuelve la orden con el
+    atributo `consultas_checkout`: sentencias SQL usadas en la request,
+    incluidas las de los avisos posteriores a la transacción.
+    """
+    lineas = list(cart)
+    if not lineas:
+        raise ValueError('El carrito está vacío.')
+
+    cantidades = {}
+    for linea in lineas:
+        articulo_id = linea['articulo'].pk
+        cantidades[articulo_id] = cantidades.get(articulo_id, 0) + linea['cantidad']
+
+    contador = ContadorConsultas()
+    pedido_id = uuid.uuid4()
+    try:
+        with connection.execute_wrapper(contador):
+            # El número se reserva fuera de la transacción (ver core/secuencias.py)
+            nro_pedido = siguiente_nro_pedido()
+            with transaction.atomic():
+                if token:
+                    # Primera sentencia: un envío concurrente con el mismo token
+                    # queda esperando aquí y luego falla por la restricción única
+                    # (la FK a la orden se verifica al confirmar)
+                    TokenCheckout.objects.create(token=token, usuario=usuario, pedido_id=pedido_id)
+                reservado = reservar_stock(cantidades, permitir_parcial=permitir_parcial)
+                confirmadas = _ajustar_lineas(lineas, reservado)
+                if not confirmadas:
+                    raise StockInsuficiente([linea['articulo'] for linea in lineas])
+
+                # Aritmética en centavos; a Decimal solo al guardar
+                precios = [Dinero.desde(linea['precio']) for linea in confirmadas]
+                importe = total_lineas((precio, linea['cantidad']) for precio, linea in zip(precios, confirmadas))
+                orden = OrdenCompraCliente.objects.create(
+                    pedido_id=pedido_id,
+                    nro_pedido=nro_pedido,
+                    cliente=cliente,
+                    vendedor=vendedor,
+                    estado=EstadoOrden.PENDIENTE,
+                    notas=notas,
+                    importe=importe.a_decimal(),
+                    creado_por=usuario
+                )
+
+                # PDF y correo de confirmación (core/tareas.py): se confirman o
+                # se revierten con la orden
+                documentos.encolar_documentos(orden)
+
+                ItemOrdenCompraCliente.objects.bulk_create([
+                    ItemOrdenCompraCliente(
+                        pedido=orden,
+                        nro_item=numero,
+                        articulo=linea['articulo'],
+                        cantidad=linea['cantidad'],
+                        precio_unitario=precio.a_decimal(),
+                        total_item=(precio * linea['cantidad']).a_decimal(),
+                        creado_por=usuario
+                    )
+                    for numero, (precio, linea) in enumerate(zip(precios, confirmadas), start=1)
+                ])
+    except IntegrityError:
+        original = pedido_del_token(usuario, token) if token else None
+        if original is None:
+            raise
+        raise CheckoutDuplicado(original)
+
+    # También corren en la request y cuentan en el presupuesto: los pares
+    # comprados juntos (antes del aviso, que invalida los relacionados
+    # cacheados) y el aviso del descuento de stock, un UPDATE masivo sin
+    # señales de modelo. Fuera del try: un error aquí no es un envío duplicado
+    with connection.execute_wrapper(contador):
+        transaction.on_commit(lambda: registrar_orden(orden.pk))
+        notificar_articulos([pk for pk, cantidad in reservado.items() if cantidad > 0], campos={'stock'})
+
+    orden.consultas_checkout = contador.total
+    orden.lineas_ajustadas = [
+        linea['articulo'] for linea in lineas
+        if reservado.get(linea['articulo'].pk, 0) < cantidades[linea['articulo'].pk]
+    ]
+    presupuesto = getattr(settings, 'CHECKOUT_QUERY_BUDGET', None)
+    if presupuesto is not None and contador.total > presupuesto:
+        logger.warning(
+            'Checkout %s usó %s consultas para %s líneas (presupuesto: %s)',
+            orden.nro_pedido, contador.total, len(confirmadas), presupuesto
+        )
+    else:
+        logger.info(
+            'Checkout %s usó %s consultas para %s líneas',
+            orden.nro_pedido, contador.total, len(confirmadas)
+        )
+    return orden
@@ -0,0 +1,197 @@
+# core/documentos.py
+"""
+Documentos de una orden: el detalle, el PDF y el correo de confirmación.
+
+Los tres leen la orden con `ordenes_para_documento`: la orden con su
+cliente, el tipo de identificación y el vendedor en un JOIN, y los items con
+la descripción del artículo en una segunda consulta, sin importar cuántas
+líneas tenga.
+
+El correo y el PDF se preparan en segundo plano (core/tareas.py) al
+confirmarse el checkout: el correo sale por SMTP desde el trabajador y el
+PDF queda guardado en un directorio privado (DOCUMENTOS_PDF_ROOT, fuera de
+MEDIA_ROOT: tiene datos del cliente y no debe servirse sin autenticar), que
+comparten el trabajador y los procesos web, de donde lo sirve solo
+generate_pdf_order, tras verificar el acceso, sin pasar por ReportLab. La ruta incluye el estado de la
+orden, así que un cambio de estado genera un PDF nuevo; el del estado
+anterior se borra al guardarlo.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.mail import EmailMultiAlternatives
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from pos_project.choices import EstadoOrden
+from .models import OrdenCompraCliente, ItemOrdenCompraCliente
+from .money import Dinero
+from .tareas import tarea, encolar_lote
+
+TAREA_CORREO = 'documentos.correo_confirmacion'
+TAREA_PDF = 'documentos.prerenderizar_pdf'
+
+
+def _items():
+    """Items en orden de línea con la descripción del artículo en el mismo JOIN"""
+    return Prefetch('items_orden_compra', queryset=ItemOrdenCompraCliente.objects.select_related('articulo').only(
+        'pedido', 'nro_item', 'cantidad', 'precio_unitario', 'total_item', 'articulo__descripcion'
+    ).order_by('nro_item'))
+
+
+def ordenes_para_documento(items=True):
+    """Órdenes con cliente, tipo de identificación y vendedor; con `items`, también sus items"""
+    ordenes = OrdenCompraCliente.objects.select_related('cliente__tipo_identificacion', 'vendedor')
+    return ordenes.prefetch_related(_items()) if items else ordenes
+
+
+def cargar_orden(pedido_id, items=True):
+    """La orden lista para sus documentos, o None si no existe"""
+    return ordenes_para_documento(items).filter(pedido_id=pedido_id).first()
+
+
+def cargar_items(orden):
+    """Trae los items de una orden cargada sin ellos (no hace nada si ya están)"""
+    prefetch_related_objects([orden], _items())
+
+
+def _almacen_pdf():
+    """Almacenamiento privado de los PDF (sin URL pública)"""
+    return FileSystemStorage(location=settings.DOCUMENTOS_PDF_ROOT, base_url=None)
+
+
+def _ruta_pdf(orden):
+    return f'{orden.pedido_id}/{orden.estado}.pdf'
+
+
+def pdf_orden(orden):
+    """Bytes del PDF de la orden renderizado con ReportLab"""
+    cargar_items(orden)
+    buffer = BytesIO()
+
+    # Crear el PDF
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Título
+    p.setFont("Helvetica-Bold", 18)
+    p.drawString(50, height - 50, f"Orden de Compra #{orden.nro_pedido}")
+
+    # Fecha
+    p.setFont("Helvetica", 12)
+    p.drawString(50, height - 80, f"Fecha: {orden.fecha_pedido}")
+
+    # Estado
+    estado_display = dict(EstadoOrden.choices).get(orden.estado, "Desconocido")
+    p.drawString(50, height - 100, f"Estado: {estado_display}")
+
+    # Información del cliente
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(50, height - 140, "Información del Cliente:")
+
+    p.setFont("Helvetica", 12)
+    p.drawString(50, height - 160, f"Nombre: {orden.cliente.nombres}")
+    p.drawString(50, height - 180, f"Documento: {orden.cliente.tipo_identificacion.nombre_tipo_identificacion} {orden.cliente.nro_documento}")
+    p.drawString(50, height - 200, f"Email: {orden.cliente.correo_electronico}")
+
+    # Tabla de items
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(50, height - 240, "Detalle de la Orden:")
+
+    # Items de la orden
+    y = height - 280
+    p.setFont("Helvetica", 10)
+    p.drawString(50, y, "Item")
+    p.drawString(150, y, "Producto")
+    p.drawString(350, y, "Precio")
+    p.drawString(420, y, "Cantidad")
+    p.drawString(490, y, "Total")
+
+    y -= 20
+    for item in orden.items_orden_compra.all():
+        p.drawString(50, y, str(item.nro_item))
+        p.drawString(150, y, item.articulo.descripcion[:25])
+        p.drawString(350, y, f"${Dinero.desde(item.precio_unitario)}")
+        p.drawString(420, y, str(item.cantidad))
+        p.drawString(490, y, f"${Dinero.desde(item.total_item)}")
+        y -= 15
+
+    # Total
+    y -= 20
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(420, y, f"Total: ${Dinero.desde(orden.importe)}")
+
+    # Pie de página
+    p.setFont("Helvetica", 10)
+    p.drawString(50, 50, f"Generado el {timezone.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    p.drawString(width - 200, 50, "Sistema POS © 2025")
+
+    # Guardar el PDF
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def pdf_orden_guardado(orden):
+    """PDF de la orden desde el almacenamiento; si no está (o cambió de estado) se renderiza y se guarda"""
+    almacen, ruta = _almacen_pdf(), _ruta_pdf(orden)
+    if almacen.exists(ruta):
+        with almacen.open(ruta, 'rb') as archivo:
+            return archivo.read()
+
+    contenido = pdf_orden(orden)
+    almacen.save(ruta, ContentFile(contenido))
+    directorio, nombre = ruta.rsplit('/', 1)
+    # Se borran el PDF de un estado anterior y la copia renombrada si otro
+    # proceso lo guardó primero
+    for archivo in almacen.listdir(directorio)[1]:
+        if archivo != nombre:
+            almacen.delete(f'{directorio}/{archivo}')
+    return contenido
+
+
+def correo_confirmacion(orden):
+    """Mensaje de confirmación de la orden (HTML con alternativa en texto plano)"""
+    cargar_items(orden)
+    html_content = render_to_string('emails/order_confirmation.html', {
+        'orden': orden,
+        'items': orden.items_orden_compra.all(),
+    })
+    email = EmailMultiAlternatives(
+        f'Confirmación de Orden #{orden.nro_pedido}',
+        strip_tags(html_content),
+        settings.DEFAULT_FROM_EMAIL,
+        [orden.cliente.correo_electronico]
+    )
+    email.attach_alternative(html_content, "text/html")
+    return email
+
+
+def encolar_documentos(orden, correo=None):
+    """Encola el PDF y, si corresponde, el correo de la orden en la transacción en curso"""
+    correo = settings.PEDIDO_CORREO_CONFIRMACION if correo is None else correo
+    trabajos = [(TAREA_PDF, {'pedido_id': str(orden.pedido_id)})]
+    if correo:
+        trabajos.append((TAREA_CORREO, {'pedido_id': str(orden.pedido_id)}))
+    encolar_lote(trabajos)
+
+
+@tarea(TAREA_PDF)
+def _prerenderizar_pdf(pedido_id):
+    orden = cargar_orden(pedido_id)
+    if orden:
+        pdf_orden_guardado(orden)
+
+
+@tarea(TAREA_CORREO)
+def _enviar_correo_confirmacion(pedido_id):
+    orden = cargar_orden(pedido_id)
+    if orden and orden.cliente.correo_electronico:
+        # Un error de SMTP se propaga: la cola reintenta con espera
+        correo_confirmacion(orden).send()
@@ -0,0 +1,158 @@
+# core/escaner.py
+"""
+Índice en memoria de códigos de barras para el escaneo en caja.
+
+Cada proceso mantiene un diccionario codigo_barras -> ArticuloEscaneado
+(id, código, descripción, precio y stock), de modo que resolver un escaneo
+no toca la base de datos. El índice:
+
+- se precarga al arrancar (ver pos_project/wsgi.py) o en el primer escaneo;
+- se actualiza al confirmarse los cambios de Articulo/ListaPrecio hechos en
+  el mismo proceso (señal articulos_modificados);
+- cada SCAN_INDEX_TTL segundos recoge los cambios hechos por otros procesos
+  o por UPDATE masivos (p. ej. el descuento de stock del checkout) leyendo
+  las filas con fecha_modificacion posterior a la última sincronización,
+  menos SCAN_INDEX_MARGEN segundos: una transacción en curso marca sus
+  filas con la hora en que las escribe, que puede ser anterior a la
+  sincronización aunque se confirmen después.
+
+El precio y el stock del índice son orientativos: el checkout vuelve a
+validar el stock dentro de su transacción.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from pos_project.choices import EstadoEntidades
+from .models import Articulo, ListaPrecio
+from .signals import articulos_modificados
+
+logger = logging.getLogger(__name__)
+
+ArticuloEscaneado = namedtuple(
+    'ArticuloEscaneado', ['articulo_id', 'codigo_articulo', 'descripcion', 'precio', 'stock']
+)
+
+# Filas por lote al leer el catálogo
+LOTE_CARGA = 5000
+
+
+class IndiceCodigosBarras:
+    """Diccionario codigo_barras -> ArticuloEscaneado del proceso actual"""
+
+    def __init__(self):
+        self._codigos = {}
+        self._codigo_por_articulo = {}
+        self._lock = threading.Lock()
+        self._ultima_sincronizacion = None
+        self._siguiente_revision = 0.0
+        self.cargado = False
+
+    def __len__(self):
+        return len(self._codigos)
+
+    def _leer(self, articulos):
+        """Lee artículos y su primer precio; devuelve {articulo_id: (codigo_barras, entrada|None)}"""
+        filas = articulos.values_list(
+            'articulo_id', 'codigo_barras', 'codigo_articulo', 'descripcion', 'stock', 'estado'
+        ).order_by('codigo_articulo')
+
+        precios = {}
+        # Mismo precio que Articulo.listaprecio (primer precio por clave primaria)
+        for articulo_id, precio in ListaPrecio.objects.filter(
+            articulo__in=articulos
+        ).values_list('articulo_id', 'precio_1').order_by('articulo_id', 'pk').iterator(chunk_size=LOTE_CARGA):
+            precios.setdefault(articulo_id, precio)
+
+        leidos = {}
+        for articulo_id, codigo_barras, codigo, descripcion, stock, estado in filas.iterator(chunk_size=LOTE_CARGA):
+            entrada = None
+            if codigo_barras and estado == EstadoEntidades.ACTIVO:
+                entrada = ArticuloEscaneado(articulo_id, codigo, descripcion, precios.get(articulo_id), stock)
+            leidos[articulo_id] = (codigo_barras, entrada)
+        return leidos
+
+    def cargar(self):
+        """Carga el índice completo desde la base de datos"""
+        inicio = timezone.now()
+        leidos = self._leer(Articulo.objects.filter(estado=EstadoEntidades.ACTIVO, codigo_barras__gt=''))
+
+        codigos = {}
+        codigo_por_articulo = {}
+        for articulo_id, (codigo_barras, entrada) in leidos.items():
+            # Con códigos de barras repetidos gana el primer código de artículo
+            if entrada and codigo_barras not in codigos:
+                codigos[codigo_barras] = entrada
+                codigo_por_articulo[articulo_id] = codigo_barras
+
+        with self._lock:
+            self._codigos = codigos
+            self._codigo_por_articulo = codigo_por_articulo
+            self._ultima_sincronizacion = inicio
+            self._siguiente_revision = time.monotonic() + settings.SCAN_INDEX_TTL
+            self.cargado = True
+        return len(codigos)
+
+    def actualizar(self, articulo_ids):
+        """Vuelve a leer los artículos indicados (altas, bajas y cambios)"""
+        leidos = self._leer(Articulo.objects.filter(pk__in=list(articulo_ids)))
+        with self._lock:
+            for articulo_id in articulo_ids:
+                anterior = self._codigo_por_articulo.pop(articulo_id, None)
+                if getattr(self._codigos.get(anterior), 'articulo_id', None) == articulo_id:
+                    del self._codigos[anterior]
+                codigo_barras, entrada = leidos.get(articulo_id, (None, None))
+                if entrada:
+                    self._codigos[codigo_barras] = entrada
+                    self._codigo_por_articulo[articulo_id] = codigo_barras
+
+    def sincronizar(self):
+        """Aplica los cambios hechos desde la última sincronización (cualquier proceso)"""
+        inicio = timezone.now()
+        with self._lock:
+            desde = self._ultima_sincronizacion - timedelta(seconds=settings.SCAN_INDEX_MARGEN)
+        articulo_ids = set(Articulo.objects.filter(fecha_modificacion__gte=desde).values_list('pk', flat=True))
+        articulo_ids.update(ListaPrecio.objects.filter(fecha_modificacion__gte=desde).values_list('articulo_id', flat=True))
+        if articulo_ids:
+            self.actualizar(articulo_ids)
+        with self._lock:
+            # Un cargar() concurrente pudo dejar una marca más nueva
+            self._ultima_sincronizacion = max(self._ultima_sincronizacion, inicio)
+
+    def buscar(self, codigo_barras):
+        """Devuelve el ArticuloEscaneado del código o None"""
+        if not self.cargado:
+            self.cargar()
+        elif settings.SCAN_INDEX_TTL and time.monotonic() >= self._siguiente_revision:
+            self._siguiente_revision = time.monotonic() + settings.SCAN_INDEX_TTL
+            self.sincronizar()
+        return self._codigos.get(codigo_barras)
+
+
+indice_codigos = IndiceCodigosBarras()
+
+
+def precargar_indice():
+    """Carga el índice al arrancar el servidor; un fallo no impide arrancar"""
+    if not settings.SCAN_INDEX_PRECARGAR:
+        return
+    try:
+        cargados = indice_codigos.cargar()
+        logger.info(f'Índice de códigos de barras cargado: {cargados} artículos')
+    except DatabaseError as e:
+        logger.warning(f'No se pudo precargar el índice de códigos de barras: {e}')
+
+
+@receiver(articulos_modificados)
+def _actualizar_indice(sender, articulo_ids, campos=None, **kwargs):
+    """Refresca los artículos modificados cuando se confirma la transacción"""
+    if not indice_codigos.cargado or (campos is not None and campos <= {'fecha_modificacion'}):
+        return
+    transaction.on_commit(lambda: indice_codigos.actualizar(articulo_ids))
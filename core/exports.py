@@ -0,0 +1,151 @@
+# core/exports.py
+"""
+Exportaciones en streaming del catálogo y las órdenes (CSV o JSONL).
+
+Las filas se leen con QuerySet.iterator(chunk_size=...) (cursores del
+lado del servidor en PostgreSQL) y se escriben una a una, así que la
+memoria no depende del número de filas. Se ordenan por clave primaria:
+para reanudar una exportación cortada se pasa `despues` con el id de la
+última fila recibida.
+"""
+import csv
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .models import Articulo, ListaPrecio, OrdenCompraCliente, ItemOrdenCompraCliente
+
+# Filas por lectura a la base de datos
+LOTE_EXPORTACION = 2000
+
+FORMATOS = ('csv', 'jsonl')
+
+# nombre -> (modelo, campo de fecha para filtrar, {columna: campo})
+EXPORTACIONES = {
+    'articulos': (Articulo, 'fecha_modificacion', {
+        'id': 'articulo_id',
+        'codigo_articulo': 'codigo_articulo',
+        'codigo_barras': 'codigo_barras',
+        'descripcion': 'descripcion',
+        'presentacion': 'presentacion',
+        'grupo': 'grupo__nombre_grupo',
+        'linea': 'linea__nombre_linea',
+        'stock': 'stock',
+        'estado': 'estado',
+        'fecha_creacion': 'fecha_creacion',
+        'fecha_modificacion': 'fecha_modificacion',
+    }),
+    'lista_precios': (ListaPrecio, 'fecha_modificacion', {
+        'id': 'precio_id',
+        'articulo_id': 'articulo_id',
+        'codigo_articulo': 'articulo__codigo_articulo',
+        'precio_1': 'precio_1',
+        'precio_2': 'precio_2',
+        'precio_compra': 'precio_compra',
+        'precio_costo': 'precio_costo',
+        'estado': 'estado',
+        'fecha_creacion': 'fecha_creacion',
+        'fecha_modificacion': 'fecha_modificacion',
+    }),
+    'ordenes': (OrdenCompraCliente, 'fecha_creacion', {
+        'id': 'pedido_id',
+        'nro_pedido': 'nro_pedido',
+        'fecha_pedido': 'fecha_pedido',
+        'cliente_id': 'cliente_id',
+        'cliente': 'cliente__nombres',
+        'vendedor_id': 'vendedor_id',
+        'importe': 'importe',
+        'estado': 'estado',
+        'notas': 'notas',
+        'creado_por_id': 'creado_por_id',
+        'fecha_creacion': 'fecha_creacion',
+    }),
+    'items': (ItemOrdenCompraCliente, 'fecha_creacion', {
+        'id': 'item_id',
+        'pedido_id': 'pedido_id',
+        'nro_pedido': 'pedido__nro_pedido',
+        'nro_item': 'nro_item',
+        'articulo_id': 'articulo_id',
+        'codigo_articulo': 'articulo__codigo_articulo',
+        'cantidad': 'cantidad',
+        'precio_unitario': 'precio_unitario',
+        'total_item': 'total_item',
+        'estado': 'estado',
+        'fecha_creacion': 'fecha_creacion',
+    }),
+}
+
+
+def _inicio_del_dia(valor, nombre):
+    try:
+        fecha = datetime.date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f'{nombre} debe tener el formato AAAA-MM-DD')
+    return timezone.make_aware(datetime.datetime.combine(fecha, datetime.time.min))
+
+
+def filas_exportacion(nombre, desde=None, hasta=None, estado=None, despues=None):
+    """
+    Devuelve (columnas, iterador de tuplas) de la exportación `nombre`.
+
+    `desde`/`hasta` (AAAA-MM-DD, inclusivos) filtran por el campo de fecha
+    de la exportación; `despues` reanuda a partir de un id. Lanza ValueError
+    si algún parámetro no es válido.
+    """
+    if nombre not in EXPORTACIONES:
+        raise ValueError(f"Exportación desconocida: {nombre}. Opciones: {', '.join(EXPORTACIONES)}")
+    modelo, campo_fecha, columnas = EXPORTACIONES[nombre]
+
+    filas = modelo.objects.all()
+    if desde:
+        filas = filas.filter(**{f'{campo_fecha}__gte': _inicio_del_dia(desde, 'desde')})
+    if hasta:
+        # Rango semiabierto para aprovechar el índice de la fecha
+        fin = _inicio_del_dia(hasta, 'hasta') + datetime.timedelta(days=1)
+        filas = filas.filter(**{f'{campo_fecha}__lt': fin})
+    if estado not in (None, ''):
+        if not str(estado).isdigit():
+            raise ValueError('estado debe ser un número')
+        filas = filas.filter(estado=int(estado))
+    if despues:
+        try:
+            filas = filas.filter(pk__gt=modelo._meta.pk.to_python(despues))
+        except ValidationError:
+            raise ValueError('despues debe ser un id válido')
+
+    filas = filas.order_by('pk').values_list(*columnas.values())
+    return list(columnas), filas.iterator(chunk_size=LOTE_EXPORTACION)
+
+
+class _Eco:
+    """Objeto tipo archivo que devuelve lo escrito (para csv.writer en streaming)"""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def serializar(columnas, filas, formato):
+    """Devuelve un generador con las líneas de texto de la exportación, una por fila"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}. Opciones: {', '.join(FORMATOS)}")
+    return _lineas_csv(columnas, filas) if formato == 'csv' else _lineas_jsonl(columnas, filas)
+
+
+def _lineas_csv(columnas, filas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(columnas)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def _lineas_jsonl(columnas, filas):
+    for fila in filas:
+        yield json.dumps(dict(zip(columnas, fila)), ensure_ascii=False, default=_valor_json) + '\n'
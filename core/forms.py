@@ -2,6 +2,9 @@
 from django import forms
 from .models import Articulo, GrupoArticulo, LineaArticulo, ListaPrecio
 from pos_project.choices import EstadoEntidades
+from .taxonomia import taxonomia
+
+OPCION_VACIA = ('', '---------')
 
 class ArticuloForm(forms.ModelForm):
     class Meta:
@@ -55,17 +58,23 @@ class ArticuloForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Filtrar solo grupos activos
+        # Filtrar solo grupos activos; las opciones salen del árbol en memoria
+        # y el queryset solo se usa al validar
         self.fields['grupo'].queryset = GrupoArticulo.objects.filter(estado=EstadoEntidades.ACTIVO)
+        self.fields['grupo'].choices = [OPCION_VACIA] + taxonomia.grupos()
         
-        # Si hay una instancia (editando), filtrar líneas por grupo
-        if self.instance.pk and self.instance.grupo:
+        # Líneas del grupo enviado o, al editar, del grupo de la instancia
+        grupo_id = self.data.get(self.add_prefix('grupo')) if self.is_bound else None
+        grupo_id = grupo_id or self.instance.grupo_id
+        lineas = taxonomia.lineas(int(grupo_id)) if str(grupo_id).isdigit() else None
+        if lineas is not None:
             self.fields['linea'].queryset = LineaArticulo.objects.filter(
-                grupo=self.instance.grupo, 
+                grupo_id=grupo_id, 
                 estado=EstadoEntidades.ACTIVO
             )
+            self.fields['linea'].choices = [OPCION_VACIA] + [(l['id'], l['nombre']) for l in lineas]
         else:
-            # Si no hay instancia o grupo, mostrar líneas vacías
+            # Sin grupo, mostrar líneas vacías
             self.fields['linea'].queryset = LineaArticulo.objects.none()
         
         # Hacer campos requeridos más explícitos
@@ -209,8 +218,9 @@ class LineaArticuloForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filtrar solo grupos activos
+        # Filtrar solo grupos activos (opciones desde el árbol en memoria)
         self.fields['grupo'].queryset = GrupoArticulo.objects.filter(estado=EstadoEntidades.ACTIVO)
+        self.fields['grupo'].choices = [OPCION_VACIA] + taxonomia.grupos()
         
         self.fields['nombre_linea'].required = True
         self.fields['grupo'].required = True
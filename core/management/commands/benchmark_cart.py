@@ -0,0 +1,108 @@
+# core/management/commands/benchmark_cart.py
+"""
+Benchmark del volumen de escritura de sesión según el almacén del carrito.
+
+Simula una venta en cada almacén de core/cart_store.py: agregar N artículos,
+cambiar la cantidad de cada uno, quitar un tercio, con lecturas de páginas
+que no usan el carrito entre medio. Cada paso es una request nueva (la
+sesión se vuelve a cargar y se guarda solo si cambió, como hace
+SessionMiddleware). Reporta escrituras y bytes a django_session y
+escrituras al almacén. Los datos se crean en una transacción que se revierte.
+"""
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+
+from core import benchmarks
+from core.cart import Cart
+from core.cart_store import ALMACENES
+from core.models import LineaCarrito
+
+PREFIJO = 'CART'
+
+
+class ContadorEscrituras:
+    """Cuenta sentencias de escritura y bytes enviados por tabla"""
+
+    def __init__(self, tablas):
+        self.tablas = tablas
+        self.escrituras = dict.fromkeys(tablas, 0)
+        self.bytes = dict.fromkeys(tablas, 0)
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = sql.lstrip()[:6].upper()
+        if inicio in ('INSERT', 'UPDATE', 'DELETE'):
+            for tabla in self.tablas:
+                if f'"{tabla}"' in sql or f' {tabla} ' in sql:
+                    self.escrituras[tabla] += 1
+                    self.bytes[tabla] += sum(len(str(valor)) for valor in (params or ()))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Compara escrituras a django_session con cada almacén del carrito'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lineas', type=int, default=30, help='Artículos por carrito')
+        parser.add_argument('--lecturas', type=int, default=3,
+                            help='Páginas sin carrito visitadas entre cada cambio')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            articulos = benchmarks.preparar_catalogo(options['lineas'], prefijo=PREFIJO)
+            usuario, _, _ = benchmarks.preparar_referencias(PREFIJO)
+
+            self.stdout.write(
+                f"{'almacén':<8} {'escrituras sesión':>18} {'bytes sesión':>13} "
+                f"{'escrituras almacén':>19} {'tamaño sesión':>14} {'tiempo':>9}"
+            )
+            for nombre in ALMACENES:
+                with override_settings(CART_BACKEND=nombre):
+                    resultado = self._simular(articulos, usuario, options)
+                self.stdout.write(
+                    f"{nombre:<8} {resultado['escrituras_sesion']:>18} {resultado['bytes_sesion']:>13} "
+                    f"{resultado['escrituras_almacen']:>19} {resultado['tamano_sesion']:>14} "
+                    f"{resultado['segundos'] * 1000:>7.1f}ms"
+                )
+            transaction.set_rollback(True)
+
+    def _simular(self, articulos, usuario, options):
+        fabrica = RequestFactory()
+        session = SessionStore()
+        session['_auth_user_id'] = str(usuario.pk)
+        session.save()
+
+        def request_nueva(usar_carrito):
+            request = fabrica.get('/')
+            request.user = usuario
+            request.session = SessionStore(session_key=session.session_key)
+            if usar_carrito:
+                usar_carrito(Cart(request))
+            else:
+                request.session.get('_auth_user_id')  # página que solo lee la sesión
+            if request.session.modified:
+                request.session.save()
+
+        pasos = [lambda cart, a=articulo: cart.add(a) for articulo in articulos]
+        pasos += [lambda cart, a=articulo: cart.update_item(a, 2) for articulo in articulos]
+        pasos += [lambda cart, a=articulo: cart.remove(a) for articulo in articulos[::3]]
+
+        tabla_sesion = SessionStore.get_model_class()._meta.db_table
+        contador = ContadorEscrituras([tabla_sesion, LineaCarrito._meta.db_table])
+        with connection.execute_wrapper(contador), benchmarks.cronometro() as transcurrido:
+            for paso in pasos:
+                request_nueva(paso)
+                for _ in range(options['lecturas']):
+                    request_nueva(None)
+            segundos = transcurrido()
+
+        final = SessionStore(session_key=session.session_key)
+        tamano = len(final.encode(final.load()))
+        return {
+            'escrituras_sesion': contador.escrituras[tabla_sesion],
+            'bytes_sesion': contador.bytes[tabla_sesion],
+            'escrituras_almacen': contador.escrituras[LineaCarrito._meta.db_table],
+            'tamano_sesion': tamano,
+            'segundos': segundos,
+        }
@@ -0,0 +1,55 @@
+# core/management/commands/benchmark_money.py
+"""
+Micro-benchmark del total de un carrito de N líneas.
+
+Compara el cálculo anterior (precio en float en la sesión, convertido con
+Decimal(str(...)) en cada línea) con Dinero (core/money.py, enteros de
+centavos). Verifica además que el total con float acumulado difiere del
+exacto. No toca la base de datos.
+"""
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from core import benchmarks
+from core.money import Dinero, total_lineas
+
+
+def _total_decimal(lineas):
+    return sum((Decimal(str(precio)) * cantidad for precio, cantidad in lineas), Decimal('0'))
+
+
+class Command(BaseCommand):
+    help = 'Compara el total de N líneas con float/Decimal frente a Dinero (centavos enteros)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lineas', type=int, default=1000, help='Líneas por total')
+        parser.add_argument('--repeticiones', type=int, default=200, help='Totales calculados por variante')
+
+    def handle(self, *args, **options):
+        azar = random.Random(0)
+        centavos = [(azar.randint(1, 100000), azar.randint(1, 10)) for _ in range(options['lineas'])]
+        flotantes = [(c / 100, cantidad) for c, cantidad in centavos]
+        dinero = [(Dinero(c), cantidad) for c, cantidad in centavos]
+
+        resultados = {}
+        for nombre, funcion, lineas in (
+            ('float + Decimal', _total_decimal, flotantes),
+            ('Dinero', total_lineas, dinero),
+        ):
+            with benchmarks.cronometro() as transcurrido:
+                for _ in range(options['repeticiones']):
+                    total = funcion(lineas)
+                resultados[nombre] = (transcurrido() / options['repeticiones'], total)
+
+        for nombre, (segundos, total) in resultados.items():
+            self.stdout.write(f'{nombre:<16} {segundos * 1000:8.3f} ms por total   total {total}')
+
+        esperado = Dinero(sum(c * cantidad for c, cantidad in centavos))
+        if Dinero.desde(resultados['float + Decimal'][1]) != esperado or resultados['Dinero'][1] != esperado:
+            self.stdout.write(self.style.ERROR('Los totales no coinciden'))
+        acumulado_float = sum(precio * cantidad for precio, cantidad in flotantes)
+        self.stdout.write(
+            f'Total exacto {esperado}; sumando float directamente: {acumulado_float!r}'
+        )
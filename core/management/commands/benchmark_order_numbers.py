@@ -0,0 +1,85 @@
+# core/management/commands/benchmark_order_numbers.py
+"""
+Benchmark del asignador de números de pedido con procesos concurrentes.
+
+Compara la reserva número a número (bloque de 1, una ida a la base de datos
+por orden) con la reserva por bloques, y verifica que no haya duplicados.
+Con --crear-ordenes mide además la creación real de órdenes.
+"""
+import multiprocessing
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+PREFIJO = 'NUMBENCH'
+TIENDA = 'BENCH'
+
+
+def _trabajador(args):
+    """Pide `cantidad` números; devuelve (números, segundos, bloques reservados)"""
+    cantidad, bloque, crear_ordenes = args
+    django.setup()
+    import time
+    from core import benchmarks
+    from core.models import OrdenCompraCliente
+    from core.secuencias import AsignadorNumeros, FORMATO_NRO_PEDIDO
+
+    asignador = AsignadorNumeros(TIENDA, bloque)
+    if crear_ordenes:
+        usuario, cliente, vendedor = benchmarks.preparar_referencias(PREFIJO)
+
+    numeros = []
+    inicio = time.perf_counter()
+    for _ in range(cantidad):
+        numero = asignador.siguiente()
+        if crear_ordenes:
+            OrdenCompraCliente.objects.create(
+                nro_pedido=FORMATO_NRO_PEDIDO.format(tienda=TIENDA, numero=numero),
+                cliente=cliente, vendedor=vendedor, creado_por=usuario
+            )
+        numeros.append(numero)
+    transcurrido = time.perf_counter() - inicio
+
+    connections.close_all()
+    return numeros, transcurrido, asignador.bloques_reservados
+
+
+class Command(BaseCommand):
+    help = 'Mide órdenes/segundo del asignador de números de pedido con procesos concurrentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=4, help='Procesos concurrentes')
+        parser.add_argument('--ordenes', type=int, default=2000, help='Números por proceso')
+        parser.add_argument('--bloque', type=int, default=50, help='Tamaño de bloque a comparar')
+        parser.add_argument('--crear-ordenes', action='store_true', help='Crear también las órdenes')
+
+    def handle(self, *args, **options):
+        from core import benchmarks
+        from core.models import OrdenCompraCliente, SecuenciaPedido
+
+        benchmarks.preparar_referencias(PREFIJO)
+        for bloque in (1, options['bloque']):
+            OrdenCompraCliente.objects.filter(nro_pedido__startswith=f'ORD-{TIENDA}-').delete()
+            SecuenciaPedido.objects.filter(tienda=TIENDA).delete()
+            resultados = self._ejecutar(options, bloque)
+
+            numeros = [numero for r in resultados for numero in r[0]]
+            segundos = max(r[1] for r in resultados)
+            bloques = sum(r[2] for r in resultados)
+            if len(numeros) != len(set(numeros)):
+                raise CommandError(f'Números duplicados con bloque {bloque}')
+
+            self.stdout.write(
+                f'Bloque {bloque:>4}: {len(numeros) / segundos:>10.0f} órdenes/s, '
+                f'{bloques} reservas en BD para {len(numeros)} números, sin duplicados'
+            )
+
+        SecuenciaPedido.objects.filter(tienda=TIENDA).delete()
+        benchmarks.limpiar(PREFIJO)
+
+    def _ejecutar(self, options, bloque):
+        connections.close_all()
+        tareas = [(options['ordenes'], bloque, options['crear_ordenes'])] * options['procesos']
+        with multiprocessing.get_context('spawn').Pool(options['procesos']) as pool:
+            return pool.map(_trabajador, tareas)
@@ -0,0 +1,74 @@
+# core/management/commands/benchmark_scan.py
+"""
+Benchmark de latencia del escaneo de códigos de barras.
+
+Llama directamente a la vista scan_add (sin red ni middleware) con códigos
+al azar de un catálogo sintético y reporta p50/p99. El objetivo es p99 por
+debajo de 1 ms. El catálogo se crea dentro de una transacción que se
+revierte al final.
+"""
+import json
+import random
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from core import benchmarks
+from core.escaner import indice_codigos
+from core.views import scan_add
+
+PREFIJO = 'SCAN'
+OBJETIVO_P99_MS = 1.0
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia (p50/p99) del endpoint de escaneo de códigos de barras'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articulos', type=int, default=100000, help='Tamaño del catálogo')
+        parser.add_argument('--escaneos', type=int, default=20000, help='Escaneos a medir')
+        parser.add_argument('--carrito', type=int, default=50,
+                            help='Escaneos por carrito antes de empezar uno nuevo')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            benchmarks.preparar_catalogo(options['articulos'], prefijo=PREFIJO)
+            usuario, _, _ = benchmarks.preparar_referencias(PREFIJO)
+
+            with benchmarks.cronometro() as transcurrido:
+                cargados = indice_codigos.cargar()
+            self.stdout.write(f'Índice cargado: {cargados} códigos en {transcurrido():.2f}s')
+
+            tiempos = self._medir(usuario, options)
+            transaction.set_rollback(True)
+
+        p99 = benchmarks.percentil(tiempos, 99)
+        self.stdout.write(
+            f"{options['escaneos']} escaneos: p50 {benchmarks.percentil(tiempos, 50):.3f} ms, "
+            f"p99 {p99:.3f} ms, máx {max(tiempos):.3f} ms"
+        )
+        estilo = self.style.SUCCESS if p99 < OBJETIVO_P99_MS else self.style.ERROR
+        self.stdout.write(estilo(f'Objetivo p99 < {OBJETIVO_P99_MS} ms: {"cumplido" if p99 < OBJETIVO_P99_MS else "NO cumplido"}'))
+
+    def _medir(self, usuario, options):
+        fabrica = RequestFactory()
+        azar = random.Random(0)
+        tiempos = []
+        session = None
+
+        for numero in range(options['escaneos']):
+            if numero % options['carrito'] == 0:
+                session = SessionStore()
+            cuerpo = json.dumps({'codigo_barras': f"77{azar.randrange(options['articulos']):011d}"})
+            request = fabrica.post('/api/escanear/', cuerpo, content_type='application/json')
+            request.user = usuario
+            request.session = session
+
+            with benchmarks.cronometro() as transcurrido:
+                response = scan_add(request)
+            if response.status_code != 200:
+                raise CommandError(f'Escaneo fallido: {response.content!r}')
+            tiempos.append(transcurrido() * 1000)
+        return tiempos
@@ -0,0 +1,96 @@
+# core/management/commands/benchmark_search.py
+"""
+Benchmark de la búsqueda de artículos: filtro icontains (Q) contra el
+backend indexado configurado (FTS5 en SQLite, tsvector/trigramas en
+PostgreSQL).
+
+Cada búsqueda se mide como lo hace articulos_list: conteo para el
+paginador más la primera página de 12 resultados. El catálogo sintético
+crece por escalones (--filas) dentro de una transacción que se revierte al
+final, así que la base de datos queda como estaba.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import benchmarks
+from core.models import Articulo
+from core.search import BuscadorQ, get_buscador
+from pos_project.choices import EstadoEntidades
+
+PREFIJO = 'SRCH'
+LOTE_CATALOGO = 100000
+
+MARCAS = ['Gloria', 'Laive', 'Nestlé', 'Alicorp', 'Costeño', 'Pilsen', 'Inca', 'Bimbo']
+PRODUCTOS = ['Leche', 'Yogurt', 'Arroz', 'Aceite', 'Azúcar', 'Fideos', 'Galletas', 'Gaseosa',
+             'Cerveza', 'Atún', 'Pan', 'Mantequilla', 'Queso', 'Café', 'Detergente', 'Jabón']
+PRESENTACIONES = ['250ml', '500ml', '1L', '1kg', '5kg', 'x6', 'x12', 'Familiar']
+
+BUSQUEDAS = [
+    'leche',            # palabra frecuente
+    'yogurt gloria',    # dos palabras
+    'deterg',           # prefijo de palabra
+    'cafe',             # sin tilde
+    f'{PREFIJO}-00012', # prefijo de código
+    '7700000123',       # prefijo de código de barras
+    'inexistente',      # sin resultados
+]
+
+
+def _descripcion(numero):
+    return (
+        f'{PRODUCTOS[numero % len(PRODUCTOS)]} {MARCAS[numero // 7 % len(MARCAS)]} '
+        f'{PRESENTACIONES[numero // 3 % len(PRESENTACIONES)]}'
+    )
+
+
+class Command(BaseCommand):
+    help = 'Compara la búsqueda icontains con el índice de búsqueda a 10k/100k/1M artículos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', default='10000,100000,1000000',
+                            help='Tamaños de catálogo separados por comas')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Repeticiones por búsqueda')
+
+    def handle(self, *args, **options):
+        filas = sorted(int(valor) for valor in options['filas'].split(','))
+        buscadores = [BuscadorQ(), get_buscador()]
+        if buscadores[1].nombre == 'q':
+            self.stdout.write(self.style.WARNING('No hay índice disponible: se compara Q contra Q.'))
+
+        with transaction.atomic():
+            creados = 0
+            for total in filas:
+                self.stdout.write(f'Generando catálogo de {total} artículos...')
+                while creados < total:
+                    lote = min(LOTE_CATALOGO, total - creados)
+                    benchmarks.preparar_catalogo(lote, prefijo=PREFIJO, descripciones=_descripcion, desde=creados)
+                    creados += lote
+                with benchmarks.cronometro() as transcurrido:
+                    buscadores[1].reconstruir()
+                self.stdout.write(f'  Índice reconstruido en {transcurrido():.2f}s')
+
+                for buscador in buscadores:
+                    self._medir(buscador, total, options['repeticiones'])
+
+            # Todo lo generado (artículos e índice) se descarta
+            transaction.set_rollback(True)
+
+    def _medir(self, buscador, total, repeticiones):
+        base = Articulo.objects.filter(
+            estado=EstadoEntidades.ACTIVO
+        ).select_related('grupo', 'linea').order_by('-fecha_creacion')
+
+        tiempos = []
+        for texto in BUSQUEDAS:
+            for _ in range(repeticiones):
+                with benchmarks.cronometro() as transcurrido:
+                    resultados = buscador.filtrar(base, texto)
+                    resultados.count()
+                    list(resultados[:12])
+                tiempos.append(transcurrido() * 1000)
+
+        self.stdout.write(
+            f'  {total:>9} filas  {buscador.nombre:<8} '
+            f'p50 {benchmarks.percentil(tiempos, 50):>9.2f} ms   '
+            f'p95 {benchmarks.percentil(tiempos, 95):>9.2f} ms'
+        )
@@ -0,0 +1,79 @@
+# core/management/commands/benchmark_sync.py
+"""
+Benchmark de la carga de ventas encoladas por una caja sin conexión.
+
+Genera N ventas con claves de idempotencia y las carga por lotes con
+core/sincronizacion.py, como lo haría la caja al reconectarse. Reporta
+ventas por segundo y sentencias SQL por lote; después reenvía todos los
+lotes (reintento tras un corte) y verifica que no se crea ninguna orden
+nueva. Todo ocurre en una transacción que se revierte al final.
+"""
+import random
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import benchmarks
+from core.checkout import ContadorConsultas
+from core.models import OrdenCompraCliente
+from core.sincronizacion import sincronizar_ventas, CREADA, DUPLICADA
+
+PREFIJO = 'SYNC'
+
+
+class Command(BaseCommand):
+    help = 'Mide el rendimiento de la carga por lotes de ventas hechas sin conexión'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ventas', type=int, default=5000, help='Ventas encoladas')
+        parser.add_argument('--lote', type=int, default=500, help='Ventas por request')
+        parser.add_argument('--lineas', type=int, default=3, help='Líneas por venta')
+        parser.add_argument('--articulos', type=int, default=2000, help='Tamaño del catálogo')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            articulos = benchmarks.preparar_catalogo(options['articulos'], prefijo=PREFIJO, stock=10 ** 6)
+            usuario, _, _ = benchmarks.preparar_referencias(PREFIJO)
+            ventas = self._ventas(articulos, options)
+            lotes = [ventas[inicio:inicio + options['lote']] for inicio in range(0, len(ventas), options['lote'])]
+            antes = OrdenCompraCliente.objects.count()
+
+            for nombre, esperado in (('carga', CREADA), ('reenvío', DUPLICADA)):
+                contador = ContadorConsultas()
+                estados = {}
+                with connection.execute_wrapper(contador), benchmarks.cronometro() as transcurrido:
+                    for lote in lotes:
+                        for resultado in sincronizar_ventas(lote, usuario)['resultados']:
+                            estados[resultado['estado']] = estados.get(resultado['estado'], 0) + 1
+                    segundos = transcurrido()
+                self.stdout.write(
+                    f"{nombre:<8} {len(ventas)} ventas en {len(lotes)} lotes: {segundos:.2f}s "
+                    f"({len(ventas) / segundos:,.0f} ventas/s, {contador.total / len(lotes):.0f} sentencias por lote) "
+                    f"{estados}"
+                )
+                if estados.get(esperado) != len(ventas):
+                    self.stdout.write(self.style.ERROR(f'Se esperaban {len(ventas)} ventas "{esperado}"'))
+
+            creadas = OrdenCompraCliente.objects.count() - antes
+            estilo = self.style.SUCCESS if creadas == len(ventas) else self.style.ERROR
+            self.stdout.write(estilo(f'Órdenes creadas: {creadas} (esperadas {len(ventas)})'))
+            transaction.set_rollback(True)
+
+    def _ventas(self, articulos, options):
+        azar = random.Random(0)
+        caja = uuid.uuid4().hex[:8]
+        ahora = timezone.now()
+        return [
+            {
+                'clave': f'{caja}-{numero:07d}',
+                'fecha': (ahora - timedelta(minutes=options['ventas'] - numero)).isoformat(),
+                'lineas': [
+                    {'articulo_id': str(articulo.pk), 'cantidad': azar.randint(1, 3)}
+                    for articulo in azar.sample(articulos, options['lineas'])
+                ],
+            }
+            for numero in range(options['ventas'])
+        ]
@@ -0,0 +1,43 @@
+# core/management/commands/expire_pending_orders.py
+"""
+Cancela las órdenes PENDIENTES que nunca se completaron y repone su stock.
+
+Una orden pendiente tiene su stock descontado desde el checkout; si nadie
+la completa ni la cancela, ese stock queda retenido. Este comando cancela
+las creadas hace más de --older-than horas por lotes (una transacción por
+lote, ver core/cancelacion.py) y reporta el rendimiento.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import benchmarks, cancelacion
+
+
+class Command(BaseCommand):
+    help = 'Cancela por lotes las órdenes pendientes vencidas y repone su stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=settings.PEDIDOS_PENDIENTES_VENCEN_HORAS,
+                            help='Antigüedad mínima en horas de las órdenes pendientes a cancelar')
+        parser.add_argument('--lote', type=int, default=cancelacion.LOTE_EXPIRACION,
+                            help='Órdenes por transacción')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+        limite = timezone.now() - datetime.timedelta(hours=options['older_than'])
+
+        def progreso(ordenes):
+            self.stdout.write(f'  {ordenes} órdenes canceladas')
+
+        with benchmarks.cronometro() as transcurrido:
+            ordenes, unidades = cancelacion.expirar_pendientes(limite, lote=options['lote'], progreso=progreso)
+            segundos = transcurrido()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{ordenes} órdenes pendientes canceladas y {unidades} unidades repuestas en {segundos:.2f}s '
+            f'({ordenes / segundos if segundos else 0:,.0f} órdenes/s)'
+        ))
@@ -0,0 +1,209 @@
+# core/management/commands/explain_hot_queries.py
+"""
+Auditoría de planes de ejecución de las vistas más usadas.
+
+Siembra un catálogo y órdenes sintéticas, recorre las vistas de
+core/views.py con el cliente de pruebas de Django, captura cada SELECT que
+emiten y ejecuta EXPLAIN sobre él. Marca los recorridos secuenciales de
+tablas grandes (SCAN sin índice en SQLite, Seq Scan en PostgreSQL). En
+PostgreSQL se desactiva enable_seqscan durante el análisis: si aun así el
+plan elige un Seq Scan, es que no hay índice utilizable.
+
+Todo ocurre en una transacción que se revierte al final.
+"""
+import json
+import random
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from core import benchmarks
+from core.models import (
+    OrdenCompraCliente, ItemOrdenCompraCliente, Usuario,
+    TipoIdentificacion, CanalCliente, Vendedor, GrupoArticulo, LineaArticulo
+)
+from pos_project.choices import EstadoOrden
+
+PREFIJO = 'PLAN'
+
+# Tablas de referencia con pocas filas: recorrerlas enteras es lo esperable
+TABLAS_PEQUENAS = {
+    modelo._meta.db_table
+    for modelo in (TipoIdentificacion, CanalCliente, Vendedor, GrupoArticulo, LineaArticulo)
+}
+
+_SCAN_SQLITE = re.compile(r'^SCAN (?:TABLE )?(\S+)')
+
+
+def _vistas(datos):
+    """(nombre, url, método, cuerpo, staff) de cada request a auditar"""
+    articulo, orden = datos['articulo'], datos['orden']
+    return [
+        ('dashboard', reverse('dashboard'), 'get', None, False),
+        ('articulos_list', reverse('articulos_list'), 'get', None, False),
+        ('articulos_list stock bajo', reverse('articulos_list') + '?stock=bajo', 'get', None, False),
+        ('articulos_list búsqueda', reverse('articulos_list') + f'?q={PREFIJO}', 'get', None, False),
+        ('articulo_detail', reverse('articulo_detail', args=[articulo.pk]), 'get', None, False),
+        ('articulo_edit', reverse('articulo_edit', args=[articulo.pk]), 'get', None, False),
+        ('cart_add', reverse('cart_add', args=[articulo.pk]), 'post', {'cantidad': 1}, False),
+        ('cart_detail', reverse('cart_detail'), 'get', None, False),
+        ('checkout', reverse('checkout'), 'get', None, False),
+        ('scan_add', reverse('scan_add'), 'post', {'codigo_barras': articulo.codigo_barras}, False),
+        ('order_list', reverse('order_list'), 'get', None, False),
+        ('order_list staff', reverse('order_list'), 'get', None, True),
+        ('order_list staff por estado', reverse('order_list') + f'?estado={EstadoOrden.PENDIENTE}',
+         'get', None, True),
+        ('order_list staff por fecha', reverse('order_list') + f'?fecha_desde={orden.fecha_pedido}',
+         'get', None, True),
+        ('order_detail', reverse('order_detail', args=[orden.pk]), 'get', None, False),
+        ('lineas_por_grupo', reverse('lineas_por_grupo', args=[articulo.grupo_id]), 'get', None, False),
+        ('exportar ordenes', reverse('export_data', args=['ordenes']) + f'?desde={orden.fecha_pedido}',
+         'get', None, True),
+    ]
+
+
+class _Captura:
+    """Guarda (sql, params) de cada SELECT ejecutado"""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            self.consultas.append((sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas de las vistas principales y marca los recorridos secuenciales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articulos', type=int, default=20000, help='Artículos sintéticos')
+        parser.add_argument('--ordenes', type=int, default=5000, help='Órdenes sintéticas (3 items cada una)')
+        parser.add_argument('--planes', action='store_true', help='Mostrar el plan completo de cada consulta')
+        parser.add_argument('--estricto', action='store_true',
+                            help='Terminar con error si hay recorridos secuenciales')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Motor no soportado: {connection.vendor}')
+
+        # El cliente de pruebas necesita ALLOWED_HOSTS con 'testserver'
+        try:
+            setup_test_environment()
+            preparado = True
+        except RuntimeError:  # ya preparado (ejecución desde las pruebas)
+            preparado = False
+        try:
+            with transaction.atomic():
+                datos = self._sembrar(options)
+                marcadas = self._auditar(datos, options)
+                transaction.set_rollback(True)
+        finally:
+            if preparado:
+                teardown_test_environment()
+
+        if marcadas:
+            mensaje = f'{marcadas} consultas con recorridos secuenciales'
+            if options['estricto']:
+                raise CommandError(mensaje)
+            self.stdout.write(self.style.ERROR(mensaje))
+        else:
+            self.stdout.write(self.style.SUCCESS('Ninguna consulta recorre tablas grandes sin índice'))
+
+    def _sembrar(self, options):
+        self.stdout.write(f"Sembrando {options['articulos']} artículos y {options['ordenes']} órdenes...")
+        articulos = benchmarks.preparar_catalogo(options['articulos'], prefijo=PREFIJO)
+        usuario, cliente, vendedor = benchmarks.preparar_referencias(PREFIJO)
+        staff, _ = Usuario.objects.get_or_create(
+            username=f'{PREFIJO.lower()}_admin',
+            defaults={'email': f'{PREFIJO.lower()}_admin@sistema.com', 'is_staff': True}
+        )
+
+        azar = random.Random(0)
+        estados = [estado for estado, _ in EstadoOrden.choices]
+        ordenes = OrdenCompraCliente.objects.bulk_create([
+            OrdenCompraCliente(
+                nro_pedido=f'{PREFIJO}-{numero:07d}', cliente=cliente, vendedor=vendedor,
+                estado=azar.choice(estados), creado_por=usuario
+            )
+            for numero in range(options['ordenes'])
+        ], batch_size=benchmarks.LOTE_INSERCION)
+        ItemOrdenCompraCliente.objects.bulk_create([
+            ItemOrdenCompraCliente(
+                pedido=orden, nro_item=numero, articulo=articulo, creado_por=usuario
+            )
+            for orden in ordenes
+            for numero, articulo in enumerate(azar.sample(articulos, 3), start=1)
+        ], batch_size=benchmarks.LOTE_INSERCION)
+
+        # Sin ANALYZE: con un solo cliente sintético las estadísticas harían
+        # preferir recorridos que con datos reales no se elegirían
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return {'articulo': articulos[0], 'orden': ordenes[0], 'usuario': usuario, 'staff': staff}
+
+    def _auditar(self, datos, options):
+        clientes = {False: Client(), True: Client()}
+        clientes[False].force_login(datos['usuario'])
+        clientes[True].force_login(datos['staff'])
+
+        marcadas = 0
+        for nombre, url, metodo, cuerpo, staff in _vistas(datos):
+            captura = _Captura()
+            with connection.execute_wrapper(captura):
+                response = getattr(clientes[staff], metodo)(url, cuerpo)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{nombre} ({response.status_code}): {len(captura.consultas)} consultas'
+            ))
+            vistas = set()
+            for sql, params in captura.consultas:
+                if (sql, params) in vistas:
+                    continue
+                vistas.add((sql, params))
+                plan, recorridos = self._explicar(sql, params)
+                if recorridos:
+                    marcadas += 1
+                    self.stdout.write(self.style.ERROR(f"  SEQ SCAN {', '.join(sorted(recorridos))}"))
+                    self.stdout.write(f'    {sql[:300]}')
+                if options['planes'] or recorridos:
+                    for linea in plan:
+                        self.stdout.write(f'      {linea}')
+        return marcadas
+
+    def _explicar(self, sql, params):
+        """Devuelve (líneas del plan, tablas grandes recorridas secuencialmente)"""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0]
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                nodos, pendientes = [], [plan[0]['Plan']]
+                while pendientes:
+                    nodo = pendientes.pop()
+                    nodos.append(nodo)
+                    pendientes.extend(nodo.get('Plans', []))
+                lineas = [f"{nodo['Node Type']} {nodo.get('Relation Name', '')}".strip() for nodo in nodos]
+                recorridos = {
+                    nodo['Relation Name'] for nodo in nodos
+                    if nodo['Node Type'] == 'Seq Scan' and nodo['Relation Name'] not in TABLAS_PEQUENAS
+                }
+            else:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                lineas = [fila[-1] for fila in cursor.fetchall()]
+                tablas = set(connection.introspection.table_names(cursor))
+                recorridos = set()
+                for linea in lineas:
+                    encontrado = _SCAN_SQLITE.match(linea)
+                    if (encontrado and encontrado.group(1) in tablas and 'INDEX' not in linea
+                            and encontrado.group(1) not in TABLAS_PEQUENAS):
+                        recorridos.add(encontrado.group(1))
+        return lineas, recorridos
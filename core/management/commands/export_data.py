@@ -0,0 +1,59 @@
+# core/management/commands/export_data.py
+"""
+Exporta articulos, lista_precios, ordenes o items en CSV/JSONL (ver
+core/exports.py). Escribe en streaming a un archivo o a la salida estándar.
+
+Ejemplo:
+    python manage.py export_data ordenes --formato jsonl --desde 2025-01-01 --salida ordenes.jsonl
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+from core.exports import EXPORTACIONES, FORMATOS, filas_exportacion, serializar
+
+
+class Command(BaseCommand):
+    help = 'Exporta datos del catálogo y de órdenes en streaming (CSV/JSONL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('nombre', choices=list(EXPORTACIONES), help='Datos a exportar')
+        parser.add_argument('--formato', choices=FORMATOS, default='csv')
+        parser.add_argument('--desde', help='Fecha inicial AAAA-MM-DD (inclusive)')
+        parser.add_argument('--hasta', help='Fecha final AAAA-MM-DD (inclusive)')
+        parser.add_argument('--estado', help='Filtrar por estado')
+        parser.add_argument('--despues', help='Reanudar después de este id')
+        parser.add_argument('--salida', help='Archivo de salida (por defecto, salida estándar)')
+
+    def handle(self, *args, **options):
+        try:
+            columnas, filas = filas_exportacion(
+                options['nombre'],
+                desde=options['desde'],
+                hasta=options['hasta'],
+                estado=options['estado'],
+                despues=options['despues'],
+            )
+            lineas = serializar(columnas, filas, options['formato'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        archivo = open(options['salida'], 'w', encoding='utf-8', newline='') if options['salida'] else None
+        escritas = 0
+        try:
+            with benchmarks.cronometro() as transcurrido:
+                for linea in lineas:
+                    if archivo:
+                        archivo.write(linea)
+                    else:
+                        self.stdout.write(linea, ending='')
+                    escritas += 1
+        finally:
+            if archivo:
+                archivo.close()
+
+        memoria = benchmarks.memoria_maxima_mb()
+        # El resumen va a stderr para no mezclarse con los datos
+        self.stderr.write(
+            f"{escritas} líneas en {transcurrido():.2f}s; memoria máxima "
+            f"{f'{memoria:.1f} MB' if memoria is not None else 'no disponible'}"
+        )
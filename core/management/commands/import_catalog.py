@@ -0,0 +1,301 @@
+# core/management/commands/import_catalog.py
+"""
+Importación masiva de catálogos de proveedores (CSV o JSONL).
+
+El archivo se lee en streaming, por lotes de --lote filas, así que la
+memoria no depende del tamaño del archivo. Cada lote es una transacción:
+1. Se validan las filas (las inválidas se reportan como rechazos).
+2. Se resuelven grupo y línea por nombre con un mapa en memoria.
+3. Se hace upsert de Articulo por codigo_articulo y de su precio vigente
+   (el primer ListaPrecio, ver Articulo.listaprecio) con INSERT ... ON
+   CONFLICT DO UPDATE.
+
+Columnas: codigo_articulo, descripcion, grupo, linea (obligatorias) y
+codigo_barras, presentacion, stock, precio_1, precio_2, precio_compra,
+precio_costo (opcionales). Las columnas opcionales que no vienen en el
+archivo (cabecera CSV o primer registro JSONL) no se modifican en los
+artículos existentes.
+"""
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction, DatabaseError
+
+from core import benchmarks
+from core.models import Articulo, GrupoArticulo, LineaArticulo, ListaPrecio
+from core.signals import notificar_articulos
+from pos_project.choices import EstadoEntidades
+
+CAMPOS_ARTICULO = ('codigo_barras', 'presentacion', 'stock')
+CAMPOS_PRECIO = ('precio_1', 'precio_2', 'precio_compra', 'precio_costo')
+LONGITUDES = {'codigo_articulo': 50, 'codigo_barras': 100, 'descripcion': 255, 'presentacion': 100,
+              'grupo': 100, 'linea': 100}
+
+
+class FilaInvalida(Exception):
+    pass
+
+
+def _leer_csv(ruta):
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        for numero, fila in enumerate(csv.DictReader(archivo), start=2):
+            yield numero, fila
+
+
+def _leer_jsonl(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                yield numero, json.loads(linea)
+            except ValueError as e:
+                yield numero, e
+
+
+def _lotes(filas, tamano):
+    filas = iter(filas)
+    while True:
+        lote = list(islice(filas, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def _texto(fila, campo, obligatorio=False):
+    valor = fila.get(campo)
+    valor = '' if valor is None else str(valor).strip()
+    if obligatorio and not valor:
+        raise FilaInvalida(f'{campo} es obligatorio')
+    if len(valor) > LONGITUDES[campo]:
+        raise FilaInvalida(f'{campo} excede {LONGITUDES[campo]} caracteres')
+    return valor
+
+
+def _decimal(fila, campo):
+    valor = fila.get(campo)
+    if valor in (None, ''):
+        return None
+    try:
+        numero = Decimal(str(valor).strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise FilaInvalida(f'{campo} no es un número: {valor!r}')
+    if numero < 0 or numero >= Decimal('1e10'):
+        raise FilaInvalida(f'{campo} fuera de rango: {valor!r}')
+    return numero
+
+
+def _entero(fila, campo):
+    valor = fila.get(campo)
+    if valor in (None, ''):
+        return 0
+    try:
+        numero = int(str(valor).strip())
+    except ValueError:
+        raise FilaInvalida(f'{campo} no es un entero: {valor!r}')
+    if numero < 0:
+        raise FilaInvalida(f'{campo} no puede ser negativo')
+    return numero
+
+
+class Command(BaseCommand):
+    help = 'Importa un catálogo CSV/JSONL con upsert de artículos y precios por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .jsonl')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], help='Por defecto según la extensión')
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por lote/transacción')
+        parser.add_argument('--dry-run', action='store_true', help='Validar y simular sin guardar cambios')
+        parser.add_argument('--crear-taxonomia', action='store_true',
+                            help='Crear grupos y líneas que no existan (por defecto se rechaza la fila)')
+        parser.add_argument('--rechazos', help='Archivo JSONL donde guardar las filas rechazadas')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        if not os.path.exists(ruta):
+            raise CommandError(f'No existe el archivo {ruta}')
+        formato = options['formato'] or ('jsonl' if ruta.endswith(('.jsonl', '.ndjson')) else 'csv')
+        filas = _leer_jsonl(ruta) if formato == 'jsonl' else _leer_csv(ruta)
+
+        self.dry_run = options['dry_run']
+        self.crear_taxonomia = options['crear_taxonomia']
+        self.columnas = None
+        self._cargar_taxonomia()
+        self.archivo_rechazos = open(options['rechazos'], 'w', encoding='utf-8') if options['rechazos'] else None
+        self.rechazos = self.creados = self.actualizados = leidas = 0
+
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING('Modo simulación: no se guardará ningún cambio.'))
+
+        try:
+            with benchmarks.cronometro() as transcurrido:
+                for lote in _lotes(filas, max(1, options['lote'])):
+                    leidas += len(lote)
+                    self._procesar_lote(lote)
+                    self.stdout.write(
+                        f'{leidas} filas ({leidas / transcurrido():.0f} filas/s), '
+                        f'{self.rechazos} rechazadas'
+                    )
+        finally:
+            if self.archivo_rechazos:
+                self.archivo_rechazos.close()
+
+        segundos = transcurrido()
+        memoria = benchmarks.memoria_maxima_mb()
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Simulación terminada' if self.dry_run else 'Importación terminada'}: "
+            f'{leidas} filas en {segundos:.2f}s ({leidas / segundos if segundos else 0:.0f} filas/s)'
+        ))
+        self.stdout.write(f'Artículos nuevos: {self.creados}, actualizados: {self.actualizados}')
+        self.stdout.write(f'Filas rechazadas: {self.rechazos}')
+        self.stdout.write(f"Memoria máxima: {f'{memoria:.1f} MB' if memoria is not None else 'no disponible'}")
+
+    # ========================================
+    # TAXONOMÍA
+    # ========================================
+
+    def _cargar_taxonomia(self):
+        """Mapa en memoria nombre -> id de grupos y (grupo_id, nombre) -> id de líneas"""
+        self.grupos = {
+            nombre.lower(): grupo_id
+            for grupo_id, nombre in GrupoArticulo.objects.values_list('grupo_id', 'nombre_grupo')
+        }
+        self.lineas = {
+            (grupo_id, nombre.lower()): linea_id
+            for linea_id, grupo_id, nombre in LineaArticulo.objects.values_list('linea_id', 'grupo_id', 'nombre_linea')
+        }
+
+    def _resolver_taxonomia(self, nombre_grupo, nombre_linea, creados):
+        grupo_id = self.grupos.get(nombre_grupo.lower())
+        if grupo_id is None:
+            if not self.crear_taxonomia:
+                raise FilaInvalida(f'Grupo inexistente: {nombre_grupo}')
+            grupo_id = GrupoArticulo.objects.create(nombre_grupo=nombre_grupo).grupo_id
+            self.grupos[nombre_grupo.lower()] = grupo_id
+            creados.append((self.grupos, nombre_grupo.lower()))
+
+        clave_linea = (grupo_id, nombre_linea.lower())
+        linea_id = self.lineas.get(clave_linea)
+        if linea_id is None:
+            if not self.crear_taxonomia:
+                raise FilaInvalida(f'Línea inexistente en {nombre_grupo}: {nombre_linea}')
+            linea_id = LineaArticulo.objects.create(nombre_linea=nombre_linea, grupo_id=grupo_id).linea_id
+            self.lineas[clave_linea] = linea_id
+            creados.append((self.lineas, clave_linea))
+        return grupo_id, linea_id
+
+    # ========================================
+    # LOTES
+    # ========================================
+
+    def _rechazar(self, numero, fila, error):
+        self.rechazos += 1
+        if self.archivo_rechazos:
+            registro = {'linea': numero, 'error': str(error), 'fila': fila if isinstance(fila, dict) else None}
+            self.archivo_rechazos.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+        elif self.rechazos <= 20:
+            self.stderr.write(f'Línea {numero}: {error}')
+
+    def _validar(self, fila, creados):
+        if not isinstance(fila, dict):
+            raise FilaInvalida(f'Registro inválido: {fila}')
+        if self.columnas is None:
+            self.columnas = set(fila)
+        grupo_id, linea_id = self._resolver_taxonomia(
+            _texto(fila, 'grupo', obligatorio=True), _texto(fila, 'linea', obligatorio=True), creados
+        )
+        articulo = Articulo(
+            codigo_articulo=_texto(fila, 'codigo_articulo', obligatorio=True),
+            codigo_barras=_texto(fila, 'codigo_barras') or None,
+            descripcion=_texto(fila, 'descripcion', obligatorio=True),
+            presentacion=_texto(fila, 'presentacion') or None,
+            grupo_id=grupo_id,
+            linea_id=linea_id,
+            stock=_entero(fila, 'stock'),
+            estado=EstadoEntidades.ACTIVO,
+        )
+        precios = {campo: _decimal(fila, campo) for campo in CAMPOS_PRECIO}
+        if 'precio_1' in self.columnas and precios['precio_1'] is None:
+            raise FilaInvalida('precio_1 es obligatorio cuando el archivo trae precios')
+        return articulo, precios
+
+    def _procesar_lote(self, lote):
+        creados_taxonomia = []
+        validas = {}
+        origen = {}
+        try:
+            with transaction.atomic():
+                for numero, fila in lote:
+                    try:
+                        articulo, precios = self._validar(fila, creados_taxonomia)
+                    except FilaInvalida as e:
+                        self._rechazar(numero, fila, e)
+                        continue
+                    # Si el código se repite dentro del lote gana la última fila
+                    validas[articulo.codigo_articulo] = (articulo, precios)
+                    origen[articulo.codigo_articulo] = (numero, fila)
+
+                if validas:
+                    self._guardar(validas)
+                if self.dry_run:
+                    transaction.set_rollback(True)
+        except DatabaseError as e:
+            for numero, fila in origen.values():
+                self._rechazar(numero, fila, f'Lote revertido: {e}')
+            validas = {}
+
+        if self.dry_run or not validas:
+            # La taxonomía creada en un lote revertido no existe
+            for mapa, clave in creados_taxonomia:
+                mapa.pop(clave, None)
+
+    def _guardar(self, validas):
+        existentes = dict(Articulo.objects.filter(
+            codigo_articulo__in=list(validas)
+        ).values_list('codigo_articulo', 'articulo_id'))
+
+        articulos = []
+        for codigo, (articulo, _) in validas.items():
+            if codigo in existentes:
+                articulo.articulo_id = existentes[codigo]
+            articulos.append(articulo)
+
+        campos = ['descripcion', 'grupo', 'linea', 'estado', 'fecha_modificacion']
+        campos += [campo for campo in CAMPOS_ARTICULO if campo in self.columnas]
+        Articulo.objects.bulk_create(
+            articulos, update_conflicts=True, unique_fields=['codigo_articulo'], update_fields=campos
+        )
+
+        if 'precio_1' in self.columnas:
+            self._guardar_precios(validas)
+
+        self.creados += len(articulos) - len(existentes)
+        self.actualizados += len(existentes)
+        if not self.dry_run:
+            ids = [articulo.articulo_id for articulo in articulos]
+            transaction.on_commit(lambda: notificar_articulos(ids))
+
+    def _guardar_precios(self, validas):
+        ids = [articulo.articulo_id for articulo, _ in validas.values()]
+        vigentes = {}
+        # Precio vigente = primer ListaPrecio por clave primaria
+        for precio_id, articulo_id in ListaPrecio.objects.filter(
+            articulo_id__in=ids
+        ).values_list('precio_id', 'articulo_id').order_by('articulo_id', 'pk'):
+            vigentes.setdefault(articulo_id, precio_id)
+
+        precios = []
+        for articulo, valores in validas.values():
+            precio = ListaPrecio(articulo_id=articulo.articulo_id, **valores)
+            if articulo.articulo_id in vigentes:
+                precio.precio_id = vigentes[articulo.articulo_id]
+            precios.append(precio)
+
+        campos = ['fecha_modificacion'] + [campo for campo in CAMPOS_PRECIO if campo in self.columnas]
+        ListaPrecio.objects.bulk_create(
+            precios, update_conflicts=True, unique_fields=['precio_id'], update_fields=campos
+        )
@@ -0,0 +1,32 @@
+# core/management/commands/purge_carts.py
+"""
+Elimina las líneas de carritos abandonados del almacén 'bd' (core/cart_store.py).
+
+Un carrito se considera abandonado si ninguna de sus líneas cambió en
+SESSION_COOKIE_AGE segundos: para entonces la sesión que lo referenciaba
+ya expiró. Pensado para ejecutarse junto a `clearsessions`.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import LineaCarrito
+
+
+class Command(BaseCommand):
+    help = 'Elimina los carritos sin cambios desde que expiró su sesión'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segundos', type=int, default=settings.SESSION_COOKIE_AGE,
+                            help='Antigüedad mínima del último cambio del carrito')
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - datetime.timedelta(seconds=options['segundos'])
+        abandonados = LineaCarrito.objects.values('carrito_id').annotate(
+            ultimo=Max('fecha_modificacion')
+        ).filter(ultimo__lt=limite).values('carrito_id')
+        eliminadas, _ = LineaCarrito.objects.filter(carrito_id__in=abandonados).delete()
+        self.stdout.write(self.style.SUCCESS(f'{eliminadas} líneas de carritos abandonados eliminadas'))
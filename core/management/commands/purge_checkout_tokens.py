@@ -0,0 +1,37 @@
+# core/management/commands/purge_checkout_tokens.py
+"""
+Elimina los tokens de idempotencia del checkout más antiguos que
+CHECKOUT_TOKEN_TTL_HORAS (ver core/checkout.py).
+
+Pasado ese plazo ningún formulario abierto puede reenviarse con el mismo
+token. Se borra por lotes de clave primaria para no mantener bloqueada la
+tabla mientras el checkout sigue insertando.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import TokenCheckout
+
+
+class Command(BaseCommand):
+    help = 'Elimina por lotes los tokens de checkout vencidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=settings.CHECKOUT_TOKEN_TTL_HORAS,
+                            help='Antigüedad mínima de los tokens a eliminar')
+        parser.add_argument('--lote', type=int, default=5000, help='Tokens por DELETE')
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - datetime.timedelta(hours=options['horas'])
+        vencidos = TokenCheckout.objects.filter(fecha_creacion__lt=limite).values_list('pk', flat=True)
+        total = 0
+        while True:
+            lote = list(vencidos[:options['lote']])
+            if not lote:
+                break
+            eliminados, _ = TokenCheckout.objects.filter(pk__in=lote).delete()
+            total += eliminados
+        self.stdout.write(self.style.SUCCESS(f'{total} tokens de checkout eliminados'))
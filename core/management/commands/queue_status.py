@@ -0,0 +1,53 @@
+# core/management/commands/queue_status.py
+"""
+Estado de la cola de tareas en segundo plano (core/tareas.py).
+
+Muestra la profundidad por estado, la antigüedad de la pendiente más
+vieja y la latencia de las tareas completadas en la ventana indicada
+(espera: de encolada a iniciada; total: de encolada a terminada).
+
+--reencolar-fallidas devuelve la cola de fallidas a pendientes con los
+intentos en cero; --purgar-horas elimina las completadas más antiguas.
+"""
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import tareas
+from core.models import Tarea
+from pos_project.choices import EstadoTarea
+
+
+class Command(BaseCommand):
+    help = 'Muestra profundidad y latencia de la cola de tareas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutos', type=int, default=60, help='Ventana de la latencia')
+        parser.add_argument('--reencolar-fallidas', action='store_true',
+                            help='Volver a encolar las tareas fallidas')
+        parser.add_argument('--purgar-horas', type=int, default=None,
+                            help='Eliminar las completadas hace más de N horas')
+
+    def handle(self, *args, **options):
+        if options['reencolar_fallidas']:
+            reencoladas = Tarea.objects.filter(estado=EstadoTarea.FALLIDA).update(
+                estado=EstadoTarea.PENDIENTE, intentos=0, disponible_desde=timezone.now(), fecha_fin=None
+            )
+            self.stdout.write(f'{reencoladas} tareas fallidas reencoladas')
+        if options['purgar_horas'] is not None:
+            limite = timezone.now() - datetime.timedelta(hours=options['purgar_horas'])
+            eliminadas, _ = Tarea.objects.filter(estado=EstadoTarea.COMPLETADA, fecha_fin__lt=limite).delete()
+            self.stdout.write(f'{eliminadas} tareas completadas eliminadas')
+
+        datos = tareas.metricas(options['minutos'])
+        for estado, total in datos['profundidad'].items():
+            self.stdout.write(f'{estado:<12} {total}')
+        self.stdout.write(f"Pendiente más antigua: {datos['antiguedad_max_s']:.0f}s")
+        self.stdout.write(f"Completadas en {options['minutos']} min: {datos['completadas']}")
+        for nombre in ('espera', 'latencia'):
+            resumen = datos[nombre]
+            self.stdout.write(
+                f"{nombre:<12} promedio {resumen['promedio_s']:.2f}s  "
+                f"p95 {resumen['p95_s']:.2f}s  máx {resumen['max_s']:.2f}s"
+            )
@@ -0,0 +1,38 @@
+# core/management/commands/rebuild_related.py
+"""
+Recalcula la tabla de productos comprados juntos (core/relacionados.py).
+
+La tabla se mantiene sola con cada checkout y cada cancelación; este
+comando la rehace desde las órdenes, por ejemplo tras importar un
+histórico. Recorre las órdenes por lotes de clave primaria, con una
+sentencia INSERT ... SELECT por lote, dentro de una única transacción.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks, relacionados
+from core.cache_articulos import invalidar_relacionados
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los productos relacionados a partir de las órdenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=relacionados.LOTE_RECONSTRUCCION,
+                            help='Órdenes por sentencia')
+        parser.add_argument('--maximo', type=int, default=None,
+                            help='Conservar solo los N relacionados más frecuentes de cada artículo')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        def progreso(ordenes):
+            self.stdout.write(f'  {ordenes} órdenes procesadas')
+
+        with benchmarks.cronometro() as transcurrido:
+            pares = relacionados.reconstruir(
+                lote=options['lote'], maximo_por_articulo=options['maximo'], progreso=progreso
+            )
+        invalidar_relacionados()
+
+        self.stdout.write(self.style.SUCCESS(f'{pares} pares de artículos en {transcurrido():.2f}s'))
@@ -0,0 +1,27 @@
+# core/management/commands/rebuild_search_index.py
+"""
+Reconstruye el índice de búsqueda de artículos.
+
+Necesario tras cargas masivas hechas con SQL directo o bulk_create (que no
+disparan señales). En PostgreSQL los índices se mantienen solos y el
+comando solo informa cuántos artículos activos hay.
+"""
+from django.core.management.base import BaseCommand
+
+from core import benchmarks
+from core.search import get_buscador
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de artículos'
+
+    def handle(self, *args, **options):
+        buscador = get_buscador()
+        self.stdout.write(self.style.WARNING(f'Reconstruyendo índice ({buscador.nombre})...'))
+
+        with benchmarks.cronometro() as transcurrido:
+            indexados = buscador.reconstruir()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{indexados} artículos activos indexados en {transcurrido():.2f}s'
+        ))
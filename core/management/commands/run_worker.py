@@ -0,0 +1,121 @@
+# core/management/commands/run_worker.py
+"""
+Trabajador de la cola de tareas en segundo plano (core/tareas.py).
+
+Lanza N procesos que reclaman tareas por lotes y las ejecutan; cuando la
+cola está vacía esperan TAREAS_ESPERA segundos antes de volver a
+consultar. El proceso principal vigila a los hijos (relanza el que muera)
+y registra cada TAREAS_METRICAS_INTERVALO segundos la profundidad de la
+cola y la latencia de las tareas completadas. Ctrl+C o SIGTERM detienen a
+los hijos al terminar la tarea en curso.
+
+Con --una-vez procesa lo disponible en este mismo proceso y termina (útil
+en cron o para vaciar la cola a mano).
+"""
+import logging
+import multiprocessing
+import signal
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger('core.tareas')
+
+
+def _trabajador(numero, detener, lote, espera, visibilidad):
+    """Bucle de un proceso hijo: reclamar, ejecutar, esperar si no hay nada"""
+    django.setup()
+    from core import tareas
+
+    # La interrupción la maneja el proceso principal, que avisa con `detener`
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    logger.info('Trabajador %s iniciado', numero)
+    while not detener.is_set():
+        close_old_connections()
+        reclamadas = tareas.reclamar(lote, visibilidad)
+        for registro in reclamadas:
+            tareas.ejecutar(registro)
+        if not reclamadas:
+            detener.wait(espera)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas en segundo plano encoladas en la base de datos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=settings.TAREAS_PROCESOS, help='Procesos trabajadores')
+        parser.add_argument('--lote', type=int, default=settings.TAREAS_LOTE, help='Tareas reclamadas por consulta')
+        parser.add_argument('--espera', type=float, default=settings.TAREAS_ESPERA,
+                            help='Segundos entre consultas con la cola vacía')
+        parser.add_argument('--visibilidad', type=int, default=settings.TAREAS_VISIBILIDAD,
+                            help='Segundos antes de que otro trabajador retome una tarea sin terminar')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Procesar lo disponible en este proceso y terminar')
+
+    def handle(self, *args, **options):
+        # Los modelos se importan aquí: los procesos hijos importan este módulo antes de django.setup()
+        from core import tareas
+
+        if options['procesos'] < 1 or options['lote'] < 1:
+            raise CommandError('--procesos y --lote deben ser mayores que cero')
+
+        if options['una_vez']:
+            resultado = tareas.procesar_pendientes(options['lote'], options['visibilidad'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{resultado['completadas']} tareas completadas, {resultado['fallidas']} con error"
+            ))
+            return
+
+        contexto = multiprocessing.get_context('spawn')
+        detener = contexto.Event()
+        argumentos = (detener, options['lote'], options['espera'], options['visibilidad'])
+
+        def lanzar(numero):
+            proceso = contexto.Process(target=_trabajador, args=(numero,) + argumentos, daemon=True)
+            proceso.start()
+            return proceso
+
+        # Desde el manejador solo se marca: avisar al Event ahí puede bloquear
+        # al proceso principal si la señal llega mientras espera en él
+        senal = []
+
+        def parar(signum, frame):
+            senal.append(signum)
+
+        signal.signal(signal.SIGINT, parar)
+        signal.signal(signal.SIGTERM, parar)
+
+        # Las conexiones no deben compartirse con los procesos hijos
+        connections.close_all()
+        procesos = {numero: lanzar(numero) for numero in range(options['procesos'])}
+        self.stdout.write(self.style.SUCCESS(f"{len(procesos)} trabajadores en marcha (Ctrl+C para detener)"))
+
+        proximas_metricas = time.monotonic()
+        while not senal:
+            for numero, proceso in procesos.items():
+                if not proceso.is_alive():
+                    logger.warning('Trabajador %s terminó con código %s; se relanza', numero, proceso.exitcode)
+                    procesos[numero] = lanzar(numero)
+            if time.monotonic() >= proximas_metricas:
+                self._registrar_metricas(tareas.metricas())
+                close_old_connections()
+                proximas_metricas = time.monotonic() + settings.TAREAS_METRICAS_INTERVALO
+            time.sleep(1)
+
+        detener.set()
+        for proceso in procesos.values():
+            proceso.join()
+        self.stdout.write(self.style.SUCCESS('Trabajadores detenidos'))
+
+    def _registrar_metricas(self, datos):
+        logger.info(
+            'Cola de tareas: %s; pendiente más antigua %.0fs; %s completadas en la última hora, '
+            'latencia promedio %.2fs (p95 %.2fs)',
+            datos['profundidad'], datos['antiguedad_max_s'], datos['completadas'],
+            datos['latencia']['promedio_s'], datos['latencia']['p95_s'],
+        )
@@ -0,0 +1,121 @@
+# core/management/commands/stress_stock.py
+"""
+Prueba de carga multi-proceso de la reserva de stock.
+
+Lanza N procesos que hacen checkouts simultáneos sobre los mismos
+artículos "calientes" y verifica al final que no hubo sobreventa:
+    stock_inicial - stock_final == unidades vendidas en items
+    stock_final >= 0
+"""
+import multiprocessing
+import random
+from decimal import Decimal
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DatabaseError
+from django.db.models import Sum
+
+PREFIJO = 'STRESS'
+
+
+def _trabajador(args):
+    """Ejecuta checkouts en un proceso hijo; devuelve (confirmados, rechazados, errores)"""
+    ids, checkouts, max_cantidad, parcial, semilla = args
+    django.setup()
+    from core import benchmarks
+    from core.checkout import procesar_checkout
+    from core.models import Articulo
+    from core.stock import StockInsuficiente
+
+    usuario, cliente, vendedor = benchmarks.preparar_referencias(PREFIJO)
+    articulos = list(Articulo.objects.filter(pk__in=ids))
+    azar = random.Random(semilla)
+    confirmados = rechazados = errores = 0
+
+    for _ in range(checkouts):
+        elegidos = azar.sample(articulos, azar.randint(1, len(articulos)))
+        carrito = [
+            {'articulo': articulo, 'cantidad': azar.randint(1, max_cantidad), 'precio': Decimal('10.00')}
+            for articulo in elegidos
+        ]
+        try:
+            procesar_checkout(carrito, cliente, vendedor, usuario, permitir_parcial=parcial)
+            confirmados += 1
+        except StockInsuficiente:
+            rechazados += 1
+        except DatabaseError:
+            # Bloqueos agotados o colisiones de nro_pedido: la transacción se revirtió completa
+            errores += 1
+
+    connections.close_all()
+    return confirmados, rechazados, errores
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga: checkouts concurrentes sobre los mismos artículos sin sobreventa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=8, help='Procesos concurrentes')
+        parser.add_argument('--checkouts', type=int, default=50, help='Checkouts por proceso')
+        parser.add_argument('--articulos', type=int, default=3, help='Artículos calientes')
+        parser.add_argument('--stock', type=int, default=200, help='Stock inicial por artículo')
+        parser.add_argument('--max-cantidad', type=int, default=3, help='Cantidad máxima por línea')
+        parser.add_argument('--parcial', action='store_true', help='Permitir llenado parcial de líneas')
+        parser.add_argument('--conservar', action='store_true', help='No borrar los datos generados')
+
+    def handle(self, *args, **options):
+        # Los modelos se importan aquí: los procesos hijos importan este módulo antes de django.setup()
+        from core import benchmarks
+        from core.models import Articulo, ItemOrdenCompraCliente
+
+        if connections['default'].vendor == 'sqlite' and connections['default'].settings_dict['NAME'] == ':memory:':
+            raise CommandError('La prueba necesita una base de datos en disco.')
+
+        benchmarks.limpiar(PREFIJO)
+        articulos = benchmarks.preparar_catalogo(options['articulos'], prefijo=PREFIJO, stock=options['stock'])
+        benchmarks.preparar_referencias(PREFIJO)
+        ids = [articulo.pk for articulo in articulos]
+        stock_inicial = options['stock'] * len(ids)
+
+        self.stdout.write(self.style.WARNING(
+            f"Lanzando {options['procesos']} procesos x {options['checkouts']} checkouts "
+            f"sobre {len(ids)} artículos (stock {options['stock']} c/u)..."
+        ))
+
+        # Las conexiones no deben compartirse con los procesos hijos
+        connections.close_all()
+        tareas = [
+            (ids, options['checkouts'], options['max_cantidad'], options['parcial'], semilla)
+            for semilla in range(options['procesos'])
+        ]
+        with benchmarks.cronometro() as transcurrido:
+            with multiprocessing.get_context('spawn').Pool(options['procesos']) as pool:
+                resultados = pool.map(_trabajador, tareas)
+
+        confirmados = sum(r[0] for r in resultados)
+        rechazados = sum(r[1] for r in resultados)
+        errores = sum(r[2] for r in resultados)
+
+        stock_final = Articulo.objects.filter(pk__in=ids).aggregate(total=Sum('stock'))['total']
+        negativos = Articulo.objects.filter(pk__in=ids, stock__lt=0).count()
+        vendidos = ItemOrdenCompraCliente.objects.filter(
+            articulo_id__in=ids
+        ).aggregate(total=Sum('cantidad'))['total'] or 0
+
+        self.stdout.write(f'Tiempo: {transcurrido():.2f}s')
+        self.stdout.write(f'Checkouts confirmados: {confirmados}')
+        self.stdout.write(f'Checkouts rechazados por stock: {rechazados}')
+        self.stdout.write(f'Errores de base de datos: {errores}')
+        self.stdout.write(f'Unidades vendidas: {vendidos} de {stock_inicial}')
+        self.stdout.write(f'Stock final: {stock_final}')
+
+        if not options['conservar']:
+            benchmarks.limpiar(PREFIJO)
+
+        if negativos or stock_inicial - stock_final != vendidos:
+            raise CommandError(
+                f'SOBREVENTA DETECTADA: {negativos} artículos en negativo, '
+                f'descuento {stock_inicial - stock_final} vs vendido {vendidos}'
+            )
+        self.stdout.write(self.style.SUCCESS('Sin sobreventa: el stock cuadra con lo vendido.'))
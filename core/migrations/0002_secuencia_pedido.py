@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaPedido',
+            fields=[
+                ('tienda', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('ultimo_numero', models.BigIntegerField(default=0)),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'secuencias_pedido',
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.db import migrations
+
+# Solo artículos activos (EstadoEntidades.ACTIVO)
+ACTIVO = 1
+
+SQLITE_CREAR = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS articulos_fts USING fts5(
+        articulo_id UNINDEXED,
+        codigo_articulo,
+        codigo_barras,
+        descripcion,
+        tokenize = "unicode61 remove_diacritics 2",
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    INSERT INTO articulos_fts (articulo_id, codigo_articulo, codigo_barras, descripcion)
+    SELECT articulo_id, codigo_articulo, coalesce(codigo_barras, ''), descripcion
+    FROM articulos WHERE estado = {ACTIVO}
+    """,
+]
+
+SQLITE_ELIMINAR = ["DROP TABLE IF EXISTS articulos_fts"]
+
+POSTGRES_CREAR = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    CREATE INDEX IF NOT EXISTS articulos_busqueda_tsv ON articulos USING GIN (
+        to_tsvector('simple', coalesce(descripcion, '') || ' ' ||
+        coalesce(codigo_articulo, '') || ' ' || coalesce(codigo_barras, ''))
+    ) WHERE estado = {ACTIVO}
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS articulos_descripcion_trgm
+    ON articulos USING GIN (descripcion gin_trgm_ops) WHERE estado = {ACTIVO}
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS articulos_codigo_trgm
+    ON articulos USING GIN (codigo_articulo gin_trgm_ops) WHERE estado = {ACTIVO}
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS articulos_barras_trgm
+    ON articulos USING GIN (codigo_barras gin_trgm_ops) WHERE estado = {ACTIVO}
+    """,
+]
+
+POSTGRES_ELIMINAR = [
+    "DROP INDEX IF EXISTS articulos_busqueda_tsv",
+    "DROP INDEX IF EXISTS articulos_descripcion_trgm",
+    "DROP INDEX IF EXISTS articulos_codigo_trgm",
+    "DROP INDEX IF EXISTS articulos_barras_trgm",
+]
+
+
+def _ejecutar(schema_editor, sentencias_por_motor):
+    for sentencia in sentencias_por_motor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia)
+
+
+def crear_indice(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_CREAR, 'postgresql': POSTGRES_CREAR})
+
+
+def eliminar_indice(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_ELIMINAR, 'postgresql': POSTGRES_ELIMINAR})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_secuencia_pedido'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
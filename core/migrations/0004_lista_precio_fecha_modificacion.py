@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listaprecio',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_lista_precio_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['fecha_creacion', 'articulo_id'], name='articulos_fecha_pk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordencompracliente',
+            index=models.Index(fields=['fecha_creacion', 'pedido_id'], name='ordenes_fecha_pk_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticuloRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('veces', models.PositiveIntegerField(default=0)),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+                ('articulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionados_compra', to='core.articulo')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.articulo')),
+            ],
+            options={
+                'db_table': 'articulos_relacionados',
+                'indexes': [models.Index(fields=['articulo', '-veces'], name='relacionados_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('articulo', 'relacionado'), name='articulos_relacionados_par_uniq')],
+            },
+        ),
+    ]
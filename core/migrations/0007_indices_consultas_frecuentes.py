@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_articulos_relacionados'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(condition=models.Q(('estado', 1)), fields=['fecha_creacion', 'articulo_id'], name='articulos_activos_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(condition=models.Q(('estado', 1)), fields=['linea', 'articulo_id'], name='articulos_activos_linea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(condition=models.Q(('estado', 1)), fields=['stock'], name='articulos_activos_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['codigo_barras'], name='articulos_codigo_barras_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['correo_electronico'], name='clientes_correo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['estado'], name='clientes_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordencompracliente',
+            index=models.Index(fields=['estado', 'fecha_creacion', 'pedido_id'], name='ordenes_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordencompracliente',
+            index=models.Index(fields=['cliente', 'fecha_creacion', 'pedido_id'], name='ordenes_cliente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordencompracliente',
+            index=models.Index(fields=['fecha_pedido'], name='ordenes_fecha_pedido_idx'),
+        ),
+    ]
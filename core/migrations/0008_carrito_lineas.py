@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LineaCarrito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('carrito_id', models.CharField(max_length=32)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('precio', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+                ('articulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.articulo')),
+            ],
+            options={
+                'db_table': 'carrito_lineas',
+                'indexes': [models.Index(fields=['fecha_modificacion'], name='carrito_lineas_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('carrito_id', 'articulo'), name='carrito_lineas_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_carrito_lineas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaSincronizada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('fecha_venta', models.DateTimeField()),
+                ('fecha_recepcion', models.DateTimeField(auto_now_add=True)),
+                ('pedido', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='venta_sincronizada', to='core.ordencompracliente')),
+            ],
+            options={
+                'db_table': 'ventas_sincronizadas',
+            },
+        ),
+    ]
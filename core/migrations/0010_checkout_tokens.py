@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_ventas_sincronizadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenCheckout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('pedido', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.ordencompracliente')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'checkout_tokens',
+                'indexes': [models.Index(fields=['fecha_creacion'], name='checkout_tokens_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'token'), name='checkout_tokens_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_checkout_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=100)),
+                ('argumentos', models.JSONField(default=dict)),
+                ('estado', models.IntegerField(choices=[(1, 'Pendiente'), (2, 'En proceso'), (3, 'Completada'), (4, 'Fallida')], default=1)),
+                ('intentos', models.IntegerField(default=0)),
+                ('max_intentos', models.IntegerField(default=5)),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('reclamada_por', models.CharField(blank=True, default='', max_length=32)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'tareas',
+                'indexes': [models.Index(fields=['estado', 'disponible_desde'], name='tareas_estado_disp_idx'), models.Index(fields=['estado', 'fecha_fin'], name='tareas_estado_fin_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def asignar_usuario(apps, schema_editor):
+    """Las ventas ya cargadas quedan a nombre de quien creó su orden"""
+    VentaSincronizada = apps.get_model('core', 'VentaSincronizada')
+    OrdenCompraCliente = apps.get_model('core', 'OrdenCompraCliente')
+    VentaSincronizada.objects.update(usuario_id=Subquery(
+        OrdenCompraCliente.objects.filter(pk=OuterRef('pedido_id')).values('creado_por_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_tareas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventasincronizada',
+            name='usuario',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(asignar_usuario, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ventasincronizada',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='ventasincronizada',
+            name='clave',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='ventasincronizada',
+            constraint=models.UniqueConstraint(fields=('usuario', 'clave'), name='ventas_sincronizadas_uniq'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 # core/models.py
-from django.db import models
+from django.db import connection, models, transaction
 from django.contrib.auth.models import AbstractUser
-from pos_project.choices import EstadoEntidades, EstadoOrden
+from django.utils import timezone
+from django.utils.functional import cached_property
+from pos_project.choices import EstadoEntidades, EstadoOrden, EstadoTarea
+from .money import Dinero
 import uuid
 
 # Modelo de Usuario personalizado
@@ -53,6 +56,12 @@ class Cliente(models.Model):
     
     class Meta:
         db_table = "clientes"
+        indexes = [
+            # Órdenes del usuario y checkout (cliente por correo)
+            models.Index(fields=['correo_electronico'], name='clientes_correo_idx'),
+            # Conteo de clientes activos (dashboard)
+            models.Index(fields=['estado'], name='clientes_estado_idx'),
+        ]
 
 class Vendedor(models.Model):
     vendedor_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -94,6 +103,14 @@ class LineaArticulo(models.Model):
     class Meta:
         db_table = "lineas_articulo"
 
+class ArticuloQuerySet(models.QuerySet):
+
+    def con_precio(self):
+        """Precarga los precios en una sola consulta para todo el queryset (ver Articulo.listaprecio)"""
+        return self.prefetch_related(
+            models.Prefetch('precios', queryset=ListaPrecio.objects.order_by('pk'), to_attr='precios_cargados')
+        )
+
 class Articulo(models.Model):
     articulo_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     codigo_articulo = models.CharField(max_length=50, unique=True)
@@ -107,13 +124,17 @@ class Articulo(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
     
+    objects = ArticuloQuerySet.as_manager()
+    
     def __str__(self):
         return self.descripcion
     
-    @property
+    @cached_property
     def listaprecio(self):
-        """Obtener el primer precio del artículo"""
-        return self.precios.first()
+        """Obtener el primer precio del artículo (una consulta como máximo, ninguna con con_precio())"""
+        if hasattr(self, 'precios_cargados'):
+            return self.precios_cargados[0] if self.precios_cargados else None
+        return self.precios.order_by('pk').first()
     
     @property
     def grupo_nombre(self):
@@ -122,6 +143,20 @@ class Articulo(models.Model):
     
     class Meta:
         db_table = "articulos"
+        indexes = [
+            # Paginación por cursor (core/pagination.py)
+            models.Index(fields=['fecha_creacion', 'articulo_id'], name='articulos_fecha_pk_idx'),
+            # Índices parciales sobre los activos, que son los que filtran las
+            # vistas (en motores sin índices parciales Django no los crea)
+            models.Index(fields=['fecha_creacion', 'articulo_id'], condition=models.Q(estado=EstadoEntidades.ACTIVO),
+                         name='articulos_activos_fecha_idx'),
+            models.Index(fields=['linea', 'articulo_id'], condition=models.Q(estado=EstadoEntidades.ACTIVO),
+                         name='articulos_activos_linea_idx'),
+            # Stock bajo (dashboard y listado)
+            models.Index(fields=['stock'], condition=models.Q(estado=EstadoEntidades.ACTIVO),
+                         name='articulos_activos_stock_idx'),
+            models.Index(fields=['codigo_barras'], name='articulos_codigo_barras_idx'),
+        ]
 
 class ListaPrecio(models.Model):
     precio_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -132,10 +167,23 @@ class ListaPrecio(models.Model):
     precio_costo = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
     estado = models.IntegerField(choices=EstadoEntidades, default=EstadoEntidades.ACTIVO)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = "lista_precios"
 
+# Secuencias de numeración
+class SecuenciaPedido(models.Model):
+    tienda = models.CharField(max_length=20, primary_key=True)
+    ultimo_numero = models.BigIntegerField(default=0)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.tienda}: {self.ultimo_numero}"
+
+    class Meta:
+        db_table = "secuencias_pedido"
+
 # Modelos del carrito
 class OrdenCompraCliente(models.Model):
     pedido_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -151,15 +199,22 @@ class OrdenCompraCliente(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.nro_pedido:
-            import time
-            self.nro_pedido = f"ORD-{int(time.time())}"
+            # Un bloque reservado dentro de una transacción que se revierte
+            # podría entregarse a dos procesos (ver core/secuencias.py)
+            if connection.in_atomic_block:
+                raise transaction.TransactionManagementError(
+                    'Asigna nro_pedido con siguiente_nro_pedido() antes de abrir la transacción'
+                )
+            from .secuencias import siguiente_nro_pedido
+            self.nro_pedido = siguiente_nro_pedido()
         super().save(*args, **kwargs)
 
     def actualizar_total(self):
         """Actualiza el total de la orden basado en los items"""
-        total = sum(item.total_item for item in self.items_orden_compra.all())
-        self.importe = total
-        self.save()
+        total = self.items_orden_compra.aggregate(total=models.Sum('total_item'))['total']
+        # SQLite suma los decimales como REAL: se redondea a centavos
+        self.importe = Dinero.desde(total).a_decimal()
+        self.save(update_fields=['importe'])
 
     def __str__(self):
         return f"Orden #{self.nro_pedido} - {self.cliente}"
@@ -167,6 +222,15 @@ class OrdenCompraCliente(models.Model):
     class Meta:
         db_table = "ordenes_compra_cliente"
         ordering = ["-fecha_creacion"]
+        indexes = [
+            # Paginación por cursor (core/pagination.py)
+            models.Index(fields=['fecha_creacion', 'pedido_id'], name='ordenes_fecha_pk_idx'),
+            # Filtro por estado (dashboard y listado) y órdenes de un cliente,
+            # ambos paginados por (fecha_creacion, pk)
+            models.Index(fields=['estado', 'fecha_creacion', 'pedido_id'], name='ordenes_estado_fecha_idx'),
+            models.Index(fields=['cliente', 'fecha_creacion', 'pedido_id'], name='ordenes_cliente_fecha_idx'),
+            models.Index(fields=['fecha_pedido'], name='ordenes_fecha_pedido_idx'),
+        ]
 
 class ItemOrdenCompraCliente(models.Model):
     item_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -200,4 +264,112 @@ class ItemOrdenCompraCliente(models.Model):
         return f"{self.cantidad} x {self.articulo.descripcion}"
 
     class Meta:
-        db_table = "items_ordenes_compra_cliente"
\ No newline at end of file
+        db_table = "items_ordenes_compra_cliente"
+
+class ArticuloRelacionado(models.Model):
+    """Pares de artículos comprados juntos y en cuántas órdenes (ver core/relacionados.py)"""
+    articulo = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='relacionados_compra')
+    relacionado = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='+')
+    veces = models.PositiveIntegerField(default=0)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.articulo_id} -> {self.relacionado_id} ({self.veces})"
+
+    class Meta:
+        db_table = "articulos_relacionados"
+        constraints = [
+            models.UniqueConstraint(fields=['articulo', 'relacionado'], name='articulos_relacionados_par_uniq'),
+        ]
+        indexes = [
+            # Los N más comprados junto a un artículo
+            models.Index(fields=['articulo', '-veces'], name='relacionados_top_idx'),
+        ]
+
+class LineaCarrito(models.Model):
+    """Línea de un carrito guardado fuera de la sesión (ver core/cart_store.py)"""
+    carrito_id = models.CharField(max_length=32)
+    articulo = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='+')
+    cantidad = models.PositiveIntegerField(default=0)
+    precio = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.carrito_id}: {self.cantidad} x {self.articulo_id}"
+
+    class Meta:
+        db_table = "carrito_lineas"
+        constraints = [
+            models.UniqueConstraint(fields=['carrito_id', 'articulo'], name='carrito_lineas_uniq'),
+        ]
+        indexes = [
+            # Purga de carritos abandonados (purge_carts)
+            models.Index(fields=['fecha_modificacion'], name='carrito_lineas_fecha_idx'),
+        ]
+
+class VentaSincronizada(models.Model):
+    """Venta hecha en una caja sin conexión y cargada por lote (ver core/sincronizacion.py)"""
+    # Clave de idempotencia generada por la caja: reenviar la venta no la duplica.
+    # Es única por usuario que envía: dos cajas pueden generar la misma clave
+    clave = models.CharField(max_length=64)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    pedido = models.OneToOneField(OrdenCompraCliente, on_delete=models.CASCADE, related_name='venta_sincronizada')
+    fecha_venta = models.DateTimeField()
+    fecha_recepcion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.clave} -> {self.pedido_id}"
+
+    class Meta:
+        db_table = "ventas_sincronizadas"
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='ventas_sincronizadas_uniq'),
+        ]
+
+class TokenCheckout(models.Model):
+    """Token de idempotencia de un envío del checkout (ver core/checkout.py)"""
+    token = models.CharField(max_length=64)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    pedido = models.OneToOneField(OrdenCompraCliente, on_delete=models.CASCADE, related_name='+')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.token} -> {self.pedido_id}"
+
+    class Meta:
+        db_table = "checkout_tokens"
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'token'], name='checkout_tokens_uniq'),
+        ]
+        indexes = [
+            # Purga por antigüedad (purge_checkout_tokens)
+            models.Index(fields=['fecha_creacion'], name='checkout_tokens_fecha_idx'),
+        ]
+
+class Tarea(models.Model):
+    """Trabajo en segundo plano de la cola en base de datos (ver core/tareas.py)"""
+    tipo = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict)
+    estado = models.IntegerField(choices=EstadoTarea.choices, default=EstadoTarea.PENDIENTE)
+    intentos = models.IntegerField(default=0)
+    max_intentos = models.IntegerField(default=5)
+    # Pendiente: cuándo puede ejecutarse (reintentos con espera). En proceso:
+    # hasta cuándo es del trabajador que la tomó; pasado ese plazo otro la retoma
+    disponible_desde = models.DateTimeField(default=timezone.now)
+    reclamada_por = models.CharField(max_length=32, blank=True, default='')
+    ultimo_error = models.TextField(blank=True, default='')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_estado_display()})"
+
+    class Meta:
+        db_table = "tareas"
+        indexes = [
+            # Reclamo de trabajos disponibles (run_worker)
+            models.Index(fields=['estado', 'disponible_desde'], name='tareas_estado_disp_idx'),
+            # Latencia reciente y purga de completadas (queue_status)
+            models.Index(fields=['estado', 'fecha_fin'], name='tareas_estado_fin_idx'),
+        ]
@@ -0,0 +1,114 @@
+# core/money.py
+"""
+Importes en memoria como enteros de centavos.
+
+Dinero guarda la cantidad en la unidad menor (centavos, 2 decimales como
+los DecimalField de precios e importes). Sumas y productos por cantidades
+son aritmética entera: exactas y más rápidas que Decimal, y sin pasar por
+float. La conversión desde y hacia DecimalField ocurre solo al leer o
+guardar (Dinero.desde / a_decimal).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from functools import total_ordering
+
+DECIMALES = 2
+_UNIDAD = 10 ** DECIMALES
+
+
+@total_ordering
+class Dinero:
+    """Importe inmutable en centavos"""
+
+    __slots__ = ('centavos',)
+
+    def __init__(self, centavos=0):
+        if not isinstance(centavos, int):
+            raise TypeError(f'Dinero espera centavos enteros, no {type(centavos).__name__}')
+        object.__setattr__(self, 'centavos', centavos)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError('Dinero es inmutable')
+
+    @classmethod
+    def desde(cls, valor):
+        """
+        Convierte un Decimal, str, int (unidades), float o None (cero),
+        redondeando a centavos
+        """
+        if isinstance(valor, Dinero):
+            return valor
+        if valor is None or valor == '':
+            return cls(0)
+        if isinstance(valor, int):
+            return cls(valor * _UNIDAD)
+        decimal = valor if isinstance(valor, Decimal) else Decimal(str(valor))
+        return cls(int((decimal * _UNIDAD).quantize(Decimal('1'), rounding=ROUND_HALF_UP)))
+
+    def a_decimal(self):
+        """Decimal con dos decimales, para guardar en un DecimalField"""
+        return Decimal(self.centavos).scaleb(-DECIMALES)
+
+    def __add__(self, otro):
+        if isinstance(otro, Dinero):
+            return Dinero(self.centavos + otro.centavos)
+        if otro == 0:  # sum() empieza en 0
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, otro):
+        if isinstance(otro, Dinero):
+            return Dinero(self.centavos - otro.centavos)
+        return NotImplemented
+
+    def __mul__(self, cantidad):
+        if isinstance(cantidad, int) and not isinstance(cantidad, bool):
+            return Dinero(self.centavos * cantidad)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Dinero(-self.centavos)
+
+    def __eq__(self, otro):
+        if isinstance(otro, Dinero):
+            return self.centavos == otro.centavos
+        return NotImplemented
+
+    def __lt__(self, otro):
+        if isinstance(otro, Dinero):
+            return self.centavos < otro.centavos
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.centavos)
+
+    def __bool__(self):
+        return self.centavos != 0
+
+    def __float__(self):
+        """Solo para respuestas JSON"""
+        return self.centavos / _UNIDAD
+
+    def __str__(self):
+        signo = '-' if self.centavos < 0 else ''
+        unidades, centavos = divmod(abs(self.centavos), _UNIDAD)
+        return f'{signo}{unidades}.{centavos:0{DECIMALES}d}'
+
+    def __repr__(self):
+        return f'Dinero({self})'
+
+    def __reduce__(self):
+        return (Dinero, (self.centavos,))
+
+
+def sumar(importes):
+    """Suma de importes Dinero (Dinero(0) si no hay ninguno)"""
+    return Dinero(sum(importe.centavos for importe in importes))
+
+
+def total_lineas(lineas):
+    """Suma de precio * cantidad para pares (Dinero, int), sin crear un Dinero por línea"""
+    return Dinero(sum(precio.centavos * cantidad for precio, cantidad in lineas))
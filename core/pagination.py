@@ -0,0 +1,209 @@
+# core/pagination.py
+"""
+Paginación por cursor (keyset) para listados grandes.
+
+En lugar de OFFSET, cada página se pide "después de" o "antes de" la última
+fila vista, ordenando por (fecha_creacion, pk) descendente. El costo de una
+página no depende de su profundidad: siempre es un rango del índice
+(fecha_creacion, pk) más LIMIT.
+
+El total de filas es opcional (setting PAGINACION_CONTEO):
+- 'aproximado': estimación del planificador en PostgreSQL; en otros motores
+  un COUNT(*) exacto guardado en caché PAGINACION_CONTEO_TTL segundos.
+- 'exacto':     COUNT(*) en cada página.
+- 'ninguno':    sin total.
+"""
+import base64
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+
+# Parámetros GET que maneja el paginador
+PARAMETROS_CURSOR = ('despues', 'antes', 'ultima', 'page')
+
+
+def _codificar(fecha, pk):
+    texto = f'{fecha.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def _decodificar(cursor, modelo):
+    """Devuelve (fecha, pk) o None si el cursor no es válido"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fecha, pk = texto.split('|', 1)
+        return datetime.datetime.fromisoformat(fecha), modelo._meta.pk.to_python(pk)
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def conteo_aproximado(queryset):
+    """Total de filas del queryset según PAGINACION_CONTEO (None si no se cuenta)"""
+    modo = settings.PAGINACION_CONTEO
+    if modo == 'ninguno':
+        return None
+    if modo == 'exacto':
+        return queryset.count()
+
+    if connection.vendor == 'postgresql':
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    clave = 'conteo:' + hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+    total = cache.get(clave)
+    if total is None:
+        total = queryset.count()
+        cache.set(clave, total, settings.PAGINACION_CONTEO_TTL)
+    return total
+
+
+class PaginaCursor:
+    """Página de resultados con enlaces por cursor"""
+
+    def __init__(self, object_list, has_previous, has_next, cursor_anterior=None,
+                 cursor_siguiente=None, total=None, aproximado=False):
+        self.object_list = object_list
+        self._has_previous = has_previous
+        self._has_next = has_next
+        self.cursor_anterior = cursor_anterior
+        self.cursor_siguiente = cursor_siguiente
+        self.total = total
+        self.aproximado = aproximado
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+
+class PaginadorCursor:
+    """Paginador keyset sobre (campo, pk), más recientes primero"""
+
+    def __init__(self, queryset, por_pagina, campo='fecha_creacion'):
+        self.queryset = queryset
+        self.por_pagina = por_pagina
+        self.campo = campo
+
+    def _cursor(self, objeto):
+        return _codificar(getattr(objeto, self.campo), objeto.pk)
+
+    def get_page(self, despues=None, antes=None, ultima=False):
+        modelo = self.queryset.model
+        descendente = self.queryset.order_by(f'-{self.campo}', '-pk')
+        ascendente = self.queryset.order_by(self.campo, 'pk')
+
+        posicion_despues = _decodificar(despues, modelo) if despues else None
+        posicion_antes = _decodificar(antes, modelo) if antes else None
+
+        if posicion_despues:
+            fecha, pk = posicion_despues
+            filas = list(descendente.filter(
+                Q(**{f'{self.campo}__lt': fecha}) | Q(**{self.campo: fecha, 'pk__lt': pk})
+            )[:self.por_pagina + 1])
+            has_previous, has_next = True, len(filas) > self.por_pagina
+            filas = filas[:self.por_pagina]
+        elif posicion_antes or ultima:
+            if posicion_antes:
+                fecha, pk = posicion_antes
+                ascendente = ascendente.filter(
+                    Q(**{f'{self.campo}__gt': fecha}) | Q(**{self.campo: fecha, 'pk__gt': pk})
+                )
+            filas = list(ascendente[:self.por_pagina + 1])
+            has_previous, has_next = len(filas) > self.por_pagina, bool(posicion_antes)
+            filas = filas[:self.por_pagina][::-1]
+        else:
+            filas = list(descendente[:self.por_pagina + 1])
+            has_previous, has_next = False, len(filas) > self.por_pagina
+            filas = filas[:self.por_pagina]
+
+        return PaginaCursor(
+            filas,
+            has_previous=has_previous and bool(filas),
+            has_next=has_next and bool(filas),
+            cursor_anterior=self._cursor(filas[0]) if filas else None,
+            cursor_siguiente=self._cursor(filas[-1]) if filas else None,
+            total=conteo_aproximado(self.queryset),
+            aproximado=settings.PAGINACION_CONTEO == 'aproximado',
+        )
+
+
+class PaginadorLista:
+    """
+    Paginador por posición para secuencias ya acotadas en memoria (p. ej.
+    resultados de búsqueda por relevancia); el cursor es el desplazamiento.
+    """
+
+    def __init__(self, object_list, por_pagina):
+        self.object_list = object_list
+        self.por_pagina = por_pagina
+
+    def _posicion(self, valor):
+        try:
+            return max(int(valor), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def get_page(self, despues=None, antes=None, ultima=False):
+        total = len(self.object_list)
+        inicio = 0
+        if self._posicion(despues) is not None:
+            inicio = self._posicion(despues)
+        elif self._posicion(antes) is not None:
+            inicio = max(self._posicion(antes) - self.por_pagina, 0)
+        elif ultima:
+            inicio = max(total - 1, 0) // self.por_pagina * self.por_pagina
+        fin = min(inicio + self.por_pagina, total)
+
+        return PaginaCursor(
+            self.object_list[inicio:fin],
+            has_previous=inicio > 0,
+            has_next=fin < total,
+            cursor_anterior=str(inicio),
+            cursor_siguiente=str(fin),
+            total=total,
+        )
+
+
+def paginar(request, object_list, por_pagina, campo='fecha_creacion'):
+    """
+    Devuelve (página, parámetros) para la request.
+
+    Los querysets se paginan por cursor; las secuencias ya acotadas (búsqueda)
+    por posición. `parámetros` es el query string de la request sin los
+    parámetros de paginación, para construir los enlaces.
+    """
+    if hasattr(object_list, 'model') and hasattr(object_list, 'query'):
+        paginador = PaginadorCursor(object_list, por_pagina, campo)
+    else:
+        paginador = PaginadorLista(object_list, por_pagina)
+
+    pagina = paginador.get_page(
+        despues=request.GET.get('despues'),
+        antes=request.GET.get('antes'),
+        ultima=bool(request.GET.get('ultima')),
+    )
+
+    parametros = request.GET.copy()
+    for nombre in PARAMETROS_CURSOR:
+        parametros.pop(nombre, None)
+    return pagina, parametros.urlencode()
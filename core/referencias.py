@@ -0,0 +1,147 @@
+# core/referencias.py
+"""
+Datos de referencia del checkout en caché.
+
+Cada checkout necesitaba el tipo de identificación, el canal y el vendedor
+por defecto (el primero activo de cada tabla, creándolo si no hay) y el
+Cliente del usuario, buscado por correo: cuatro o cinco consultas antes de
+empezar. Aquí:
+
+- los valores por defecto se cargan una vez por proceso y se descartan
+  cuando se guarda o elimina un TipoIdentificacion, CanalCliente o
+  Vendedor;
+- el cliente de cada correo se guarda en la caché 'articulos' bajo una
+  versión que cambia cuando se guarda o elimina cualquier Cliente.
+
+Como en core/taxonomia.py, el aviso a los demás procesos es una versión en
+la caché 'articulos' (compartida con backend de archivo o base de datos).
+"""
+import hashlib
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from pos_project.choices import EstadoEntidades
+from .models import TipoIdentificacion, CanalCliente, Vendedor, Cliente
+
+CLAVE_VERSION_DEFECTOS = 'referencias:defectos:version'
+CLAVE_VERSION_CLIENTES = 'referencias:clientes:version'
+
+
+def _version(clave):
+    cache = caches['articulos']
+    version = cache.get(clave)
+    if version is None:
+        cache.add(clave, time.time_ns(), timeout=None)
+        version = cache.get(clave)
+    return version
+
+
+def _primero_activo(modelo, **defecto):
+    """(registro, creado): primer registro activo del modelo; si no hay, se crea con `defecto`"""
+    registro = modelo.objects.filter(estado=EstadoEntidades.ACTIVO).first()
+    if registro:
+        return registro, False
+    return modelo.objects.create(estado=EstadoEntidades.ACTIVO, **defecto), True
+
+
+class Referencias:
+    """Valores por defecto del checkout y cliente de cada usuario"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # (versión, defectos) en un solo atributo: invalidar_defectos puede
+        # descartarlo entre dos lecturas desde otro hilo
+        self._cargados = None
+
+    def _cargar(self):
+        version = _version(CLAVE_VERSION_DEFECTOS)
+        cargados = self._cargados
+        if cargados is not None and cargados[0] == version:
+            return cargados[1]
+        with self._lock:
+            cargados = self._cargados
+            if cargados is not None and cargados[0] == version:
+                return cargados[1]
+            registros = {
+                'tipo_identificacion': _primero_activo(TipoIdentificacion, nombre_tipo_identificacion='DNI'),
+                'canal': _primero_activo(CanalCliente, nombre_canal='Presencial'),
+                'vendedor': _primero_activo(
+                    Vendedor, nombres='Vendedor Predeterminado', correo_electronico='vendedor@sistema.com'
+                ),
+            }
+            defectos = {nombre: registro for nombre, (registro, _) in registros.items()}
+            # Lo creado aquí podría revertirse con la transacción: se guarda
+            # en memoria recién cuando se lee ya confirmado
+            if not any(creado for _, creado in registros.values()):
+                self._cargados = (version, defectos)
+            return defectos
+
+    def tipo_identificacion(self):
+        return self._cargar()['tipo_identificacion']
+
+    def canal(self):
+        return self._cargar()['canal']
+
+    def vendedor(self):
+        return self._cargar()['vendedor']
+
+    def cliente(self, usuario):
+        """Cliente del usuario (por correo); se crea con los valores por defecto si no existe"""
+        correo = usuario.email
+        clave = 'referencias:cliente:%s:%s' % (
+            _version(CLAVE_VERSION_CLIENTES), hashlib.md5(correo.encode()).hexdigest()
+        )
+        cliente = caches['articulos'].get(clave)
+        if cliente is None:
+            cliente, _ = Cliente.objects.get_or_create(
+                correo_electronico=correo,
+                defaults={
+                    'nombres': usuario.full_name or usuario.username,
+                    'nro_documento': '00000000',
+                    'tipo_identificacion': self.tipo_identificacion(),
+                    'canal': self.canal(),
+                    'estado': EstadoEntidades.ACTIVO
+                }
+            )
+            # Solo lo confirmado: un cliente creado en una transacción revertida no debe quedar en caché
+            transaction.on_commit(lambda: caches['articulos'].set(clave, cliente))
+        return cliente
+
+    def invalidar_defectos(self):
+        caches['articulos'].set(CLAVE_VERSION_DEFECTOS, time.time_ns(), timeout=None)
+        with self._lock:
+            self._cargados = None
+
+    def invalidar_clientes(self):
+        caches['articulos'].set(CLAVE_VERSION_CLIENTES, time.time_ns(), timeout=None)
+
+
+referencias = Referencias()
+
+
+@receiver(post_save, sender=TipoIdentificacion)
+@receiver(post_delete, sender=TipoIdentificacion)
+@receiver(post_save, sender=CanalCliente)
+@receiver(post_delete, sender=CanalCliente)
+@receiver(post_save, sender=Vendedor)
+@receiver(post_delete, sender=Vendedor)
+def _invalidar_defectos(sender, **kwargs):
+    # Ya y de nuevo al confirmar, como en core/taxonomia.py
+    referencias.invalidar_defectos()
+    transaction.on_commit(referencias.invalidar_defectos)
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def _invalidar_clientes(sender, created=False, **kwargs):
+    # Un cliente nuevo no cambia el de ningún correo ya en caché (get_or_create
+    # solo crea cuando el correo no tenía cliente)
+    if created:
+        return
+    referencias.invalidar_clientes()
+    transaction.on_commit(referencias.invalidar_clientes)
@@ -0,0 +1,202 @@
+# core/relacionados.py
+"""
+Productos relacionados por compra conjunta.
+
+La tabla ArticuloRelacionado guarda, para cada par de artículos, en cuántas
+órdenes aparecieron juntos. Se mantiene de dos formas, ambas con SQL por
+conjuntos (INSERT ... SELECT con ON CONFLICT, SQLite >= 3.24 o PostgreSQL):
+
+- incremental: al confirmarse cada checkout se suman los pares de la orden
+  (registrar_orden, o registrar_ordenes para un lote de ventas) y al
+  cancelar órdenes se restan (descontar_ordenes);
+- completa: el comando rebuild_related recalcula la tabla recorriendo las
+  órdenes por lotes de clave primaria.
+
+Las órdenes canceladas y las de más de RELACIONADOS_MAX_ARTICULOS_ORDEN
+artículos distintos no cuentan (los pedidos enormes relacionan todo con todo).
+Para artículos sin historial se completa con artículos de la misma línea.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from pos_project.choices import EstadoEntidades, EstadoOrden
+from .models import Articulo, ArticuloRelacionado, ItemOrdenCompraCliente, OrdenCompraCliente
+
+# Órdenes por sentencia al reconstruir
+LOTE_RECONSTRUCCION = 5000
+
+_SQL_COMPRAS = """
+WITH compras AS (
+    SELECT DISTINCT i.pedido_id, i.articulo_id
+    FROM {items} i
+    JOIN {ordenes} o ON o.pedido_id = i.pedido_id
+    WHERE {filtro} AND i.estado = %s AND o.estado <> %s
+), pedidos AS (
+    SELECT pedido_id FROM compras GROUP BY pedido_id HAVING COUNT(*) BETWEEN 2 AND %s
+), pares AS (
+    SELECT a.articulo_id, b.articulo_id AS relacionado_id, COUNT(*) AS veces
+    FROM compras a
+    JOIN compras b ON b.pedido_id = a.pedido_id
+    WHERE a.articulo_id <> b.articulo_id AND a.pedido_id IN (SELECT pedido_id FROM pedidos)
+    GROUP BY a.articulo_id, b.articulo_id
+)
+"""
+
+# El WHERE evita que SQLite lea el ON CONFLICT como condición de un JOIN
+_SQL_SUMAR = _SQL_COMPRAS + """
+INSERT INTO {tabla} (articulo_id, relacionado_id, veces, fecha_modificacion)
+SELECT articulo_id, relacionado_id, veces, %s FROM pares WHERE 1 = 1
+ON CONFLICT (articulo_id, relacionado_id) DO UPDATE
+SET veces = {tabla}.veces + excluded.veces, fecha_modificacion = excluded.fecha_modificacion
+"""
+
+# veces no puede ser negativo: si la tabla quedó por debajo (p. ej. la suma
+# de una orden falló al confirmarse) el par queda en cero y se borra
+_SQL_RESTAR = _SQL_COMPRAS + """
+UPDATE {tabla} SET veces = (
+    SELECT CASE WHEN {tabla}.veces > p.veces THEN {tabla}.veces - p.veces ELSE 0 END
+    FROM pares p
+    WHERE p.articulo_id = {tabla}.articulo_id AND p.relacionado_id = {tabla}.relacionado_id
+), fecha_modificacion = %s
+WHERE EXISTS (
+    SELECT 1 FROM pares p
+    WHERE p.articulo_id = {tabla}.articulo_id AND p.relacionado_id = {tabla}.relacionado_id
+)
+"""
+
+
+def _aplicar_pares(sql, filtro, params):
+    """
+    Aplica `sql` (_SQL_SUMAR o _SQL_RESTAR) a los pares de las órdenes que
+    cumplen `filtro` (sobre la orden `o`); devuelve filas afectadas
+    """
+    quote = connection.ops.quote_name
+    sql = sql.format(
+        items=quote(ItemOrdenCompraCliente._meta.db_table),
+        ordenes=quote(OrdenCompraCliente._meta.db_table),
+        tabla=quote(ArticuloRelacionado._meta.db_table),
+        filtro=filtro,
+    )
+    ahora = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            *params, EstadoEntidades.ACTIVO, EstadoOrden.CANCELADA,
+            settings.RELACIONADOS_MAX_ARTICULOS_ORDEN, ahora,
+        ])
+        return cursor.rowcount
+
+
+def _sumar_pares(filtro, params):
+    """Suma los pares de las órdenes que cumplen `filtro` (sobre la orden `o`); devuelve filas afectadas"""
+    return _aplicar_pares(_SQL_SUMAR, filtro, params)
+
+
+def _pk_orden(valor):
+    return OrdenCompraCliente._meta.pk.get_db_prep_value(valor, connection)
+
+
+def registrar_orden(pedido_id):
+    """Suma a la tabla los pares de artículos de una orden nueva"""
+    return _sumar_pares('o.pedido_id = %s', [_pk_orden(pedido_id)])
+
+
+def registrar_ordenes(pedido_ids):
+    """Como registrar_orden, para varias órdenes nuevas en una sentencia"""
+    pedido_ids = list(pedido_ids)
+    if not pedido_ids:
+        return 0
+    marcadores = ', '.join(['%s'] * len(pedido_ids))
+    return _sumar_pares(f'o.pedido_id IN ({marcadores})', [_pk_orden(pk) for pk in pedido_ids])
+
+
+def descontar_ordenes(pedido_ids):
+    """
+    Resta los pares de órdenes que se van a cancelar y borra los que quedan
+    en cero. Debe llamarse antes de marcarlas como CANCELADAS (las
+    canceladas ya no cuentan) y en la misma transacción.
+    """
+    pedido_ids = [_pk_orden(pk) for pk in pedido_ids]
+    if not pedido_ids:
+        return 0
+    marcadores = ', '.join(['%s'] * len(pedido_ids))
+    filas = _aplicar_pares(_SQL_RESTAR, f'o.pedido_id IN ({marcadores})', pedido_ids)
+
+    # Solo pueden quedar en cero pares de artículos de estas órdenes (índice por artículo)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            DELETE FROM {quote(ArticuloRelacionado._meta.db_table)} WHERE veces <= 0 AND articulo_id IN (
+                SELECT articulo_id FROM {quote(ItemOrdenCompraCliente._meta.db_table)}
+                WHERE pedido_id IN ({marcadores})
+            )
+        """, pedido_ids)
+    return filas
+
+
+def reconstruir(lote=LOTE_RECONSTRUCCION, maximo_por_articulo=None, progreso=None):
+    """
+    Recalcula la tabla completa en una transacción, `lote` órdenes por
+    sentencia. Con `maximo_por_articulo` se conservan solo los N pares más
+    frecuentes de cada artículo. `progreso(ordenes)` se llama tras cada lote.
+    Devuelve el número de pares guardados.
+    """
+    ordenes = OrdenCompraCliente.objects.order_by('pk').values_list('pk', flat=True)
+    with transaction.atomic():
+        ArticuloRelacionado.objects.all().delete()
+
+        procesadas, desde = 0, None
+        while True:
+            pendientes = ordenes.filter(pk__gt=desde) if desde is not None else ordenes
+            bloque = list(pendientes[:lote])
+            if not bloque:
+                break
+            hasta = bloque[-1]
+
+            if desde is None:
+                _sumar_pares('o.pedido_id <= %s', [_pk_orden(hasta)])
+            else:
+                _sumar_pares('o.pedido_id > %s AND o.pedido_id <= %s', [_pk_orden(desde), _pk_orden(hasta)])
+            procesadas += len(bloque)
+            desde = hasta
+            if progreso:
+                progreso(procesadas)
+
+        if maximo_por_articulo:
+            _recortar(maximo_por_articulo)
+        return ArticuloRelacionado.objects.count()
+
+
+def _recortar(maximo):
+    """Deja los `maximo` pares más frecuentes de cada artículo"""
+    tabla = connection.ops.quote_name(ArticuloRelacionado._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            DELETE FROM {tabla} WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY articulo_id ORDER BY veces DESC, relacionado_id
+                    ) AS puesto
+                    FROM {tabla}
+                ) ranking
+                WHERE puesto > %s
+            )
+        """, [maximo])
+
+
+def relacionados_ids(articulo, limite):
+    """
+    Ids de los `limite` artículos activos más comprados junto a `articulo`,
+    completados con artículos de su línea si no hay suficientes.
+    """
+    ids = list(ArticuloRelacionado.objects.filter(
+        articulo_id=articulo.pk, relacionado__estado=EstadoEntidades.ACTIVO
+    ).order_by('-veces', 'relacionado_id').values_list('relacionado_id', flat=True)[:limite])
+
+    if len(ids) < limite and articulo.linea_id:
+        ids += Articulo.objects.filter(
+            linea_id=articulo.linea_id, estado=EstadoEntidades.ACTIVO
+        ).exclude(pk__in=[articulo.pk, *ids]).order_by('pk').values_list(
+            'pk', flat=True
+        )[:limite - len(ids)]
+    return ids
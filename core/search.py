@@ -0,0 +1,263 @@
+# core/search.py
+"""
+Búsqueda de artículos con ranking de relevancia.
+
+Backends intercambiables (setting SEARCH_BACKEND):
+- 'sqlite':   tabla virtual FTS5 `articulos_fts`, mantenida incrementalmente
+              al guardar artículos (instalaciones de una sola tienda).
+- 'postgres': índices GIN de tsvector y trigramas (pg_trgm) sobre la tabla
+              `articulos`; PostgreSQL los mantiene solo.
+- 'q':        filtro icontains original (sin índice, sin ranking).
+- 'auto':     elige según el motor de la base de datos.
+
+Solo se indexan artículos activos. Los códigos admiten búsqueda por prefijo
+("ART-00" encuentra "ART-0012").
+"""
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError
+from django.db.models import Q
+from django.dispatch import receiver
+
+from pos_project.choices import EstadoEntidades
+from .models import Articulo
+from .signals import articulos_modificados
+
+# Campos que no afectan al índice de búsqueda
+CAMPOS_NO_INDEXADOS = {'stock', 'precio', 'fecha_modificacion'}
+
+# Documento indexado en PostgreSQL (debe coincidir con el índice de la migración)
+DOCUMENTO_PG = (
+    "to_tsvector('simple', coalesce(descripcion, '') || ' ' || "
+    "coalesce(codigo_articulo, '') || ' ' || coalesce(codigo_barras, ''))"
+)
+
+
+def _terminos(texto):
+    """Separa la búsqueda en términos alfanuméricos en minúsculas"""
+    return re.findall(r'\w+', (texto or '').lower())
+
+
+def _prefijo_like(texto):
+    """Patrón LIKE de prefijo con los comodines del texto escapados (ESCAPE '\\')"""
+    for caracter in ('\\', '%', '_'):
+        texto = texto.replace(caracter, '\\' + caracter)
+    return f'{texto}%'
+
+
+def _valores_pk(articulo_ids):
+    """Convierte las pk al formato en que se guardan en la base de datos"""
+    campo = Articulo._meta.pk
+    return [campo.get_db_prep_value(articulo_id, connection) for articulo_id in articulo_ids]
+
+
+def _a_pk(valor):
+    return Articulo._meta.pk.to_python(valor)
+
+
+class ResultadosBusqueda:
+    """
+    Lista de resultados ordenada por relevancia, compatible con Paginator.
+
+    Guarda solo las pk; cada página carga únicamente sus propios artículos,
+    sin ordenar la consulta por un CASE de cientos de valores.
+    """
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.ids = ids
+
+    def count(self):
+        return len(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, indice):
+        if not isinstance(indice, slice):
+            return self[indice:indice + 1][0] if indice >= 0 else self[len(self) + indice]
+        ids = self.ids[indice]
+        if not ids:
+            return []
+        articulos = self.queryset.in_bulk(ids)
+        return [articulos[articulo_id] for articulo_id in ids if articulo_id in articulos]
+
+
+class BuscadorBase(ABC):
+    """Interfaz común de los backends de búsqueda"""
+
+    nombre = 'base'
+
+    @abstractmethod
+    def buscar_ids(self, texto, limite):
+        """Devuelve las pk de artículos activos ordenadas por relevancia"""
+
+    def filtrar(self, queryset, texto, limite=None):
+        """Resultados de `texto` dentro de `queryset`, ordenados por relevancia"""
+        ids = self.buscar_ids(texto, limite or settings.SEARCH_MAX_RESULTS)
+        if ids:
+            # Respetar los demás filtros del queryset (stock bajo, etc.)
+            permitidos = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+            ids = [articulo_id for articulo_id in ids if articulo_id in permitidos]
+        return ResultadosBusqueda(queryset, ids)
+
+    def indexar(self, articulo_ids):
+        """Actualiza el índice para los artículos indicados"""
+
+    def reconstruir(self):
+        """Reconstruye el índice completo; devuelve el número de artículos indexados"""
+        return Articulo.objects.filter(estado=EstadoEntidades.ACTIVO).count()
+
+
+class BuscadorQ(BuscadorBase):
+    """Filtro icontains sin índice; se usa cuando no hay backend disponible"""
+
+    nombre = 'q'
+
+    def filtrar(self, queryset, texto, limite=None):
+        return queryset.filter(
+            Q(descripcion__icontains=texto) |
+            Q(codigo_articulo__icontains=texto) |
+            Q(codigo_barras__icontains=texto)
+        )
+
+    def buscar_ids(self, texto, limite):
+        return list(self.filtrar(
+            Articulo.objects.filter(estado=EstadoEntidades.ACTIVO), texto
+        ).values_list('pk', flat=True)[:limite])
+
+
+class BuscadorSQLite(BuscadorBase):
+    """Índice FTS5 con ranking bm25 (los códigos pesan más que la descripción)"""
+
+    nombre = 'sqlite'
+    TABLA = 'articulos_fts'
+
+    def buscar_ids(self, texto, limite):
+        terminos = _terminos(texto)
+        if not terminos:
+            return []
+        consulta = ' '.join(f'"{termino}"*' for termino in terminos)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT articulo_id FROM {self.TABLA} WHERE {self.TABLA} MATCH %s "
+                f"ORDER BY bm25({self.TABLA}, 0.0, 10.0, 10.0, 1.0) LIMIT %s",
+                [consulta, limite]
+            )
+            return [_a_pk(fila[0]) for fila in cursor.fetchall()]
+
+    def indexar(self, articulo_ids):
+        valores = _valores_pk(articulo_ids)
+        marcadores = ', '.join(['%s'] * len(valores))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.TABLA} WHERE articulo_id IN ({marcadores})", valores)
+            cursor.execute(
+                f"INSERT INTO {self.TABLA} (articulo_id, codigo_articulo, codigo_barras, descripcion) "
+                f"SELECT articulo_id, codigo_articulo, coalesce(codigo_barras, ''), descripcion "
+                f"FROM articulos WHERE estado = %s AND articulo_id IN ({marcadores})",
+                [EstadoEntidades.ACTIVO, *valores]
+            )
+
+    def reconstruir(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.TABLA}")
+            cursor.execute(
+                f"INSERT INTO {self.TABLA} (articulo_id, codigo_articulo, codigo_barras, descripcion) "
+                f"SELECT articulo_id, codigo_articulo, coalesce(codigo_barras, ''), descripcion "
+                f"FROM articulos WHERE estado = %s",
+                [EstadoEntidades.ACTIVO]
+            )
+            cursor.execute(f"INSERT INTO {self.TABLA}({self.TABLA}) VALUES ('optimize')")
+            cursor.execute(f"SELECT COUNT(*) FROM {self.TABLA}")
+            return cursor.fetchone()[0]
+
+
+class BuscadorPostgres(BuscadorBase):
+    """tsvector para palabras completas/prefijos y trigramas para códigos y errores de tipeo"""
+
+    nombre = 'postgres'
+
+    def buscar_ids(self, texto, limite):
+        terminos = _terminos(texto)
+        if not terminos:
+            return []
+        tsquery = ' & '.join(f'{termino}:*' for termino in terminos)
+        texto = texto.strip()
+        prefijo = _prefijo_like(texto)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT articulo_id FROM articulos
+                WHERE estado = %s AND (
+                    {DOCUMENTO_PG} @@ to_tsquery('simple', %s)
+                    OR codigo_articulo ILIKE %s ESCAPE '\\'
+                    OR codigo_barras ILIKE %s ESCAPE '\\'
+                    OR descripcion %% %s
+                )
+                ORDER BY
+                    (codigo_articulo ILIKE %s ESCAPE '\\' OR codigo_barras ILIKE %s ESCAPE '\\') DESC,
+                    ts_rank_cd({DOCUMENTO_PG}, to_tsquery('simple', %s))
+                        + similarity(descripcion, %s) DESC
+                LIMIT %s
+                """,
+                [
+                    EstadoEntidades.ACTIVO, tsquery, prefijo, prefijo, texto,
+                    prefijo, prefijo, tsquery, texto, limite,
+                ]
+            )
+            return [fila[0] for fila in cursor.fetchall()]
+
+
+BACKENDS = {
+    'q': BuscadorQ,
+    'sqlite': BuscadorSQLite,
+    'postgres': BuscadorPostgres,
+}
+
+
+_fts5_por_base = {}
+
+
+def fts5_disponible():
+    """Indica si la tabla FTS5 existe (se recuerda solo una vez creada por la migración)"""
+    nombre_base = connection.settings_dict['NAME']
+    if _fts5_por_base.get(nombre_base):
+        return True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [BuscadorSQLite.TABLA]
+            )
+            disponible = cursor.fetchone() is not None
+    except DatabaseError:
+        return False
+    if disponible:
+        _fts5_por_base[nombre_base] = True
+    return disponible
+
+
+def get_buscador():
+    """Backend configurado en SEARCH_BACKEND ('auto' elige según el motor)"""
+    nombre = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if nombre == 'auto':
+        if connection.vendor == 'postgresql':
+            nombre = 'postgres'
+        elif connection.vendor == 'sqlite' and fts5_disponible():
+            nombre = 'sqlite'
+        else:
+            nombre = 'q'
+    return BACKENDS[nombre]()
+
+
+@receiver(articulos_modificados)
+def _actualizar_indice(sender, articulo_ids, campos=None, **kwargs):
+    """Mantiene el índice al día cuando cambian los datos buscables"""
+    if campos is not None and campos <= CAMPOS_NO_INDEXADOS:
+        return
+    get_buscador().indexar(articulo_ids)
@@ -0,0 +1,95 @@
+# core/secuencias.py
+"""
+Asignación de números de pedido por bloques.
+
+Cada proceso reserva en la base de datos un bloque de números consecutivos
+(un UPDATE ... SET ultimo_numero = ultimo_numero + N) y los entrega desde
+memoria, de modo que la mayoría de las órdenes no necesitan ir a la base de
+datos para numerarse. Los números nunca se repiten; si un proceso termina
+sin agotar su bloque quedan huecos, lo cual es aceptable.
+
+Los bloques deben reservarse fuera de transacciones (o en transacciones que
+se confirman): si la transacción que reservó un bloque se revierte, otro
+proceso podría recibir el mismo bloque. Por eso el checkout pide el número
+antes de abrir su transacción, y OrdenCompraCliente.save() no lo asigna
+dentro de una.
+
+Los números son únicos pero no crecientes entre procesos: cada uno entrega
+su propio bloque, así que un número menor puede confirmarse después de uno
+mayor.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import SecuenciaPedido
+
+FORMATO_NRO_PEDIDO = 'ORD-{tienda}-{numero:08d}'
+
+
+class AsignadorNumeros:
+    """Entrega números consecutivos de una secuencia reservándolos por bloques"""
+
+    def __init__(self, tienda, tamano_bloque):
+        self.tienda = tienda
+        self.tamano_bloque = max(1, int(tamano_bloque))
+        self.bloques_reservados = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._siguiente = 1
+        self._limite = 0
+
+    def _reservar_bloque(self):
+        with transaction.atomic():
+            actualizados = SecuenciaPedido.objects.filter(tienda=self.tienda).update(
+                ultimo_numero=F('ultimo_numero') + self.tamano_bloque
+            )
+            if not actualizados:
+                try:
+                    with transaction.atomic():
+                        SecuenciaPedido.objects.create(tienda=self.tienda, ultimo_numero=self.tamano_bloque)
+                except IntegrityError:
+                    # Otro proceso creó la secuencia al mismo tiempo
+                    SecuenciaPedido.objects.filter(tienda=self.tienda).update(
+                        ultimo_numero=F('ultimo_numero') + self.tamano_bloque
+                    )
+            ultimo = SecuenciaPedido.objects.filter(tienda=self.tienda).values_list(
+                'ultimo_numero', flat=True
+            ).get()
+
+        self._siguiente = ultimo - self.tamano_bloque + 1
+        self._limite = ultimo
+        self._pid = os.getpid()
+        self.bloques_reservados += 1
+
+    def siguiente(self):
+        """Devuelve el siguiente número de la secuencia"""
+        with self._lock:
+            # Un proceso hijo (fork) no debe reutilizar el bloque del padre
+            if self._pid != os.getpid() or self._siguiente > self._limite:
+                self._reservar_bloque()
+            numero = self._siguiente
+            self._siguiente += 1
+            return numero
+
+
+_asignadores = {}
+_asignadores_lock = threading.Lock()
+
+
+def get_asignador(tienda=None):
+    """Asignador del proceso para la tienda indicada (por defecto POS_CODIGO_TIENDA)"""
+    tienda = tienda or settings.POS_CODIGO_TIENDA
+    with _asignadores_lock:
+        if tienda not in _asignadores:
+            _asignadores[tienda] = AsignadorNumeros(tienda, settings.POS_BLOQUE_NRO_PEDIDO)
+        return _asignadores[tienda]
+
+
+def siguiente_nro_pedido(tienda=None):
+    """Número de pedido con formato ORD-<tienda>-<secuencia>"""
+    asignador = get_asignador(tienda)
+    return FORMATO_NRO_PEDIDO.format(tienda=asignador.tienda, numero=asignador.siguiente())
@@ -0,0 +1,45 @@
+# core/signals.py
+"""
+Notificaciones de cambios en el catálogo.
+
+Los índices y cachés derivados del catálogo (búsqueda, etc.) escuchan una
+única señal, `articulos_modificados`, en lugar de engancharse cada uno a
+los post_save/post_delete de Articulo y ListaPrecio. Los caminos masivos que
+no disparan señales de modelo (update(), bulk_create) la envían a mano.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import Articulo, ListaPrecio
+
+# Argumentos: articulo_ids (lista de pk) y campos (conjunto de campos
+# modificados, o None si pudo cambiar cualquiera). 'precio' indica un cambio
+# en la lista de precios del artículo.
+articulos_modificados = Signal()
+
+
+def notificar_articulos(articulo_ids, campos=None, sender=Articulo):
+    """Envía `articulos_modificados` para los artículos indicados"""
+    articulo_ids = list(articulo_ids)
+    if articulo_ids:
+        articulos_modificados.send(
+            sender=sender,
+            articulo_ids=articulo_ids,
+            campos=set(campos) if campos is not None else None
+        )
+
+
+@receiver(post_save, sender=Articulo)
+def _articulo_guardado(sender, instance, update_fields=None, **kwargs):
+    notificar_articulos([instance.pk], campos=update_fields)
+
+
+@receiver(post_delete, sender=Articulo)
+def _articulo_eliminado(sender, instance, **kwargs):
+    notificar_articulos([instance.pk])
+
+
+@receiver(post_save, sender=ListaPrecio)
+@receiver(post_delete, sender=ListaPrecio)
+def _precio_modificado(sender, instance, **kwargs):
+    notificar_articulos([instance.articulo_id], campos={'precio'}, sender=ListaPrecio)
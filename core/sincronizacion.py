@@ -0,0 +1,290 @@
+# core/sincronizacion.py
+"""
+Carga por lotes de ventas hechas en cajas sin conexión.
+
+Si la caja pierde la conexión sigue vendiendo y encola las ventas; al
+reconectarse las envía por lotes (api/sincronizar/ventas/). Cada venta trae
+una clave de idempotencia generada por la caja, la fecha y hora en que se
+hizo, el cliente (opcional) y sus líneas.
+
+Por lote:
+- las ventas inválidas se informan y se omiten sin afectar al resto;
+- las claves ya cargadas por el mismo usuario (en un envío anterior o
+  repetidas en el mismo lote) se informan como duplicadas con su orden original, así que reenviar
+  un lote completo es seguro;
+- artículos y clientes se resuelven con una consulta cada uno; órdenes,
+  items y claves se insertan con bulk_create y el stock se descuenta con un
+  UPDATE multi-fila por lote de artículos (core/stock.py), todo en una
+  transacción.
+
+Las ventas ya ocurrieron: el stock se descuenta aunque quede negativo y
+esos artículos se informan para revisarlos.
+"""
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from pos_project.choices import EstadoEntidades, EstadoOrden
+from .models import (
+    Articulo, Cliente,
+    OrdenCompraCliente, ItemOrdenCompraCliente, VentaSincronizada
+)
+from .money import Dinero, total_lineas
+from .referencias import referencias
+from .relacionados import registrar_ordenes
+from .secuencias import siguiente_nro_pedido
+from .signals import notificar_articulos
+from .stock import descontar_stock
+
+# Filas por INSERT en bulk_create
+LOTE_INSERCION = 1000
+# Intentos de carga de un lote que choca con otro envío de las mismas claves
+INTENTOS_CARGA = 3
+
+CREADA = 'creada'
+DUPLICADA = 'duplicada'
+ERROR = 'error'
+
+
+class VentaInvalida(ValueError):
+    """La venta no se puede cargar (datos incompletos o artículos desconocidos)"""
+
+
+def _leer_venta(datos):
+    """Valida la estructura de una venta; devuelve un diccionario normalizado"""
+    if not isinstance(datos, dict):
+        raise VentaInvalida('Venta inválida.')
+    clave = str(datos.get('clave') or '').strip()
+    if not clave or len(clave) > 64:
+        raise VentaInvalida('Clave de idempotencia requerida (máximo 64 caracteres).')
+
+    fecha = parse_datetime(str(datos.get('fecha') or ''))
+    if fecha is None:
+        raise VentaInvalida('Fecha inválida.')
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+
+    cliente = datos.get('cliente') or {}
+    if not isinstance(cliente, dict):
+        raise VentaInvalida('Cliente inválido.')
+
+    lineas = []
+    for linea in datos.get('lineas') or []:
+        try:
+            cantidad = int(linea.get('cantidad', 1))
+            if linea.get('articulo_id'):
+                articulo = ('articulo_id', uuid.UUID(str(linea['articulo_id'])))
+            elif linea.get('codigo_barras'):
+                articulo = ('codigo_barras', str(linea['codigo_barras']).strip())
+            else:
+                raise ValueError
+            precio = Dinero.desde(linea['precio']) if linea.get('precio') is not None else None
+        except (ValueError, TypeError, AttributeError, ArithmeticError):
+            raise VentaInvalida('Línea inválida.')
+        if cantidad <= 0:
+            raise VentaInvalida('Cantidad inválida.')
+        lineas.append((articulo, cantidad, precio))
+    if not lineas:
+        raise VentaInvalida('La venta no tiene líneas.')
+
+    return {
+        'clave': clave,
+        'fecha': fecha,
+        'cliente': cliente,
+        'lineas': lineas,
+        'notas': str(datos.get('notas') or ''),
+    }
+
+
+def _resolver_articulos(ventas):
+    """{('articulo_id'|'codigo_barras', valor): articulo} con una consulta (más la de precios)"""
+    claves = {articulo for venta in ventas for articulo, _, _ in venta['lineas']}
+    ids = [valor for campo, valor in claves if campo == 'articulo_id']
+    codigos = [valor for campo, valor in claves if campo == 'codigo_barras']
+    resueltos = {}
+    if claves:
+        for articulo in Articulo.objects.con_precio().filter(
+            Q(pk__in=ids) | Q(codigo_barras__in=codigos)
+        ).only('articulo_id', 'codigo_barras', 'descripcion').order_by('pk'):
+            resueltos[('articulo_id', articulo.pk)] = articulo
+            resueltos.setdefault(('codigo_barras', articulo.codigo_barras), articulo)
+    return resueltos
+
+
+def _resolver_clientes(ventas, usuario, tipo_id, canal):
+    """
+    {correo: cliente_id} de las ventas; los correos sin cliente se crean con
+    bulk_create. Sin cliente en la venta se usa el del usuario que sincroniza.
+    """
+    nuevos = {}
+    for venta in ventas:
+        datos = venta['cliente']
+        correo = (datos.get('correo_electronico') or usuario.email or '').strip()
+        venta['correo'] = correo
+        nuevos.setdefault(correo, {
+            'nombres': datos.get('nombres') or usuario.full_name or usuario.username,
+            'nro_documento': str(datos.get('nro_documento') or '00000000')[:20],
+        })
+
+    clientes = {}
+    for cliente_id, correo in Cliente.objects.filter(
+        correo_electronico__in=list(nuevos)
+    ).order_by('pk').values_list('cliente_id', 'correo_electronico'):
+        clientes.setdefault(correo, cliente_id)
+
+    creados = Cliente.objects.bulk_create([
+        Cliente(
+            correo_electronico=correo, tipo_identificacion=tipo_id, canal=canal,
+            estado=EstadoEntidades.ACTIVO, **datos
+        )
+        for correo, datos in nuevos.items() if correo not in clientes
+    ], batch_size=LOTE_INSERCION)
+    clientes.update({cliente.correo_electronico: cliente.pk for cliente in creados})
+    return clientes
+
+
+def sincronizar_ventas(ventas, usuario):
+    """
+    Carga un lote de ventas (lista de diccionarios con clave, fecha, cliente,
+    lineas y notas). Devuelve un diccionario con un resultado por venta, en
+    el orden recibido, y los artículos que quedaron con stock negativo.
+    """
+    resultados = [None] * len(ventas)
+    validas = []
+    for indice, datos in enumerate(ventas):
+        try:
+            validas.append((indice, _leer_venta(datos)))
+        except VentaInvalida as e:
+            clave = datos.get('clave') if isinstance(datos, dict) else None
+            resultados[indice] = {'clave': clave, 'estado': ERROR, 'error': str(e)}
+
+    articulos = _resolver_articulos([venta for _, venta in validas])
+    cargables = []
+    for indice, venta in validas:
+        faltantes = [articulo[1] for articulo, _, _ in venta['lineas'] if articulo not in articulos]
+        if faltantes:
+            resultados[indice] = {
+                'clave': venta['clave'], 'estado': ERROR,
+                'error': f"Artículos no encontrados: {', '.join(map(str, faltantes))}",
+            }
+        else:
+            cargables.append((indice, venta))
+
+    # Números de pedido fuera de la transacción (ver core/secuencias.py), solo
+    # para las claves que aún no están cargadas
+    ya_cargadas = set(VentaSincronizada.objects.filter(
+        usuario=usuario, clave__in=[venta['clave'] for _, venta in cargables]
+    ).values_list('clave', flat=True))
+    pendientes = {venta['clave'] for _, venta in cargables} - ya_cargadas
+    numeros = [siguiente_nro_pedido() for _ in range(len(pendientes))]
+
+    negativos = []
+    for intento in range(1, INTENTOS_CARGA + 1):
+        try:
+            negativos = _cargar(cargables, articulos, list(numeros), usuario, resultados)
+            break
+        except IntegrityError:
+            # Otro envío del mismo lote confirmó primero: sus claves ahora son
+            # duplicadas. Los números reservados siguen siendo de este proceso.
+            if intento == INTENTOS_CARGA:
+                # La transacción se revirtió entera: ninguna venta cargable
+                # quedó cargada; la caja puede reenviarlas
+                for indice, venta in cargables:
+                    resultados[indice] = {
+                        'clave': venta['clave'], 'estado': ERROR,
+                        'error': 'Envío concurrente con las mismas claves; reenvíe la venta.',
+                    }
+
+    return {
+        'resultados': resultados,
+        'stock_negativo': [
+            {'articulo_id': str(articulo.pk), 'descripcion': articulo.descripcion} for articulo in negativos
+        ],
+    }
+
+
+def _cargar(cargables, articulos, numeros, usuario, resultados):
+    """Inserta las ventas nuevas del lote en una transacción; completa `resultados`"""
+    with transaction.atomic():
+        existentes = {
+            clave: (pedido_id, nro_pedido)
+            for clave, pedido_id, nro_pedido in VentaSincronizada.objects.filter(
+                usuario=usuario, clave__in=[venta['clave'] for _, venta in cargables]
+            ).values_list('clave', 'pedido_id', 'pedido__nro_pedido')
+        }
+
+        numeros = iter(numeros)
+        nuevas, vistas = [], {}
+        for indice, venta in cargables:
+            original = existentes.get(venta['clave']) or vistas.get(venta['clave'])
+            if original:
+                resultados[indice] = {
+                    'clave': venta['clave'], 'estado': DUPLICADA,
+                    'pedido_id': str(original[0]), 'nro_pedido': original[1],
+                }
+                continue
+            nro_pedido = next(numeros, None)
+            if nro_pedido is None:
+                raise IntegrityError('Sin números de pedido reservados para el lote')
+            venta['pedido'] = (uuid.uuid4(), nro_pedido)
+            vistas[venta['clave']] = venta['pedido']
+            nuevas.append((indice, venta))
+
+        if not nuevas:
+            return []
+
+        tipo_id, canal, vendedor = referencias.tipo_identificacion(), referencias.canal(), referencias.vendedor()
+        clientes = _resolver_clientes([venta for _, venta in nuevas], usuario, tipo_id, canal)
+
+        ordenes, items, claves, cantidades = [], [], [], {}
+        for _, venta in nuevas:
+            pedido_id, nro_pedido = venta['pedido']
+            lineas = []
+            for numero, (clave_articulo, cantidad, precio) in enumerate(venta['lineas'], start=1):
+                articulo = articulos[clave_articulo]
+                if precio is None:
+                    precio = Dinero.desde(articulo.listaprecio.precio_1 if articulo.listaprecio else None)
+                lineas.append((precio, cantidad))
+                cantidades[articulo.pk] = cantidades.get(articulo.pk, 0) + cantidad
+                items.append(ItemOrdenCompraCliente(
+                    pedido_id=pedido_id, nro_item=numero, articulo_id=articulo.pk,
+                    cantidad=cantidad, precio_unitario=precio.a_decimal(),
+                    total_item=(precio * cantidad).a_decimal(), creado_por=usuario,
+                ))
+            ordenes.append(OrdenCompraCliente(
+                pedido_id=pedido_id, nro_pedido=nro_pedido, cliente_id=clientes[venta['correo']],
+                vendedor=vendedor, estado=EstadoOrden.COMPLETADA, notas=venta['notas'],
+                importe=total_lineas(lineas).a_decimal(), creado_por=usuario,
+            ))
+            claves.append(VentaSincronizada(
+                clave=venta['clave'], usuario=usuario, pedido_id=pedido_id, fecha_venta=venta['fecha']
+            ))
+
+        OrdenCompraCliente.objects.bulk_create(ordenes, batch_size=LOTE_INSERCION)
+        ItemOrdenCompraCliente.objects.bulk_create(items, batch_size=LOTE_INSERCION)
+        # Si otro envío cargó la misma clave mientras tanto, falla aquí y se revierte el lote
+        VentaSincronizada.objects.bulk_create(claves, batch_size=LOTE_INSERCION)
+
+        # fecha_pedido es auto_now_add: se corrige a la fecha de la venta, un UPDATE por día
+        por_fecha = {}
+        for _, venta in nuevas:
+            por_fecha.setdefault(timezone.localdate(venta['fecha']), []).append(venta['pedido'][0])
+        for fecha, pedido_ids in por_fecha.items():
+            if fecha != timezone.localdate():
+                OrdenCompraCliente.objects.filter(pk__in=pedido_ids).update(fecha_pedido=fecha)
+
+        negativos = descontar_stock(cantidades)
+
+        pedido_ids = [venta['pedido'][0] for _, venta in nuevas]
+        transaction.on_commit(lambda: registrar_ordenes(pedido_ids))
+        notificar_articulos(list(cantidades), campos={'stock'})
+
+    for indice, venta in nuevas:
+        resultados[indice] = {
+            'clave': venta['clave'], 'estado': CREADA,
+            'pedido_id': str(venta['pedido'][0]), 'nro_pedido': venta['pedido'][1],
+        }
+    return negativos
@@ -0,0 +1,162 @@
+# core/stock.py
+"""
+Reserva atómica de stock.
+
+Las reservas se hacen siempre dentro de una transacción:
+1. Se bloquean las filas de los artículos en orden de clave primaria
+   (SELECT ... FOR UPDATE en PostgreSQL; en SQLite la transacción IMMEDIATE
+   ya serializa a los escritores). Tomar los bloqueos siempre en el mismo
+   orden evita interbloqueos entre cajas que venden los mismos artículos.
+2. Se calcula cuánto se puede reservar de cada línea.
+3. Se descuenta con UPDATE condicionales (stock >= cantidad), de modo que
+   aunque fallara el bloqueo nunca se vende más de lo disponible.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import Articulo
+
+# Artículos por sentencia (mantiene los parámetros bajo el límite de SQLite)
+LOTE_STOCK = 100
+
+
+class StockInsuficiente(Exception):
+    """Uno o más artículos no tienen stock suficiente para la orden"""
+
+    def __init__(self, articulos):
+        self.articulos = list(articulos)
+        nombres = ', '.join(articulo.descripcion for articulo in self.articulos)
+        super().__init__(f'Stock insuficiente para: {nombres}')
+
+
+def _lotes(ids):
+    for inicio in range(0, len(ids), LOTE_STOCK):
+        yield ids[inicio:inicio + LOTE_STOCK]
+
+
+def _bloquear(lote):
+    """Lee (y bloquea, si el motor lo soporta) los artículos del lote en orden de pk"""
+    articulos = Articulo.objects.filter(pk__in=lote).only('articulo_id', 'descripcion', 'stock')
+    if connection.features.has_select_for_update:
+        articulos = articulos.select_for_update()
+    return list(articulos.order_by('pk'))
+
+
+def _cantidad_por_articulo(reservas):
+    """CASE pk WHEN ... THEN cantidad para un UPDATE multi-fila"""
+    return Case(
+        *[When(pk=articulo_id, then=Value(valor)) for articulo_id, valor in reservas.items()],
+        output_field=IntegerField(),
+    )
+
+
+def _descontar(reservas):
+    """Aplica un UPDATE condicional multi-fila; devuelve las filas actualizadas"""
+    cantidad = _cantidad_por_articulo(reservas)
+    return Articulo.objects.filter(
+        pk__in=list(reservas), stock__gte=cantidad
+    ).update(stock=F('stock') - cantidad, fecha_modificacion=timezone.now())
+
+
+def reservar_stock(cantidades, permitir_parcial=False):
+    """
+    Descuenta stock para `cantidades` ({articulo_id: cantidad}).
+
+    Sin `permitir_parcial`, si algún artículo no alcanza se lanza
+    StockInsuficiente y no se descuenta nada (la transacción se revierte).
+    Con `permitir_parcial`, cada línea se llena hasta el stock disponible.
+
+    Devuelve {articulo_id: cantidad_reservada}; las líneas sin stock quedan en 0.
+    """
+    if not connection.in_atomic_block:
+        raise transaction.TransactionManagementError(
+            'reservar_stock debe ejecutarse dentro de transaction.atomic()'
+        )
+
+    reservado = {}
+    faltantes = []
+    for lote in _lotes(sorted(cantidades, key=str)):
+        reservas = {}
+        for articulo in _bloquear(lote):
+            pedida = cantidades[articulo.pk]
+            disponible = max(articulo.stock, 0)
+            if disponible < pedida:
+                faltantes.append(articulo)
+                if not permitir_parcial:
+                    continue
+            reservas[articulo.pk] = min(pedida, disponible)
+
+        # Artículos inexistentes cuentan como reservados en 0
+        for articulo_id in lote:
+            reservado.setdefault(articulo_id, 0)
+
+        if faltantes and not permitir_parcial:
+            continue
+
+        reservas = {articulo_id: valor for articulo_id, valor in reservas.items() if valor > 0}
+        if reservas and _descontar(reservas) != len(reservas):
+            # Solo ocurre si otra transacción modificó el stock sin bloquear las filas
+            raise StockInsuficiente(Articulo.objects.filter(pk__in=list(reservas)))
+        reservado.update(reservas)
+
+    if faltantes and not permitir_parcial:
+        raise StockInsuficiente(faltantes)
+    return reservado
+
+
+def descontar_stock(cantidades):
+    """
+    Descuenta `cantidades` ({articulo_id: cantidad}) sin condición de stock,
+    para ventas ya realizadas (p. ej. sincronizadas desde una caja sin
+    conexión). Bloquea en el mismo orden que reservar_stock y descuenta con
+    un UPDATE multi-fila por lote.
+
+    Devuelve la lista de artículos que quedaron con stock negativo.
+    """
+    if not connection.in_atomic_block:
+        raise transaction.TransactionManagementError(
+            'descontar_stock debe ejecutarse dentro de transaction.atomic()'
+        )
+
+    negativos = []
+    for lote in _lotes(sorted(cantidades, key=str)):
+        articulos = _bloquear(lote)
+        reservas = {
+            articulo.pk: cantidades[articulo.pk] for articulo in articulos if cantidades[articulo.pk] > 0
+        }
+        if not reservas:
+            continue
+        cantidad = _cantidad_por_articulo(reservas)
+        Articulo.objects.filter(pk__in=list(reservas)).update(
+            stock=F('stock') - cantidad, fecha_modificacion=timezone.now()
+        )
+        negativos += [articulo for articulo in articulos if articulo.stock < reservas.get(articulo.pk, 0)]
+    return negativos
+
+
+def reponer_stock(cantidades):
+    """
+    Devuelve al stock `cantidades` ({articulo_id: cantidad}), p. ej. al
+    cancelar órdenes. Toma los bloqueos en el mismo orden que reservar_stock
+    y suma con un UPDATE multi-fila por lote.
+
+    Devuelve la cantidad de artículos actualizados.
+    """
+    if not connection.in_atomic_block:
+        raise transaction.TransactionManagementError(
+            'reponer_stock debe ejecutarse dentro de transaction.atomic()'
+        )
+
+    actualizados = 0
+    for lote in _lotes(sorted(cantidades, key=str)):
+        reposiciones = {articulo_id: cantidades[articulo_id] for articulo_id in lote if cantidades[articulo_id] > 0}
+        if not reposiciones:
+            continue
+        if connection.features.has_select_for_update:
+            _bloquear(lote)
+        cantidad = _cantidad_por_articulo(reposiciones)
+        actualizados += Articulo.objects.filter(pk__in=list(reposiciones)).update(
+            stock=F('stock') + cantidad, fecha_modificacion=timezone.now()
+        )
+    return actualizados
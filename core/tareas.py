@@ -0,0 +1,183 @@
+# core/tareas.py
+"""
+Cola de trabajos en segundo plano sobre la base de datos (tabla `tareas`).
+
+Lo que no necesita la respuesta (el correo de confirmación por SMTP, el PDF
+de la orden) se encola y lo ejecuta `manage.py run_worker`, sin un broker
+externo:
+
+- `encolar` inserta el trabajo en la transacción en curso: se confirma o
+  se revierte junto con la orden que lo origina, así que no queda un
+  correo de una orden inexistente ni una orden sin su correo;
+- cada trabajador reclama un lote con un UPDATE condicionado (funciona
+  igual en SQLite y PostgreSQL: si dos reclaman la misma fila solo a uno le
+  cumple la condición) y la marca como suya hasta que vence el plazo de
+  visibilidad; si el proceso muere, otro la retoma al vencer;
+- un fallo se reintenta con espera exponencial; agotados los intentos la
+  tarea queda FALLIDA (cola de fallidas) para revisarla y reencolarla con
+  `manage.py queue_status --reencolar-fallidas`.
+
+Los trabajos se registran con `@tarea('nombre')` y reciben sus argumentos
+(JSON) como palabras clave. Deben poder repetirse: un trabajador que muere
+después de ejecutar pero antes de marcarla hace que se ejecute otra vez.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from pos_project.choices import EstadoTarea
+from .models import Tarea
+
+logger = logging.getLogger(__name__)
+
+_registro = {}
+
+
+def tarea(nombre):
+    """Decorador: registra la función como trabajo `nombre`"""
+    def registrar(funcion):
+        _registro[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def encolar(tipo, **argumentos):
+    """Encola un trabajo dentro de la transacción en curso"""
+    encolar_lote([(tipo, argumentos)])
+
+
+def encolar_lote(trabajos):
+    """Encola [(tipo, argumentos), ...] con un solo INSERT en la transacción en curso"""
+    desconocidos = {tipo for tipo, _ in trabajos} - set(_registro)
+    if desconocidos:
+        raise ValueError(f'Tareas no registradas: {", ".join(sorted(desconocidos))}')
+    tareas = [
+        Tarea(tipo=tipo, argumentos=argumentos, max_intentos=settings.TAREAS_MAX_INTENTOS)
+        for tipo, argumentos in trabajos
+    ]
+    # Los trabajadores no ven las filas hasta que la transacción se confirma
+    Tarea.objects.bulk_create(tareas)
+
+
+def reclamar(cantidad, visibilidad=None):
+    """Toma hasta `cantidad` trabajos disponibles para este trabajador"""
+    visibilidad = settings.TAREAS_VISIBILIDAD if visibilidad is None else visibilidad
+    ahora = timezone.now()
+    # Pendientes ya disponibles y en proceso con la visibilidad vencida
+    disponibles = Tarea.objects.filter(
+        estado__in=[EstadoTarea.PENDIENTE, EstadoTarea.EN_PROCESO], disponible_desde__lte=ahora
+    )
+    candidatos = list(
+        disponibles.order_by('disponible_desde', 'pk').values_list('pk', flat=True)[:cantidad]
+    )
+    if not candidatos:
+        return []
+    marca = uuid.uuid4().hex
+    disponibles.filter(pk__in=candidatos).update(
+        estado=EstadoTarea.EN_PROCESO,
+        disponible_desde=ahora + timedelta(seconds=visibilidad),
+        intentos=F('intentos') + 1,
+        reclamada_por=marca,
+        fecha_inicio=ahora,
+    )
+    return list(Tarea.objects.filter(pk__in=candidatos, reclamada_por=marca).order_by('disponible_desde', 'pk'))
+
+
+def espera_reintento(intentos):
+    """Segundos antes del siguiente intento: exponencial con tope"""
+    return min(settings.TAREAS_REINTENTO_BASE * 2 ** (intentos - 1), settings.TAREAS_REINTENTO_MAX)
+
+
+def ejecutar(registro):
+    """Ejecuta una tarea reclamada y registra el resultado; True si terminó bien"""
+    # Solo actualiza si sigue siendo de este trabajador (no la retomó otro)
+    propia = Tarea.objects.filter(pk=registro.pk, reclamada_por=registro.reclamada_por)
+    try:
+        if registro.intentos > registro.max_intentos:
+            raise RuntimeError('Se agotaron los intentos sin que el trabajador terminara (visibilidad vencida)')
+        funcion = _registro.get(registro.tipo)
+        if funcion is None:
+            raise LookupError(f'Tarea no registrada: {registro.tipo}')
+        funcion(**registro.argumentos)
+    except Exception as e:
+        ahora = timezone.now()
+        error = f'{type(e).__name__}: {e}'
+        if registro.intentos >= registro.max_intentos:
+            propia.update(estado=EstadoTarea.FALLIDA, fecha_fin=ahora, ultimo_error=error)
+            logger.error('Tarea %s #%s fallida tras %s intentos: %s',
+                         registro.tipo, registro.pk, registro.intentos, error)
+        else:
+            espera = espera_reintento(registro.intentos)
+            propia.update(
+                estado=EstadoTarea.PENDIENTE,
+                disponible_desde=ahora + timedelta(seconds=espera),
+                ultimo_error=error,
+            )
+            logger.warning('Tarea %s #%s falló (intento %s), se reintenta en %ss: %s',
+                           registro.tipo, registro.pk, registro.intentos, espera, error)
+        return False
+
+    ahora = timezone.now()
+    if not propia.update(estado=EstadoTarea.COMPLETADA, fecha_fin=ahora):
+        logger.warning('Tarea %s #%s terminó después de vencer su visibilidad; la retomó otro trabajador',
+                       registro.tipo, registro.pk)
+        return True
+    logger.info('Tarea %s #%s completada en %.0f ms (%.0f ms desde que se encoló)',
+                registro.tipo, registro.pk,
+                (ahora - registro.fecha_inicio).total_seconds() * 1000,
+                (ahora - registro.fecha_creacion).total_seconds() * 1000)
+    return True
+
+
+def procesar_pendientes(lote=10, visibilidad=None):
+    """Ejecuta lo disponible hasta vaciar la cola; devuelve {'completadas', 'fallidas'}"""
+    resultado = {'completadas': 0, 'fallidas': 0}
+    while True:
+        reclamadas = reclamar(lote, visibilidad)
+        if not reclamadas:
+            return resultado
+        for registro in reclamadas:
+            resultado['completadas' if ejecutar(registro) else 'fallidas'] += 1
+
+
+def metricas(minutos=60):
+    """
+    Profundidad de la cola y latencia de los trabajos completados en los
+    últimos `minutos`: espera (encolado → inicio) y total (encolado → fin).
+    """
+    ahora = timezone.now()
+    por_estado = dict(Tarea.objects.values_list('estado').annotate(total=Count('pk')).order_by())
+    mas_antigua = Tarea.objects.filter(
+        estado=EstadoTarea.PENDIENTE, disponible_desde__lte=ahora
+    ).aggregate(minimo=Min('fecha_creacion'))['minimo']
+
+    esperas, totales = [], []
+    recientes = Tarea.objects.filter(
+        estado=EstadoTarea.COMPLETADA, fecha_fin__gte=ahora - timedelta(minutes=minutos)
+    ).values_list('fecha_creacion', 'fecha_inicio', 'fecha_fin')
+    for creacion, inicio, fin in recientes.iterator():
+        esperas.append((inicio - creacion).total_seconds())
+        totales.append((fin - creacion).total_seconds())
+
+    return {
+        'profundidad': {estado.label: por_estado.get(estado.value, 0) for estado in EstadoTarea},
+        'antiguedad_max_s': (ahora - mas_antigua).total_seconds() if mas_antigua else 0,
+        'completadas': len(totales),
+        'espera': _resumen(esperas),
+        'latencia': _resumen(totales),
+    }
+
+
+def _resumen(segundos):
+    if not segundos:
+        return {'promedio_s': 0, 'p95_s': 0, 'max_s': 0}
+    ordenados = sorted(segundos)
+    return {
+        'promedio_s': sum(ordenados) / len(ordenados),
+        'p95_s': ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))],
+        'max_s': ordenados[-1],
+    }
@@ -0,0 +1,132 @@
+# core/taxonomia.py
+"""
+Árbol de grupos y líneas de artículos (grupo -> líneas) en memoria.
+
+Los formularios de artículos y el endpoint de líneas por grupo lo leían de
+la base de datos en cada request. Aquí se carga una vez por proceso y se
+descarta cuando se guarda o elimina un GrupoArticulo o LineaArticulo. El
+aviso a los demás procesos es una versión en la caché 'articulos' (ver
+core/cache_articulos.py): con backend de archivo o base de datos todos los
+procesos la comparten.
+
+Cada rama y el árbol completo tienen un ETag calculado sobre su contenido,
+para que el navegador pueda revalidar con If-None-Match y recibir un 304.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from pos_project.choices import EstadoEntidades
+from .models import GrupoArticulo, LineaArticulo
+
+CLAVE_VERSION = 'taxonomia:version'
+
+
+def _etag(datos):
+    contenido = json.dumps(datos, sort_keys=True, ensure_ascii=False).encode()
+    return '"%s"' % hashlib.md5(contenido).hexdigest()
+
+
+class Taxonomia:
+    """Grupos activos con sus líneas activas, ordenados por nombre"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (versión, grupos, líneas, etags) en un solo atributo: los lectores
+        # usan la foto que validó _cargar aunque otro hilo invalide entre medio
+        self._datos = None
+
+    def _version_compartida(self):
+        cache = caches['articulos']
+        version = cache.get(CLAVE_VERSION)
+        if version is None:
+            cache.add(CLAVE_VERSION, time.time_ns(), timeout=None)
+            version = cache.get(CLAVE_VERSION)
+        return version
+
+    def _cargar(self):
+        """Devuelve (grupos, líneas, etags) vigentes, recargándolos si cambió la versión"""
+        version = self._version_compartida()
+        datos = self._datos
+        if datos is not None and datos[0] == version:
+            return datos[1:]
+        with self._lock:
+            datos = self._datos
+            if datos is not None and datos[0] == version:
+                return datos[1:]
+            grupos = list(GrupoArticulo.objects.filter(
+                estado=EstadoEntidades.ACTIVO
+            ).order_by('nombre_grupo', 'pk').values_list('grupo_id', 'nombre_grupo'))
+            lineas = {grupo_id: [] for grupo_id, _ in grupos}
+            for linea_id, nombre, grupo_id in LineaArticulo.objects.filter(
+                estado=EstadoEntidades.ACTIVO, grupo_id__in=lineas
+            ).order_by('nombre_linea', 'pk').values_list('linea_id', 'nombre_linea', 'grupo_id'):
+                lineas[grupo_id].append({'id': linea_id, 'nombre': nombre})
+
+            arbol = self._como_arbol(grupos, lineas)
+            etags = {rama['id']: _etag(rama) for rama in arbol}
+            etags[None] = _etag(arbol)
+            self._datos = (version, grupos, lineas, etags)
+            return grupos, lineas, etags
+
+    @staticmethod
+    def _como_arbol(grupos, lineas):
+        return [
+            {'id': grupo_id, 'nombre': nombre, 'lineas': lineas[grupo_id]}
+            for grupo_id, nombre in grupos
+        ]
+
+    def arbol(self):
+        """Lista de grupos, cada uno con su lista de líneas"""
+        grupos, lineas, _ = self._cargar()
+        return self._como_arbol(grupos, lineas)
+
+    def grupos(self):
+        """Lista de (grupo_id, nombre_grupo)"""
+        grupos, _, _ = self._cargar()
+        return list(grupos)
+
+    def rama(self, grupo_id):
+        """Grupo con sus líneas ({'id', 'nombre', 'lineas'}), o None si no existe o está inactivo"""
+        grupos, lineas, _ = self._cargar()
+        for grupo, nombre in grupos:
+            if grupo == grupo_id:
+                return {'id': grupo, 'nombre': nombre, 'lineas': list(lineas[grupo])}
+        return None
+
+    def lineas(self, grupo_id):
+        """Líneas del grupo como [{'id', 'nombre'}], o None si el grupo no existe o está inactivo"""
+        _, lineas, _ = self._cargar()
+        lineas = lineas.get(grupo_id)
+        return list(lineas) if lineas is not None else None
+
+    def etag(self, grupo_id=None):
+        """ETag del árbol completo o de la rama de un grupo (None si no existe)"""
+        _, _, etags = self._cargar()
+        return etags.get(grupo_id)
+
+    def invalidar(self):
+        """Descarta el árbol en este proceso y avisa a los demás"""
+        caches['articulos'].set(CLAVE_VERSION, time.time_ns(), timeout=None)
+        with self._lock:
+            self._datos = None
+
+
+taxonomia = Taxonomia()
+
+
+@receiver(post_save, sender=GrupoArticulo)
+@receiver(post_delete, sender=GrupoArticulo)
+@receiver(post_save, sender=LineaArticulo)
+@receiver(post_delete, sender=LineaArticulo)
+def _invalidar_taxonomia(sender, **kwargs):
+    # Ya, para que este mismo request vea el cambio, y de nuevo al confirmar:
+    # entre medio otro request podría haber recargado el árbol sin el cambio
+    taxonomia.invalidar()
+    transaction.on_commit(taxonomia.invalidar)
@@ -1,3 +1,1083 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import tempfile
+import uuid
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from pos_project.choices import EstadoEntidades, EstadoOrden, EstadoTarea
+from .models import (
+    Articulo, GrupoArticulo, LineaArticulo, ListaPrecio,
+    TipoIdentificacion, CanalCliente, Vendedor, Usuario, Cliente,
+    OrdenCompraCliente, ItemOrdenCompraCliente, ArticuloRelacionado, TokenCheckout, Tarea,
+    VentaSincronizada
+)
+from .secuencias import AsignadorNumeros, siguiente_nro_pedido
+from .checkout import nuevo_token, procesar_checkout, CheckoutDuplicado
+from .referencias import referencias
+from .cart import Cart
+from .cart_store import CLAVE_CARRITO_ID, CLAVE_CARRITO_SESION, codificar
+from .money import Dinero, sumar
+from .escaner import indice_codigos
+from .pagination import PaginadorCursor
+from . import cache_articulos, relacionados, documentos, search, sincronizacion, tareas
+from .forms import ArticuloForm
+from .taxonomia import taxonomia
+
+
+def pdf_temporal(prueba):
+    """DOCUMENTOS_PDF_ROOT en un directorio temporal durante la prueba"""
+    directorio = tempfile.TemporaryDirectory()
+    prueba.addCleanup(directorio.cleanup)
+    ajustes = override_settings(DOCUMENTOS_PDF_ROOT=directorio.name)
+    ajustes.enable()
+    prueba.addCleanup(ajustes.disable)
+
+
+class DatosBaseMixin:
+    """Crea el catálogo y el usuario mínimos para probar las vistas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='cajero', email='cajero@sistema.com', password='clave123', is_staff=True
+        )
+        TipoIdentificacion.objects.create(nombre_tipo_identificacion='DNI')
+        CanalCliente.objects.create(nombre_canal='Presencial')
+        Vendedor.objects.create(nombres='Vendedor', correo_electronico='vendedor@sistema.com')
+        cls.grupo = GrupoArticulo.objects.create(nombre_grupo='General')
+        cls.linea = LineaArticulo.objects.create(nombre_linea='General', grupo=cls.grupo)
+
+    @classmethod
+    def crear_articulos(cls, cantidad, stock=100, precio=Decimal('2.50')):
+        articulos = Articulo.objects.bulk_create([
+            Articulo(
+                codigo_articulo=f'ART-{numero:05d}',
+                descripcion=f'Artículo {numero}',
+                grupo=cls.grupo,
+                linea=cls.linea,
+                stock=stock,
+                estado=EstadoEntidades.ACTIVO
+            )
+            for numero in range(cantidad)
+        ])
+        ListaPrecio.objects.bulk_create([
+            ListaPrecio(articulo=articulo, precio_1=precio) for articulo in articulos
+        ])
+        return articulos
+
+    def carrito(self):
+        """Cart de la sesión del cliente de pruebas"""
+        request = RequestFactory().get('/')
+        request.session = self.client.session
+        return Cart(request)
+
+    def llenar_carrito(self, articulos, cantidad=1, precio=Decimal('2.50')):
+        cart = self.carrito()
+        cart.cart = {
+            str(articulo.articulo_id): {'cantidad': cantidad, 'centavos': Dinero.desde(precio).centavos}
+            for articulo in articulos
+        }
+        cart.save()
+        cart.almacen.session.save()
+
+    def confirmar_compra(self, token=None, **datos):
+        """POST del checkout con un token de idempotencia (uno nuevo si no se indica)"""
+        return self.client.post(reverse('checkout'), {'checkout_token': token or nuevo_token(), **datos})
+
+
+class CheckoutTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        caches['articulos'].clear()
+        self.client.force_login(self.usuario)
+
+    def test_checkout_mayorista_dentro_del_presupuesto(self):
+        # Reservar el primer bloque de números antes de medir (se amortiza entre órdenes)
+        siguiente_nro_pedido()
+        articulos = self.crear_articulos(200)
+        self.llenar_carrito(articulos, cantidad=3)
+
+        response = self.confirmar_compra(notas='Mayorista')
+
+        orden = OrdenCompraCliente.objects.get()
+        self.assertRedirects(response, reverse('order_detail', args=[orden.pedido_id]),
+                             fetch_redirect_response=False)
+        # 10 sentencias con el token de idempotencia y las tareas, más el SAVEPOINT/RELEASE de TestCase
+        self.assertLessEqual(int(response['X-Checkout-Queries']), 12)
+        self.assertEqual(orden.items_orden_compra.count(), 200)
+        self.assertEqual(orden.importe, Decimal('1500.00'))
+        self.assertFalse(Articulo.objects.exclude(stock=97).exists())
+
+    def test_checkout_sin_stock_no_crea_orden(self):
+        articulos = self.crear_articulos(3, stock=2)
+        self.llenar_carrito(articulos, cantidad=5)
+
+        response = self.confirmar_compra()
+
+        self.assertRedirects(response, reverse('cart_detail'), fetch_redirect_response=False)
+        self.assertFalse(OrdenCompraCliente.objects.exists())
+        self.assertFalse(Articulo.objects.exclude(stock=2).exists())
+
+    @override_settings(CHECKOUT_PERMITIR_PARCIAL=True)
+    def test_checkout_parcial_ajusta_lineas_al_stock(self):
+        con_stock, sin_stock = self.crear_articulos(2, stock=2)
+        Articulo.objects.filter(pk=sin_stock.pk).update(stock=0)
+        self.llenar_carrito([con_stock, sin_stock], cantidad=5)
+
+        self.confirmar_compra()
+
+        orden = OrdenCompraCliente.objects.get()
+        item = orden.items_orden_compra.get()
+        self.assertEqual((item.articulo_id, item.cantidad), (con_stock.pk, 2))
+        self.assertEqual(orden.importe, Decimal('5.00'))
+        self.assertEqual(Articulo.objects.get(pk=con_stock.pk).stock, 0)
+
+    def test_referencias_del_checkout_en_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cliente = referencias.cliente(self.usuario)
+
+        # En régimen estable el checkout no consulta cliente, tipo, canal ni vendedor
+        with self.assertNumQueries(0):
+            self.assertEqual(referencias.cliente(self.usuario), cliente)
+            self.assertEqual(referencias.vendedor().correo_electronico, 'vendedor@sistema.com')
+            referencias.tipo_identificacion(), referencias.canal()
+
+        cliente.nombres = 'Cliente Renombrado'
+        cliente.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(referencias.cliente(self.usuario).nombres, 'Cliente Renombrado')
+
+        otro = Vendedor.objects.create(nombres='Otro', correo_electronico='otro@sistema.com')
+        Vendedor.objects.exclude(pk=otro.pk).update(estado=EstadoEntidades.INACTIVO)
+        self.assertEqual(referencias.vendedor(), otro)
+
+    def test_envio_repetido_devuelve_la_orden_original(self):
+        articulo, = self.crear_articulos(1, stock=10)
+        self.llenar_carrito([articulo], cantidad=2)
+        token = nuevo_token()
+        self.confirmar_compra(token)
+        orden = OrdenCompraCliente.objects.get()
+
+        # El carrito quedó vacío, pero un reintento con otro carrito y el mismo token no crea nada
+        self.llenar_carrito([articulo], cantidad=2)
+        with self.assertNumQueries(3):  # sesión, usuario y el token
+            response = self.confirmar_compra(token)
+        self.assertRedirects(response, reverse('order_detail', args=[orden.pedido_id]),
+                             fetch_redirect_response=False)
+        self.assertEqual(OrdenCompraCliente.objects.count(), 1)
+        self.assertEqual(Articulo.objects.get(pk=articulo.pk).stock, 8)
+
+        # Envío concurrente: la restricción única detiene la transacción antes de reservar stock
+        with self.assertRaises(CheckoutDuplicado) as error:
+            procesar_checkout(self.carrito(), orden.cliente, orden.vendedor, self.usuario, token=token)
+        self.assertEqual(error.exception.pedido_id, orden.pedido_id)
+        self.assertEqual(Articulo.objects.get(pk=articulo.pk).stock, 8)
+
+        response = self.client.post(reverse('checkout'))
+        self.assertRedirects(response, reverse('checkout'), fetch_redirect_response=False)
+        self.assertEqual(OrdenCompraCliente.objects.count(), 1)
+
+        TokenCheckout.objects.update(fecha_creacion=timezone.now() - datetime.timedelta(days=2))
+        call_command('purge_checkout_tokens', lote=1, stdout=StringIO())
+        self.assertFalse(TokenCheckout.objects.exists())
+
+
+class SincronizacionTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def sincronizar(self, ventas):
+        return self.client.post(reverse('sync_sales'), {'ventas': ventas}, content_type='application/json')
+
+    def test_lote_de_ventas_se_carga_una_vez(self):
+        a, b = self.crear_articulos(2, stock=3)
+        Articulo.objects.filter(pk=b.pk).update(codigo_barras='7750000000048')
+        ventas = [
+            {'clave': 'caja1-0001', 'fecha': '2026-01-15T10:30:00',
+             'lineas': [{'articulo_id': str(a.pk), 'cantidad': 2, 'precio': '2.00'},
+                        {'codigo_barras': '7750000000048', 'cantidad': 1}]},
+            {'clave': 'caja1-0002', 'fecha': '2026-01-15T10:35:00',
+             'cliente': {'correo_electronico': 'nuevo@correo.com', 'nombres': 'Cliente Nuevo'},
+             'lineas': [{'articulo_id': str(a.pk), 'cantidad': 2}]},
+            {'clave': 'caja1-0002', 'fecha': '2026-01-15T10:35:00',
+             'lineas': [{'articulo_id': str(a.pk), 'cantidad': 2}]},
+            {'clave': 'caja1-0003', 'fecha': '2026-01-15T10:40:00', 'lineas': []},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            datos = self.sincronizar(ventas).json()
+        self.assertEqual([r['estado'] for r in datos['resultados']], ['creada', 'creada', 'duplicada', 'error'])
+        self.assertEqual(datos['resultados'][2]['pedido_id'], datos['resultados'][1]['pedido_id'])
+        # Las ventas ya ocurrieron: el stock puede quedar negativo y se informa
+        self.assertEqual(datos['stock_negativo'], [{'articulo_id': str(a.pk), 'descripcion': a.descripcion}])
+        self.assertEqual(Articulo.objects.get(pk=a.pk).stock, -1)
+
+        orden = OrdenCompraCliente.objects.get(pk=datos['resultados'][0]['pedido_id'])
+        self.assertEqual(orden.importe, Decimal('6.50'))
+        self.assertEqual(str(orden.fecha_pedido), '2026-01-15')
+        self.assertEqual(orden.estado, EstadoOrden.COMPLETADA)
+        self.assertEqual(
+            OrdenCompraCliente.objects.get(pk=datos['resultados'][1]['pedido_id']).cliente.nombres, 'Cliente Nuevo'
+        )
+
+        # Reenviar el lote completo no duplica órdenes ni stock
+        repetido = self.sincronizar(ventas).json()
+        self.assertEqual([r['estado'] for r in repetido['resultados']], ['duplicada', 'duplicada', 'duplicada', 'error'])
+        self.assertEqual(OrdenCompraCliente.objects.count(), 2)
+        self.assertEqual(Articulo.objects.get(pk=a.pk).stock, -1)
+        self.assertEqual(ArticuloRelacionado.objects.filter(articulo=a, relacionado=b).get().veces, 1)
+
+    def test_misma_clave_de_otro_usuario_no_es_duplicada(self):
+        (articulo,) = self.crear_articulos(1)
+        otro = Usuario.objects.create_user(username='cajero2', password='clave123', is_staff=True)
+        venta = {'clave': 'caja1-0001', 'fecha': '2026-01-15T10:30:00',
+                 'lineas': [{'articulo_id': str(articulo.pk), 'cantidad': 1}]}
+
+        primera = self.sincronizar([venta]).json()['resultados'][0]
+        self.client.force_login(otro)
+        segunda = self.sincronizar([venta]).json()['resultados'][0]
+
+        self.assertEqual((primera['estado'], segunda['estado']), ('creada', 'creada'))
+        self.assertNotEqual(primera['pedido_id'], segunda['pedido_id'])
+        self.assertEqual(
+            OrdenCompraCliente.objects.get(pk=segunda['pedido_id']).creado_por, otro
+        )
+        self.assertEqual(self.sincronizar([venta]).json()['resultados'][0]['pedido_id'], segunda['pedido_id'])
+
+    def test_envio_concurrente_se_reintenta_y_luego_informa_error(self):
+        (articulo,) = self.crear_articulos(1, stock=5)
+        ventas = [{'clave': f'caja1-{numero}', 'fecha': '2026-01-15T10:30:00',
+                   'lineas': [{'articulo_id': str(articulo.pk), 'cantidad': 1}]} for numero in range(2)]
+        insertar = VentaSincronizada.objects.bulk_create
+
+        # Otro envío confirma las mismas claves entre la lectura y el INSERT
+        choques = []
+        def chocar(claves, **kwargs):
+            if len(choques) < sincronizacion.INTENTOS_CARGA:
+                choques.append(1)
+                raise IntegrityError('UNIQUE constraint failed: ventas_sincronizadas')
+            return insertar(claves, **kwargs)
+
+        with mock.patch.object(VentaSincronizada.objects, 'bulk_create', side_effect=chocar):
+            datos = self.sincronizar(ventas).json()
+        self.assertEqual([r['estado'] for r in datos['resultados']], ['error', 'error'])
+        self.assertFalse(OrdenCompraCliente.objects.exists())
+        self.assertEqual(Articulo.objects.get(pk=articulo.pk).stock, 5)
+
+        # Con un solo choque el reintento carga el lote
+        choques.clear()
+        choques.extend([1] * (sincronizacion.INTENTOS_CARGA - 1))
+        with mock.patch.object(VentaSincronizada.objects, 'bulk_create', side_effect=chocar):
+            datos = self.sincronizar(ventas).json()
+        self.assertEqual([r['estado'] for r in datos['resultados']], ['creada', 'creada'])
+        self.assertEqual(Articulo.objects.get(pk=articulo.pk).stock, 3)
+
+
+class SecuenciaPedidoTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        caches['articulos'].clear()
+
+    def test_bloques_y_cambio_de_proceso(self):
+        asignador, otro = AsignadorNumeros('T1', 3), AsignadorNumeros('T1', 3)
+
+        self.assertEqual([asignador.siguiente() for _ in range(3)], [1, 2, 3])
+        # Otro proceso reserva el bloque siguiente: al agotar el suyo, este salta al próximo
+        self.assertEqual(otro.siguiente(), 4)
+        self.assertEqual(asignador.siguiente(), 7)
+        self.assertEqual(asignador.bloques_reservados, 2)
+
+        # Un proceso hijo no sigue con el bloque heredado del padre
+        with mock.patch('core.secuencias.os.getpid', return_value=-1):
+            self.assertEqual(asignador.siguiente(), 10)
+        self.assertEqual(asignador.bloques_reservados, 3)
+
+    def test_guardar_sin_numero_dentro_de_una_transaccion(self):
+        cliente = referencias.cliente(self.usuario)
+        orden = OrdenCompraCliente(cliente=cliente, vendedor=referencias.vendedor(), creado_por=self.usuario)
+        with self.assertRaises(transaction.TransactionManagementError):
+            orden.save()
+
+        orden.nro_pedido = siguiente_nro_pedido()
+        orden.save()
+        self.assertTrue(orden.nro_pedido.startswith('ORD-'))
+
+
+class CancelacionTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.cliente = referencias.cliente(self.usuario)
+
+    def crear_orden(self, articulos, cantidad=2):
+        carrito = [{'articulo': articulo, 'cantidad': cantidad, 'precio': Decimal('2.50')} for articulo in articulos]
+        return procesar_checkout(carrito, self.cliente, referencias.vendedor(), self.usuario)
+
+    def test_cancelar_repone_el_stock_con_consultas_fijas(self):
+        articulos = self.crear_articulos(150, stock=10)
+        orden = self.crear_orden(articulos)
+        self.crear_orden(articulos[:1])
+
+        # Sesión, usuario y orden; luego SELECT de la orden, resta de pares
+        # relacionados y borrado de los vacíos, UPDATE de la orden, suma por
+        # artículo y un UPDATE por lote de 100 artículos, más el SAVEPOINT/RELEASE
+        with self.assertNumQueries(12):
+            self.client.post(reverse('cancel_order', args=[orden.pedido_id]))
+
+        self.assertEqual(OrdenCompraCliente.objects.get(pk=orden.pk).estado, EstadoOrden.CANCELADA)
+        self.assertEqual(Articulo.objects.get(pk=articulos[0].pk).stock, 8)
+        self.assertFalse(Articulo.objects.exclude(pk=articulos[0].pk).exclude(stock=10).exists())
+
+        # Cancelar de nuevo no repone dos veces
+        self.client.post(reverse('cancel_order', args=[orden.pedido_id]))
+        self.assertEqual(Articulo.objects.get(pk=articulos[1].pk).stock, 10)
+
+    def test_cancelar_resta_compras_conjuntas(self):
+        a, b, c = self.crear_articulos(3, stock=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            orden = self.crear_orden([a, b, c])
+            self.crear_orden([a, b])
+        versiones = caches['articulos'].get_many([
+            cache_articulos._clave_version('relacionados', 'todos'), cache_articulos._clave_version('articulo', a.pk)
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel_order', args=[orden.pedido_id]))
+
+        incremental = set(ArticuloRelacionado.objects.values_list('articulo_id', 'relacionado_id', 'veces'))
+        self.assertEqual(incremental, {(a.pk, b.pk, 1), (b.pk, a.pk, 1)})
+        relacionados.reconstruir()
+        self.assertEqual(
+            set(ArticuloRelacionado.objects.values_list('articulo_id', 'relacionado_id', 'veces')), incremental
+        )
+        # Solo se invalidan los relacionados de los artículos de la orden
+        self.assertEqual(
+            caches['articulos'].get(cache_articulos._clave_version('relacionados', 'todos')),
+            versiones.get(cache_articulos._clave_version('relacionados', 'todos'))
+        )
+        self.assertNotEqual(
+            caches['articulos'].get(cache_articulos._clave_version('articulo', a.pk)),
+            versiones.get(cache_articulos._clave_version('articulo', a.pk))
+        )
+
+    def test_expirar_pendientes_antiguas(self):
+        a, b = self.crear_articulos(2, stock=10)
+        vieja, completada, reciente = self.crear_orden([a, b]), self.crear_orden([a]), self.crear_orden([b])
+        OrdenCompraCliente.objects.filter(pk=completada.pk).update(estado=EstadoOrden.COMPLETADA)
+        OrdenCompraCliente.objects.filter(pk__in=[vieja.pk, completada.pk]).update(
+            fecha_creacion=timezone.now() - datetime.timedelta(hours=100)
+        )
+
+        salida = StringIO()
+        call_command('expire_pending_orders', older_than=72, lote=1, stdout=salida)
+
+        self.assertIn('1 órdenes pendientes canceladas y 4 unidades repuestas', salida.getvalue())
+        estados = dict(OrdenCompraCliente.objects.values_list('pk', 'estado'))
+        self.assertEqual(estados, {
+            vieja.pk: EstadoOrden.CANCELADA, completada.pk: EstadoOrden.COMPLETADA, reciente.pk: EstadoOrden.PENDIENTE,
+        })
+        self.assertEqual(dict(Articulo.objects.values_list('pk', 'stock')), {a.pk: 8, b.pk: 8})
+
+
+class DocumentosOrdenTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        caches['articulos'].clear()
+        pdf_temporal(self)
+        self.client.force_login(self.usuario)
+
+    def crear_orden(self, articulos):
+        carrito = [{'articulo': articulo, 'cantidad': 1, 'precio': Decimal('2.50')} for articulo in articulos]
+        cliente = referencias.cliente(self.usuario)
+        return procesar_checkout(carrito, cliente, referencias.vendedor(), self.usuario)
+
+    def consultas(self, orden):
+        """Consultas del detalle, del PDF sin caché y de la carga para el correo"""
+        resultado = []
+        for url in ('order_detail', 'generate_pdf_order'):
+            with CaptureQueriesContext(connection) as capturadas:
+                response = self.client.get(reverse(url, args=[orden.pedido_id]))
+            self.assertEqual(response.status_code, 200)
+            resultado.append(len(capturadas))
+        with CaptureQueriesContext(connection) as capturadas:
+            correo = documentos.correo_confirmacion(documentos.cargar_orden(orden.pedido_id))
+        resultado.append(len(capturadas))
+        return resultado, correo
+
+    def test_documentos_con_consultas_fijas(self):
+        articulos = self.crear_articulos(200)
+        pequena, _ = self.consultas(self.crear_orden(articulos[:3]))
+        grande, correo = self.consultas(self.crear_orden(articulos))
+
+        # Sesión y usuario; la orden con cliente, tipo y vendedor; los items con sus artículos
+        self.assertEqual(pequena, [4, 4, 2])
+        self.assertEqual(grande, [4, 4, 2])
+        self.assertIn('Artículo 199', correo.alternatives[0][0])
+
+
+class TareasTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        caches['articulos'].clear()
+        pdf_temporal(self)
+        self.client.force_login(self.usuario)
+
+    def test_checkout_deja_correo_y_pdf_al_trabajador(self):
+        articulos = self.crear_articulos(2)
+        self.llenar_carrito(articulos)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.confirmar_compra()
+        orden = OrdenCompraCliente.objects.get()
+
+        # Nada se envía ni se renderiza en la request
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(Tarea.objects.values_list('tipo', flat=True)),
+            [documentos.TAREA_CORREO, documentos.TAREA_PDF]
+        )
+
+        call_command('run_worker', una_vez=True, stdout=StringIO())
+
+        self.assertFalse(Tarea.objects.exclude(estado=EstadoTarea.COMPLETADA).exists())
+        self.assertEqual(mail.outbox[0].subject, f'Confirmación de Orden #{orden.nro_pedido}')
+        self.assertEqual(mail.outbox[0].to, ['cajero@sistema.com'])
+        with open(os.path.join(settings.DOCUMENTOS_PDF_ROOT, documentos._ruta_pdf(orden)), 'rb') as archivo:
+            pdf = archivo.read()
+        # Un proceso web con su propia caché lo sirve sin renderizar
+        caches['articulos'].clear()
+        with mock.patch.object(documentos, 'pdf_orden', side_effect=AssertionError('renderizó de nuevo')):
+            response = self.client.get(reverse('generate_pdf_order', args=[orden.pedido_id]))
+        self.assertEqual(response.content, pdf)
+
+        # Al cambiar de estado se renderiza uno nuevo y se borra el anterior
+        OrdenCompraCliente.objects.filter(pk=orden.pk).update(estado=EstadoOrden.COMPLETADA)
+        self.assertNotEqual(self.client.get(reverse('generate_pdf_order', args=[orden.pedido_id])).content, pdf)
+        self.assertEqual(
+            os.listdir(os.path.join(settings.DOCUMENTOS_PDF_ROOT, str(orden.pedido_id))),
+            [f'{EstadoOrden.COMPLETADA}.pdf']
+        )
+        self.assertEqual(tareas.metricas()['completadas'], 2)
+
+    def test_tareas_se_confirman_y_revierten_con_la_orden(self):
+        articulos = self.crear_articulos(2)
+        carrito = [{'articulo': articulo, 'cantidad': 1, 'precio': Decimal('2.50')} for articulo in articulos]
+        cliente, vendedor = referencias.cliente(self.usuario), referencias.vendedor()
+
+        # Un fallo después de encolar revierte la orden y sus tareas
+        with mock.patch.object(ItemOrdenCompraCliente.objects, 'bulk_create', side_effect=DatabaseError('caída')):
+            with self.assertRaises(DatabaseError):
+                procesar_checkout(carrito, cliente, vendedor, self.usuario)
+        self.assertFalse(OrdenCompraCliente.objects.exists())
+        self.assertFalse(Tarea.objects.exists())
+
+        # Sin esperar a ningún callback posterior: las filas se escriben con la orden
+        orden = procesar_checkout(carrito, cliente, vendedor, self.usuario)
+        self.assertEqual(
+            sorted(Tarea.objects.values_list('tipo', 'argumentos__pedido_id')),
+            [(documentos.TAREA_CORREO, str(orden.pedido_id)), (documentos.TAREA_PDF, str(orden.pedido_id))]
+        )
+
+    @override_settings(TAREAS_MAX_INTENTOS=2)
+    def test_reintento_con_espera_y_cola_de_fallidas(self):
+        @tareas.tarea('pruebas.falla')
+        def falla():
+            raise ConnectionError('SMTP no disponible')
+        self.addCleanup(tareas._registro.pop, 'pruebas.falla')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tareas.encolar('pruebas.falla')
+        self.assertEqual(tareas.procesar_pendientes(), {'completadas': 0, 'fallidas': 1})
+        registro = Tarea.objects.get()
+        self.assertEqual((registro.estado, registro.intentos), (EstadoTarea.PENDIENTE, 1))
+        self.assertGreater(registro.disponible_desde, timezone.now())
+        self.assertIn('SMTP no disponible', registro.ultimo_error)
+
+        # Cumplida la espera, el último intento la deja en la cola de fallidas
+        Tarea.objects.update(disponible_desde=timezone.now())
+        tareas.procesar_pendientes()
+        self.assertEqual(Tarea.objects.get().estado, EstadoTarea.FALLIDA)
+
+        call_command('queue_status', reencolar_fallidas=True, stdout=StringIO())
+        registro = Tarea.objects.get()
+        self.assertEqual((registro.estado, registro.intentos), (EstadoTarea.PENDIENTE, 0))
+
+    def test_tarea_sin_terminar_se_retoma_al_vencer_la_visibilidad(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tareas.encolar(documentos.TAREA_PDF, pedido_id=str(uuid.uuid4()))
+        primero, = tareas.reclamar(10)
+        self.assertEqual(tareas.reclamar(10), [])
+
+        # El primer trabajador no terminó a tiempo: otro la retoma
+        Tarea.objects.update(disponible_desde=timezone.now())
+        segundo, = tareas.reclamar(10)
+        self.assertEqual(segundo.intentos, 2)
+
+        # El resultado tardío del primero no pisa al segundo
+        tareas.ejecutar(primero)
+        self.assertEqual(Tarea.objects.get().estado, EstadoTarea.EN_PROCESO)
+        tareas.ejecutar(segundo)
+        self.assertEqual(Tarea.objects.get().estado, EstadoTarea.COMPLETADA)
+
+
+class CarritoAlmacenTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_api_del_carrito_en_cada_almacen(self):
+        a, b = self.crear_articulos(2)
+        a, b = Articulo.objects.con_precio().get(pk=a.pk), Articulo.objects.con_precio().get(pk=b.pk)
+        for almacen in ('bd', 'cache', 'sesion'):
+            with self.subTest(almacen=almacen), override_settings(CART_BACKEND=almacen):
+                cart = self.carrito()
+                cart.add(a, cantidad=2)
+                cart.add(b)
+                cart.almacen.session.save()
+                cart = self.carrito()
+                cart.remove(b)
+                cart.almacen.session.save()
+
+                cart = self.carrito()
+                self.assertEqual(len(cart), 2)
+                self.assertEqual(cart.get_total_price(), Dinero(500))
+                self.assertEqual([item['descripcion'] for item in cart], [a.descripcion])
+
+                cart.clear()
+                cart.almacen.session.save()
+                self.assertEqual(len(self.carrito()), 0)
+
+    def test_carga_masiva_en_una_request(self):
+        articulos = self.crear_articulos(30, stock=5)
+        Articulo.objects.filter(pk=articulos[0].pk).update(codigo_barras='7750000000031')
+        lineas = [{'articulo_id': str(articulo.pk), 'cantidad': 2} for articulo in articulos[1:]]
+        lineas += [
+            {'codigo_barras': '7750000000031', 'cantidad': 1},
+            {'articulo_id': str(articulos[1].pk), 'cantidad': 4},  # 2 + 4 supera el stock
+            {'codigo_barras': '0000000000000'},
+            {'cantidad': 1},
+        ]
+
+        # Sesión, usuario, artículos, precios, un UPSERT para todas las líneas
+        # y la escritura de la sesión con el id del carrito nuevo
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                reverse('cart_bulk_add'), {'lineas': lineas}, content_type='application/json'
+            )
+        datos = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([error['indice'] for error in datos['errores']], [0, 30, 31, 32])
+        self.assertEqual(datos['total_items'], 29)
+        self.assertEqual(datos['cantidad_total'], 28 * 2 + 1)
+        self.assertEqual(datos['total'], 57 * 2.5)
+        self.assertEqual(len(self.carrito()), 57)
+
+    @override_settings(CART_BACKEND='sesion')
+    def test_agregados_se_calculan_una_vez_por_request(self):
+        a, b = Articulo.objects.con_precio().filter(pk__in=[x.pk for x in self.crear_articulos(2)])
+        cart = self.carrito()
+        cart.add(a, cantidad=2)
+
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                self.assertEqual(len(cart), 2)
+                self.assertEqual(cart.get_total_price(), Dinero(500))
+                self.assertEqual([item['cantidad'] for item in cart], [2])
+
+        cart.add(b)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(cart), 3)
+            self.assertEqual(cart.get_total_price(), Dinero(750))
+            self.assertEqual(len(list(cart)), 2)
+
+    @override_settings(CART_BACKEND='sesion')
+    def test_carrito_del_formato_anterior_se_migra_al_leerlo(self):
+        articulo, = self.crear_articulos(1)
+        session = self.client.session
+        session[CLAVE_CARRITO_SESION] = {str(articulo.pk): {
+            'cantidad': 3, 'precio': 2.5, 'descripcion': 'Texto viejo',
+            'codigo': articulo.codigo_articulo, 'stock_disponible': 1,
+        }}
+        session.save()
+
+        cart = self.carrito()
+        items = list(cart)
+        self.assertEqual(cart.get_total_price(), Dinero(750))
+        # Descripción y stock salen del catálogo, no de la sesión
+        self.assertEqual(items[0]['descripcion'], articulo.descripcion)
+        self.assertEqual(items[0]['stock_disponible'], articulo.stock)
+
+        cart.save()
+        self.assertEqual(cart.almacen.session[CLAVE_CARRITO_SESION], codificar(cart.cart))
+        # Iterar no escribe objetos ni Decimal en las líneas guardadas
+        self.assertEqual(cart.cart, {str(articulo.pk): {'cantidad': 3, 'centavos': 250}})
+
+    def test_carrito_en_la_sesion_se_importa_en_bd_y_cache(self):
+        articulo, = self.crear_articulos(1)
+        for almacen in ('bd', 'cache'):
+            with self.subTest(almacen=almacen), override_settings(CART_BACKEND=almacen):
+                session = self.client.session
+                session.pop(CLAVE_CARRITO_ID, None)
+                session[CLAVE_CARRITO_SESION] = {
+                    str(articulo.pk): {'cantidad': 3, 'precio': 2.5, 'descripcion': 'Texto viejo'},
+                    str(uuid.uuid4()): {'cantidad': 1, 'precio': 1.0},
+                }
+                session.save()
+
+                cart = self.carrito()
+                self.assertEqual(cart.cart, {str(articulo.pk): {'cantidad': 3, 'centavos': 250}})
+                self.assertNotIn(CLAVE_CARRITO_SESION, cart.almacen.session)
+                cart.almacen.session.save()
+                # Ya guardado en el almacén: la siguiente request lo lee de ahí
+                self.assertEqual(self.carrito().cart, cart.cart)
+
+    def test_formato_compacto_reduce_el_tamano_por_linea(self):
+        articulos = self.crear_articulos(30)
+        anterior = {
+            str(articulo.pk): {
+                'cantidad': 2, 'precio': 2.5, 'descripcion': articulo.descripcion,
+                'codigo': articulo.codigo_articulo, 'stock_disponible': articulo.stock,
+            }
+            for articulo in articulos
+        }
+        compacto = codificar({
+            str(articulo.pk): {'cantidad': 2, 'centavos': 250} for articulo in articulos
+        })
+        self.assertLess(len(json.dumps(compacto)) * 4, len(json.dumps(anterior)))
+
+
+class DineroTests(TestCase):
+
+    def test_aritmetica_exacta_en_centavos(self):
+        self.assertEqual(Dinero.desde(0.1) * 3, Dinero.desde('0.30'))
+        self.assertEqual(Dinero.desde(Decimal('2.345')), Dinero(235))
+        self.assertEqual(Dinero.desde(None), Dinero(0))
+        self.assertEqual(sum([Dinero(150), Dinero(250)]), Dinero(400))
+        self.assertEqual(sumar(Dinero.desde(0.01) for _ in range(1000)), Dinero.desde(10))
+        self.assertEqual(str(Dinero(-5)), '-0.05')
+        self.assertEqual(Dinero(1234).a_decimal(), Decimal('12.34'))
+        with self.assertRaises(TypeError):
+            Dinero(Decimal('1.00'))
+
+
+class BusquedaTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def buscar(self, texto):
+        response = self.client.get(reverse('articulos_list'), {'q': texto})
+        return [articulo.codigo_articulo for articulo in response.context['articulos']]
+
+    def test_busqueda_ordena_por_relevancia_y_admite_prefijos(self):
+        Articulo.objects.create(
+            codigo_articulo='CAF-001', descripcion='Café molido', grupo=self.grupo, linea=self.linea
+        )
+        Articulo.objects.create(
+            codigo_articulo='AZU-001', descripcion='Azúcar rubia para cafe', grupo=self.grupo, linea=self.linea
+        )
+
+        self.assertEqual(self.buscar('cafe'), ['CAF-001', 'AZU-001'])
+        self.assertEqual(self.buscar('azu-0'), ['AZU-001'])
+        self.assertEqual(self.buscar('moli'), ['CAF-001'])
+
+    def test_prefijo_like_escapa_comodines(self):
+        self.assertEqual(search._prefijo_like('ART_0'), 'ART\\_0%')
+        self.assertEqual(search._prefijo_like('50%\\x'), '50\\%\\\\x%')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 'ART_01' LIKE %s ESCAPE '\\', 'ARTX01' LIKE %s ESCAPE '\\'",
+                [search._prefijo_like('ART_0')] * 2
+            )
+            self.assertEqual(tuple(cursor.fetchone()), (1, 0))
+
+    def test_indice_se_actualiza_al_modificar_articulos(self):
+        articulo = Articulo.objects.create(
+            codigo_articulo='LEC-001', descripcion='Leche entera', grupo=self.grupo, linea=self.linea
+        )
+        articulo.descripcion = 'Yogurt natural'
+        articulo.save()
+        self.assertEqual(self.buscar('leche'), [])
+        self.assertEqual(self.buscar('yogurt'), ['LEC-001'])
+
+        articulo.estado = EstadoEntidades.INACTIVO
+        articulo.save()
+        self.assertEqual(self.buscar('yogurt'), [])
+
+
+class EscaneoTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.articulo = Articulo.objects.create(
+            codigo_articulo='GAS-001', codigo_barras='7750000000017', descripcion='Gaseosa 500ml',
+            grupo=self.grupo, linea=self.linea, stock=5
+        )
+        self.precio = ListaPrecio.objects.create(articulo=self.articulo, precio_1=Decimal('2.50'))
+        indice_codigos.cargar()
+
+    def escanear(self, codigo, cantidad=1):
+        return self.client.post(
+            reverse('scan_add'), {'codigo_barras': codigo, 'cantidad': cantidad}, content_type='application/json'
+        )
+
+    def test_escaneo_agrega_al_carrito_sin_redireccion(self):
+        self.escanear('7750000000017')
+        response = self.escanear('7750000000017', cantidad=2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cantidad'], 3)
+        self.assertEqual(response.json()['total'], 7.5)
+        self.assertEqual(self.carrito().cart[str(self.articulo.pk)]['cantidad'], 3)
+        self.assertEqual(self.escanear('0000000000000').status_code, 404)
+
+    def test_indice_se_actualiza_al_guardar_precio_y_articulo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.precio.precio_1 = Decimal('3.00')
+            self.precio.save()
+            self.articulo.codigo_barras = '7750000000024'
+            self.articulo.save()
+
+        self.assertEqual(self.escanear('7750000000017').status_code, 404)
+        self.assertEqual(self.escanear('7750000000024').json()['precio'], 3.0)
+
+    def test_sincronizar_recoge_cambios_confirmados_tarde(self):
+        # Una transacción marcó la fila antes de la última sincronización
+        # pero se confirmó después: la siguiente la recoge igual
+        marcada = timezone.now()
+        indice_codigos.sincronizar()
+        Articulo.objects.filter(pk=self.articulo.pk).update(stock=1, fecha_modificacion=marcada)
+
+        indice_codigos.sincronizar()
+        self.assertEqual(indice_codigos.buscar('7750000000017').stock, 1)
+
+
+class PaginacionTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        cache.clear()
+
+    def pagina(self, **parametros):
+        return self.client.get(reverse('articulos_list'), parametros).context['articulos']
+
+    def test_cursor_recorre_todo_sin_repetir_en_ambos_sentidos(self):
+        articulos = self.crear_articulos(30)
+        # Fechas repetidas: el desempate por pk debe mantener el orden estable
+        Articulo.objects.filter(pk__in=[a.pk for a in articulos[:20]]).update(
+            fecha_creacion=articulos[0].fecha_creacion
+        )
+
+        pagina, vistos = self.pagina(), []
+        while True:
+            vistos.extend(articulo.pk for articulo in pagina)
+            if not pagina.has_next():
+                break
+            pagina = self.pagina(despues=pagina.cursor_siguiente)
+        self.assertEqual(len(vistos), 30)
+        self.assertEqual(set(vistos), {a.pk for a in articulos})
+        self.assertEqual(pagina.total, 30)
+
+        pagina, hacia_atras = self.pagina(ultima=1), []
+        while True:
+            hacia_atras[:0] = [articulo.pk for articulo in pagina]
+            if not pagina.has_previous():
+                break
+            pagina = self.pagina(antes=pagina.cursor_anterior)
+        self.assertEqual(hacia_atras, vistos)
+
+    def test_pagina_profunda_usa_una_consulta_con_limite(self):
+        self.crear_articulos(30)
+        paginador = PaginadorCursor(Articulo.objects.all(), 12)
+        cursor = paginador.get_page(despues=paginador.get_page().cursor_siguiente).cursor_siguiente
+
+        # El conteo ya está en caché: la página profunda es una sola consulta con LIMIT
+        with self.assertNumQueries(1):
+            pagina = paginador.get_page(despues=cursor)
+        self.assertEqual(len(pagina), 6)
+
+
+class ListadoOrdenesTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.cliente = referencias.cliente(self.usuario)
+        self.otro = Usuario.objects.create_user(username='otro', email='otro@correo.com', password='clave123')
+
+    def crear_ordenes(self, cantidad, cliente):
+        OrdenCompraCliente.objects.bulk_create([
+            OrdenCompraCliente(nro_pedido=uuid.uuid4().hex, cliente=cliente,
+                               vendedor=referencias.vendedor(), creado_por=self.usuario)
+            for _ in range(cantidad)
+        ])
+
+    def consultas_de_pagina(self, usuario):
+        self.client.force_login(usuario)
+        self.client.get(reverse('order_list'))  # conteo en caché
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('order_list'))
+        return len(consultas), response
+
+    def test_pagina_con_consultas_constantes(self):
+        self.crear_ordenes(2, self.cliente)
+        pocas, _ = self.consultas_de_pagina(self.usuario)
+        self.crear_ordenes(20, self.cliente)
+        cache.clear()
+        muchas, response = self.consultas_de_pagina(self.usuario)
+
+        # Sesión, usuario y la página con el cliente en el JOIN
+        self.assertEqual((pocas, muchas), (3, 3))
+        self.assertEqual(len(response.context['ordenes']), 10)
+        self.assertContains(response, f'<td>{self.cliente.nombres}</td>', count=10)
+
+    def test_cliente_solo_ve_sus_ordenes(self):
+        self.crear_ordenes(3, self.cliente)
+        cliente_otro = Cliente.objects.create(
+            nombres='Otro Cliente', correo_electronico='otro@correo.com', nro_documento='1',
+            tipo_identificacion=referencias.tipo_identificacion(), canal=referencias.canal()
+        )
+        self.crear_ordenes(2, cliente_otro)
+
+        # Sesión, usuario, ids de sus clientes y la página
+        consultas, response = self.consultas_de_pagina(self.otro)
+        self.assertEqual(consultas, 4)
+        self.assertEqual({orden.cliente_id for orden in response.context['ordenes']}, {cliente_otro.pk})
+        self.assertEqual(len(response.context['ordenes']), 2)
+
+
+class PrecioVigenteTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        caches['articulos'].clear()
+        self.client.force_login(self.usuario)
+
+    def test_con_precio_carga_precios_de_una_pagina_en_una_consulta(self):
+        self.crear_articulos(20)
+
+        with self.assertNumQueries(2):
+            precios = [articulo.listaprecio.precio_1 for articulo in Articulo.objects.con_precio()]
+        self.assertEqual(precios, [Decimal('2.50')] * 20)
+
+    def test_listaprecio_se_consulta_una_sola_vez(self):
+        articulo = self.crear_articulos(1)[0]
+        articulo = Articulo.objects.get(pk=articulo.pk)
+
+        with self.assertNumQueries(1):
+            articulo.listaprecio
+            articulo.listaprecio
+
+    def test_consultas_por_vista(self):
+        articulo = self.crear_articulos(1)[0]
+
+        # Sesión, usuario, artículo, precios, compras conjuntas y relleno por
+        # línea (caché vacía, artículo sin ventas)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('articulo_detail', args=[articulo.pk]))
+        self.assertEqual(response.context['articulo'].listaprecio.precio_1, Decimal('2.50'))
+
+        # Sesión, usuario, artículo, precios, alta de la línea y guardado de
+        # la sesión con el id del carrito nuevo (savepoint + UPDATE)
+        with self.assertNumQueries(8):
+            self.client.post(reverse('cart_add', args=[articulo.pk]), {'cantidad': 1})
+
+        # Con el carrito ya creado la sesión no se reescribe: sesión, usuario,
+        # artículo, precios, líneas del carrito y UPSERT de la línea
+        with self.assertNumQueries(6):
+            self.client.post(reverse('cart_add', args=[articulo.pk]), {'cantidad': 1})
+        self.assertEqual(self.carrito().cart[str(articulo.pk)]['cantidad'], 2)
+
+
+class CacheArticulosTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        caches['articulos'].clear()
+        cache_articulos.estadisticas.reiniciar()
+        self.client.force_login(self.usuario)
+
+    def test_ficha_cacheada_no_consulta_el_catalogo(self):
+        articulo, relacionado = self.crear_articulos(2)
+        url = reverse('articulo_detail', args=[articulo.pk])
+        self.client.get(url)
+
+        # Solo sesión y usuario
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.context['articulo'].listaprecio.precio_1, Decimal('2.50'))
+        self.assertEqual([a.pk for a in response.context['productos_relacionados']], [relacionado.pk])
+        self.assertEqual(cache_articulos.estadisticas.como_dict()['aciertos'], 3)
+
+    def test_guardar_precio_invalida_la_version(self):
+        articulo = self.crear_articulos(1)[0]
+        self.assertEqual(cache_articulos.obtener_articulo(articulo.pk).listaprecio.precio_1, Decimal('2.50'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            precio = ListaPrecio.objects.get(articulo=articulo)
+            precio.precio_1 = Decimal('3.00')
+            precio.save()
+
+        self.assertEqual(cache_articulos.obtener_articulo(articulo.pk).listaprecio.precio_1, Decimal('3.00'))
+        self.assertEqual(cache_articulos.estadisticas.como_dict()['fallos'], 2)
+
+
+class RelacionadosTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        caches['articulos'].clear()
+        self.client.force_login(self.usuario)
+
+    def comprar(self, articulos):
+        self.llenar_carrito(articulos)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.confirmar_compra()
+
+    def test_checkout_suma_compras_conjuntas_y_reconstruir_coincide(self):
+        a, b, c, d = self.crear_articulos(4)
+        self.comprar([a, b, c])
+        self.comprar([a, c])
+
+        pares = dict(ArticuloRelacionado.objects.filter(articulo=a).values_list('relacionado_id', 'veces'))
+        self.assertEqual(pares, {c.pk: 2, b.pk: 1})
+        self.assertEqual(relacionados.relacionados_ids(a, 3), [c.pk, b.pk, d.pk])
+
+        incremental = set(ArticuloRelacionado.objects.values_list('articulo_id', 'relacionado_id', 'veces'))
+        call_command('rebuild_related', lote=1, stdout=StringIO())
+        self.assertEqual(
+            set(ArticuloRelacionado.objects.values_list('articulo_id', 'relacionado_id', 'veces')), incremental
+        )
+
+    def test_ficha_muestra_relacionados_por_compra(self):
+        articulos = self.crear_articulos(6)
+        self.comprar([articulos[0], articulos[5]])
+
+        response = self.client.get(reverse('articulo_detail', args=[articulos[0].pk]))
+        self.assertEqual(
+            [producto.pk for producto in response.context['productos_relacionados']],
+            [articulos[5].pk] + [articulo.pk for articulo in sorted(articulos[1:5], key=lambda a: a.pk)][:3]
+        )
+
+
+class TaxonomiaTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        taxonomia.invalidar()
+        self.client.force_login(self.usuario)
+
+    def test_arbol_con_etag_y_304(self):
+        url = reverse('taxonomia')
+        response = self.client.get(url)
+        self.assertEqual(response.json(), [{
+            'id': self.grupo.pk, 'nombre': 'General',
+            'lineas': [{'id': self.linea.pk, 'nombre': 'General'}],
+        }])
+
+        # Árbol ya cargado: solo sesión y usuario
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        LineaArticulo.objects.create(nombre_linea='Bebidas', grupo=self.grupo)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()[0]['lineas']), 2)
+        self.assertEqual(
+            self.client.get(reverse('lineas_por_grupo', args=[self.grupo.pk])).json()[0]['nombre'],
+            'Bebidas'
+        )
+
+    def test_formulario_toma_opciones_del_arbol(self):
+        taxonomia.arbol()
+
+        with self.assertNumQueries(0):
+            form = ArticuloForm(data={'grupo': str(self.grupo.pk)})
+            grupos = list(form.fields['grupo'].choices)
+            lineas = list(form.fields['linea'].choices)
+        self.assertEqual(grupos, [('', '---------'), (self.grupo.pk, 'General')])
+        self.assertEqual(lineas, [('', '---------'), (self.linea.pk, 'General')])
+
+
+class PlanesConsultaTests(TestCase):
+
+    def test_vistas_principales_sin_recorridos_secuenciales(self):
+        salida = StringIO()
+        call_command('explain_hot_queries', articulos=200, ordenes=50, estricto=True, stdout=salida)
+        self.assertIn('Ninguna consulta recorre tablas grandes sin índice', salida.getvalue())
+
+
+class ImportarCatalogoTests(DatosBaseMixin, TestCase):
+
+    def importar(self, contenido, extension='csv', **opciones):
+        with tempfile.NamedTemporaryFile('w', suffix=f'.{extension}', delete=False, encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        self.addCleanup(os.remove, archivo.name)
+        salida = StringIO()
+        call_command('import_catalog', archivo.name, stdout=salida, stderr=StringIO(), **opciones)
+        return salida.getvalue()
+
+    def test_upsert_por_codigo_con_precio_y_rechazos(self):
+        csv_catalogo = (
+            'codigo_articulo,descripcion,grupo,linea,stock,precio_1\n'
+            'IMP-1,Leche,General,General,10,4.50\n'
+            'IMP-2,Yogurt,General,Inexistente,5,3.20\n'
+            'IMP-3,Queso,General,General,2,abc\n'
+        )
+        salida = self.importar(csv_catalogo)
+        self.assertIn('Filas rechazadas: 2', salida)
+
+        self.importar(csv_catalogo.replace('Leche,General,General,10,4.50', 'Leche entera,General,General,12,4.90'))
+        articulo = Articulo.objects.con_precio().get(codigo_articulo='IMP-1')
+        self.assertEqual((articulo.descripcion, articulo.stock), ('Leche entera', 12))
+        self.assertEqual(articulo.listaprecio.precio_1, Decimal('4.90'))
+        self.assertEqual(ListaPrecio.objects.filter(articulo=articulo).count(), 1)
+
+    def test_jsonl_en_simulacion_no_guarda_nada(self):
+        salida = self.importar(
+            '{"codigo_articulo": "IMP-9", "descripcion": "Arroz", "grupo": "Abarrotes", "linea": "Granos"}\n',
+            extension='jsonl', dry_run=True, crear_taxonomia=True
+        )
+        self.assertIn('Artículos nuevos: 1', salida)
+        self.assertFalse(Articulo.objects.filter(codigo_articulo='IMP-9').exists())
+        self.assertFalse(GrupoArticulo.objects.filter(nombre_grupo='Abarrotes').exists())
+
+
+class ExportacionTests(DatosBaseMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_exportacion_csv_en_streaming_con_filtro_y_reanudacion(self):
+        articulos = sorted(self.crear_articulos(5), key=lambda articulo: articulo.pk)
+        Articulo.objects.filter(pk=articulos[0].pk).update(estado=EstadoEntidades.INACTIVO)
+
+        response = self.client.get(reverse('export_data', args=['articulos']), {'estado': EstadoEntidades.ACTIVO})
+        self.assertTrue(response.streaming)
+        lineas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lineas[0].split(',')[:2], ['id', 'codigo_articulo'])
+        self.assertEqual(len(lineas), 5)
+
+        response = self.client.get(
+            reverse('export_data', args=['articulos']), {'despues': str(articulos[2].pk), 'formato': 'jsonl'}
+        )
+        filas = [json.loads(linea) for linea in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([fila['id'] for fila in filas], [str(articulo.pk) for articulo in articulos[3:]])
+
+    def test_parametros_invalidos_y_comando(self):
+        response = self.client.get(reverse('export_data', args=['articulos']), {'desde': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+
+        self.crear_articulos(3)
+        salida = StringIO()
+        call_command('export_data', 'lista_precios', formato='jsonl', stdout=salida, stderr=StringIO())
+        self.assertEqual(len(salida.getvalue().splitlines()), 3)
@@ -38,4 +38,11 @@ urlpatterns = [
     
     # API
     path('api/lineas-por-grupo/<int:grupo_id>/', views.lineas_por_grupo, name='lineas_por_grupo'),
+    path('api/taxonomia/', views.taxonomia_api, name='taxonomia'),
+    path('api/taxonomia/<int:grupo_id>/', views.taxonomia_api, name='taxonomia_grupo'),
+    path('api/escanear/', views.scan_add, name='scan_add'),
+    path('api/carrito/lineas/', views.cart_bulk_add, name='cart_bulk_add'),
+    path('api/sincronizar/ventas/', views.sync_sales, name='sync_sales'),
+    path('api/exportar/<str:nombre>/', views.export_data, name='export_data'),
+    path('api/cache/estadisticas/', views.cache_stats, name='cache_stats'),
 ]
\ No newline at end of file
@@ -3,37 +3,40 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.views.decorators.http import require_POST
-from django.http import JsonResponse, HttpResponse
-from django.core.paginator import Paginator
+from django.views.decorators.http import require_POST, condition
+from django.utils.cache import patch_cache_control
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
 from django.db.models import Q
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.conf import settings
 from django.utils import timezone
 import datetime
 from decimal import Decimal
+import json
 import uuid
 
-# Para PDFs
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from io import BytesIO
-
 # Importar modelos
 from .models import (
     Articulo, GrupoArticulo, LineaArticulo, ListaPrecio,
-    Cliente, Vendedor, OrdenCompraCliente, ItemOrdenCompraCliente,
-    TipoIdentificacion, CanalCliente, Usuario
+    Cliente, OrdenCompraCliente, Usuario
 )
 from pos_project.choices import EstadoOrden, EstadoEntidades
 from .cart import Cart
+from .money import Dinero
+from .checkout import (
+    procesar_checkout, StockInsuficiente, CheckoutDuplicado, nuevo_token, pedido_del_token
+)
+from .sincronizacion import sincronizar_ventas
+from .search import get_buscador
+from .escaner import indice_codigos
+from .pagination import paginar
+from .exports import filas_exportacion, serializar
+from . import cache_articulos
+from .taxonomia import taxonomia
+from .referencias import referencias
+from .cancelacion import cancelar_ordenes
+from . import documentos
 from .forms import ArticuloForm, ListaPrecioForm
 
 # ========================================
@@ -85,33 +88,29 @@ def articulos_list(request):
             estado=EstadoEntidades.ACTIVO
         ).select_related('grupo', 'linea').order_by('-fecha_creacion')
         
-        # Búsqueda
-        search_query = request.GET.get('q')
-        if search_query:
-            articulos_list = articulos_list.filter(
-                Q(descripcion__icontains=search_query) |
-                Q(codigo_articulo__icontains=search_query) |
-                Q(codigo_barras__icontains=search_query)
-            )
-        
         # Filtro por stock bajo
         stock_filter = request.GET.get('stock')
         if stock_filter == 'bajo':
             articulos_list = articulos_list.filter(stock__lt=10)
         
-        # Paginación
-        paginator = Paginator(articulos_list, 12)
-        page_number = request.GET.get('page')
-        articulos = paginator.get_page(page_number)
+        # Búsqueda: resultados ordenados por relevancia (ver core/search.py)
+        search_query = request.GET.get('q')
+        if search_query:
+            articulos_list = get_buscador().filtrar(articulos_list, search_query)
+        
+        # Paginación por cursor (ver core/pagination.py)
+        articulos, parametros_url = paginar(request, articulos_list, 12)
         
     except Exception as e:
         messages.error(request, f'Error cargando artículos: {str(e)}')
         articulos = []
         search_query = ''
+        parametros_url = ''
     
     context = {
         'articulos': articulos,
         'search_query': search_query,
+        'parametros_url': parametros_url,
     }
     
     return render(request, 'core/articulos/list.html', context)
@@ -121,19 +120,13 @@ def articulo_detail(request, articulo_id):
     """Vista para ver detalle de un artículo"""
     
     try:
-        articulo = get_object_or_404(
-            Articulo.objects.select_related('grupo', 'linea'),
-            articulo_id=articulo_id, 
-            estado=EstadoEntidades.ACTIVO
-        )
+        # Artículo, precio y relacionados salen de la caché versionada
+        articulo = cache_articulos.obtener_articulo(articulo_id)
+        if articulo is None:
+            raise Http404('Artículo no encontrado')
         
-        # Productos relacionados (misma línea) - manejo seguro
-        productos_relacionados = []
-        if hasattr(articulo, 'linea') and articulo.linea:
-            productos_relacionados = Articulo.objects.filter(
-                linea=articulo.linea,
-                estado=EstadoEntidades.ACTIVO
-            ).exclude(articulo_id=articulo_id).select_related('grupo', 'linea')[:4]
+        # Productos relacionados (misma línea)
+        productos_relacionados = cache_articulos.obtener_relacionados(articulo)
         
     except Exception as e:
         messages.error(request, f'Error cargando artículo: {str(e)}')
@@ -208,8 +201,8 @@ def articulo_create(request):
                 # Crear precio
                 ListaPrecio.objects.create(
                     articulo=articulo,
-                    precio_1=float(precio_1) if precio_1 else 0,
-                    precio_2=float(precio_2) if precio_2 else None,
+                    precio_1=Dinero.desde(precio_1).a_decimal(),
+                    precio_2=Dinero.desde(precio_2).a_decimal() if precio_2 else None,
                     estado=EstadoEntidades.ACTIVO
                 )
                 
@@ -223,9 +216,7 @@ def articulo_create(request):
     # GET request - Renderizar formulario SIN OBJETOS PROBLEMÁTICOS
     try:
         # Obtener grupos activos
-        grupos = list(GrupoArticulo.objects.filter(estado=EstadoEntidades.ACTIVO).values(
-            'grupo_id', 'nombre_grupo'
-        ))
+        grupos = taxonomia.grupos()
         
         # Si no hay grupos, crear uno por defecto
         if not grupos:
@@ -238,11 +229,11 @@ def articulo_create(request):
                 grupo=grupo,
                 estado=EstadoEntidades.ACTIVO
             )
-            grupos = list(GrupoArticulo.objects.filter(estado=EstadoEntidades.ACTIVO).values(
-                'grupo_id', 'nombre_grupo'
-            ))
+            grupos = taxonomia.grupos()
             messages.info(request, 'Se creó un grupo "General" por defecto.')
         
+        grupos = [{'grupo_id': grupo_id, 'nombre_grupo': nombre} for grupo_id, nombre in grupos]
+        
     except Exception as e:
         messages.error(request, f'Error cargando grupos: {str(e)}')
         grupos = []
@@ -264,14 +255,14 @@ def articulo_edit(request, articulo_id):
     
     try:
         articulo = get_object_or_404(
-            Articulo.objects.select_related('grupo', 'linea'),
+            Articulo.objects.select_related('grupo', 'linea').con_precio(),
             articulo_id=articulo_id
         )
         
         # Obtener precio de forma segura
         precio = None
         try:
-            precio = articulo.precios.first()
+            precio = articulo.listaprecio
         except:
             pass
         
@@ -310,7 +301,9 @@ def articulo_edit(request, articulo_id):
     
     # Obtener grupos activos
     try:
-        grupos = GrupoArticulo.objects.filter(estado=EstadoEntidades.ACTIVO).order_by('nombre_grupo')
+        grupos = [
+            {'grupo_id': grupo_id, 'nombre_grupo': nombre} for grupo_id, nombre in taxonomia.grupos()
+        ]
     except Exception as e:
         messages.error(request, f'Error cargando grupos: {str(e)}')
         grupos = []
@@ -367,7 +360,7 @@ def cart_add(request, articulo_id):
     
     try:
         cart = Cart(request)
-        articulo = get_object_or_404(Articulo, articulo_id=articulo_id)
+        articulo = get_object_or_404(Articulo.objects.con_precio(), articulo_id=articulo_id)
         
         cantidad = int(request.POST.get('cantidad', 1))
         update_cantidad = request.POST.get('update', False)
@@ -426,95 +419,60 @@ def cart_clear(request):
 def checkout(request):
     """Vista para finalizar la compra"""
     
+    if request.method == 'POST':
+        token = request.POST.get('checkout_token', '')
+        if not token or len(token) > 64:
+            messages.error(request, 'El formulario de pago expiró. Confirma la compra nuevamente.')
+            return redirect('checkout')
+        # Doble clic o reintento de un envío ya procesado
+        original = pedido_del_token(request.user, token)
+        if original:
+            messages.info(request, 'Esta compra ya fue registrada.')
+            return redirect('order_detail', pedido_id=original)
+    
     cart = Cart(request)
     
     if len(cart) == 0:
         messages.error(request, 'Tu carrito está vacío.')
         return redirect('cart_detail')
     
-    # Obtener o crear cliente basado en el usuario actual
+    # Cliente del usuario y valores por defecto desde caché (core/referencias.py)
     try:
-        tipo_id = TipoIdentificacion.objects.filter(estado=EstadoEntidades.ACTIVO).first()
-        canal = CanalCliente.objects.filter(estado=EstadoEntidades.ACTIVO).first()
-        
-        if not tipo_id:
-            # Crear tipo de identificación por defecto
-            tipo_id = TipoIdentificacion.objects.create(
-                nombre_tipo_identificacion='DNI',
-                estado=EstadoEntidades.ACTIVO
-            )
-        
-        if not canal:
-            # Crear canal por defecto
-            canal = CanalCliente.objects.create(
-                nombre_canal='Presencial',
-                estado=EstadoEntidades.ACTIVO
-            )
-        
-        cliente, created = Cliente.objects.get_or_create(
-            correo_electronico=request.user.email,
-            defaults={
-                'nombres': request.user.full_name or request.user.username,
-                'nro_documento': '00000000',
-                'tipo_identificacion': tipo_id,
-                'canal': canal,
-                'estado': EstadoEntidades.ACTIVO
-            }
-        )
-        
+        cliente = referencias.cliente(request.user)
     except Exception as e:
         messages.error(request, f'Error al procesar cliente: {str(e)}')
         return redirect('cart_detail')
     
     if request.method == 'POST':
         try:
-            # Obtener o crear vendedor
-            vendedor = Vendedor.objects.filter(estado=EstadoEntidades.ACTIVO).first()
-            if not vendedor:
-                vendedor = Vendedor.objects.create(
-                    nombres='Vendedor Predeterminado',
-                    correo_electronico='vendedor@sistema.com',
-                    estado=EstadoEntidades.ACTIVO
-                )
-            
-            with transaction.atomic():
-                # Crear la orden
-                orden = OrdenCompraCliente.objects.create(
-                    cliente=cliente,
-                    vendedor=vendedor,
-                    estado=EstadoOrden.PENDIENTE,
-                    notas=request.POST.get('notas', ''),
-                    creado_por=request.user
-                )
-                
-                # Crear los items de la orden
-                item_numero = 1
-                for item in cart:
-                    ItemOrdenCompraCliente.objects.create(
-                        pedido=orden,
-                        nro_item=item_numero,
-                        articulo=item['articulo'],
-                        cantidad=item['cantidad'],
-                        precio_unitario=item['precio'],
-                        creado_por=request.user
-                    )
-                    
-                    # Actualizar stock
-                    articulo = item['articulo']
-                    articulo.stock -= item['cantidad']
-                    articulo.save()
-                    
-                    item_numero += 1
-                
-                # Actualizar total de la orden
-                orden.actualizar_total()
-                
-                # Limpiar carrito
-                cart.clear()
-                
-                messages.success(request, f'¡Orden #{orden.nro_pedido} creada exitosamente!')
-                return redirect('order_detail', pedido_id=orden.pedido_id)
+            vendedor = referencias.vendedor()
             
+            # Crear la orden, sus items y descontar stock en lote
+            orden = procesar_checkout(
+                cart, cliente, vendedor, request.user,
+                notas=request.POST.get('notas', ''),
+                permitir_parcial=settings.CHECKOUT_PERMITIR_PARCIAL,
+                token=token
+            )
+
+            # Limpiar carrito
+            cart.clear()
+
+            if orden.lineas_ajustadas:
+                nombres = ', '.join(articulo.descripcion for articulo in orden.lineas_ajustadas)
+                messages.warning(request, f'Cantidades ajustadas al stock disponible: {nombres}')
+            messages.success(request, f'¡Orden #{orden.nro_pedido} creada exitosamente!')
+            response = redirect('order_detail', pedido_id=orden.pedido_id)
+            response['X-Checkout-Queries'] = str(orden.consultas_checkout)
+            return response
+
+        except CheckoutDuplicado as e:
+            # Envío concurrente con el mismo token: la orden ya existe
+            messages.info(request, 'Esta compra ya fue registrada.')
+            return redirect('order_detail', pedido_id=e.pedido_id)
+        except StockInsuficiente as e:
+            messages.error(request, str(e))
+            return redirect('cart_detail')
         except Exception as e:
             messages.error(request, f'Error al procesar la orden: {str(e)}')
             return redirect('cart_detail')
@@ -522,6 +480,7 @@ def checkout(request):
     context = {
         'cart': cart,
         'cliente': cliente,
+        'checkout_token': nuevo_token(),
     }
     
     return render(request, 'core/cart/checkout.html', context)
@@ -531,7 +490,8 @@ def order_detail(request, pedido_id):
     """Vista para ver detalle de una orden"""
     
     try:
-        orden = get_object_or_404(OrdenCompraCliente, pedido_id=pedido_id)
+        # Orden, cliente e items con sus artículos en consultas fijas (core/documentos.py)
+        orden = get_object_or_404(documentos.ordenes_para_documento(), pedido_id=pedido_id)
         
         # Verificar que el usuario puede ver esta orden
         if not request.user.is_staff and orden.cliente.correo_electronico != request.user.email:
@@ -553,11 +513,19 @@ def order_list(request):
     """Vista para listar órdenes de compra"""
     
     try:
-        if request.user.is_staff:
-            ordenes_list = OrdenCompraCliente.objects.all().order_by('-fecha_creacion')
-        else:
-            clientes = Cliente.objects.filter(correo_electronico=request.user.email)
-            ordenes_list = OrdenCompraCliente.objects.filter(cliente__in=clientes).order_by('-fecha_creacion')
+        # Solo las columnas del listado (y fecha_creacion para el cursor), con
+        # el cliente en el mismo JOIN: una consulta por página sin importar las filas
+        ordenes_list = OrdenCompraCliente.objects.select_related('cliente').only(
+            'pedido_id', 'nro_pedido', 'fecha_pedido', 'importe', 'estado', 'fecha_creacion',
+            'cliente__nombres'
+        ).order_by('-fecha_creacion')
+        if not request.user.is_staff:
+            # Los clientes del correo primero (clientes_correo_idx); con sus ids
+            # la página es un rango de ordenes_cliente_fecha_idx
+            clientes = list(Cliente.objects.filter(
+                correo_electronico=request.user.email
+            ).values_list('cliente_id', flat=True))
+            ordenes_list = ordenes_list.filter(cliente_id__in=clientes)
         
         # Filtros
         estado = request.GET.get('estado')
@@ -580,18 +548,18 @@ def order_list(request):
             except:
                 pass
         
-        # Paginación
-        paginator = Paginator(ordenes_list, 10)
-        page_number = request.GET.get('page')
-        ordenes = paginator.get_page(page_number)
+        # Paginación por cursor (ver core/pagination.py)
+        ordenes, parametros_url = paginar(request, ordenes_list, 10)
         
     except Exception as e:
         messages.error(request, f'Error cargando órdenes: {str(e)}')
         ordenes = []
         estado = fecha_desde = fecha_hasta = None
+        parametros_url = ''
     
     context = {
         'ordenes': ordenes,
+        'parametros_url': parametros_url,
         'estados': EstadoOrden.choices,
         'filtros': {
             'estado': estado,
@@ -610,17 +578,10 @@ def cancel_order(request, pedido_id):
         orden = get_object_or_404(OrdenCompraCliente, pedido_id=pedido_id)
         
         if request.user.is_staff or orden.cliente.correo_electronico == request.user.email:
-            if orden.estado == EstadoOrden.PENDIENTE:
-                with transaction.atomic():
-                    orden.estado = EstadoOrden.CANCELADA
-                    orden.save()
-                    
-                    # Restaurar stock
-                    for item in orden.items_orden_compra.all():
-                        articulo = item.articulo
-                        articulo.stock += item.cantidad
-                        articulo.save()
-                
+            # Estado y stock por conjuntos; solo cancela si sigue pendiente (core/cancelacion.py)
+            with transaction.atomic():
+                canceladas, _ = cancelar_ordenes([orden.pk])
+            if canceladas:
                 messages.success(request, f'Orden #{orden.nro_pedido} cancelada correctamente.')
             else:
                 messages.error(request, 'Solo se pueden cancelar órdenes pendientes.')
@@ -636,19 +597,224 @@ def cancel_order(request, pedido_id):
 # API ENDPOINTS
 # ========================================
 
+def _revalidar_siempre(response):
+    """El navegador guarda la respuesta pero la revalida (If-None-Match) en cada uso"""
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 @login_required
+@condition(etag_func=lambda request, grupo_id: taxonomia.etag(grupo_id))
 def lineas_por_grupo(request, grupo_id):
     """API endpoint para obtener líneas por grupo"""
+    lineas = taxonomia.lineas(grupo_id) or []
+    data = [{'id': linea['id'], 'nombre': linea['nombre']} for linea in lineas]
+    return _revalidar_siempre(JsonResponse(data, safe=False))
+
+@login_required
+@condition(etag_func=lambda request, grupo_id=None: taxonomia.etag(grupo_id))
+def taxonomia_api(request, grupo_id=None):
+    """Árbol completo de grupos y líneas, o la rama de un grupo"""
+    if grupo_id is None:
+        return _revalidar_siempre(JsonResponse(taxonomia.arbol(), safe=False))
+    
+    rama = taxonomia.rama(grupo_id)
+    if rama is None:
+        return JsonResponse({'error': 'Grupo no encontrado.'}, status=404)
+    return _revalidar_siempre(JsonResponse(rama))
+
+@login_required
+@require_POST
+def scan_add(request):
+    """API para escáneres: agrega al carrito por código de barras sin redirección"""
     try:
-        lineas = LineaArticulo.objects.filter(
-            grupo_id=grupo_id, 
-            estado=EstadoEntidades.ACTIVO
-        ).values('linea_id', 'nombre_linea')
-        
-        data = [{'id': linea['linea_id'], 'nombre': linea['nombre_linea']} for linea in lineas]
-        return JsonResponse(data, safe=False)
-    except Exception as e:
+        if request.content_type == 'application/json':
+            data = json.loads(request.body or b'{}')
+        else:
+            data = request.POST
+        codigo_barras = str(data.get('codigo_barras', '')).strip()
+        cantidad = int(data.get('cantidad', 1))
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Solicitud inválida.'}, status=400)
+    
+    if not codigo_barras or cantidad <= 0:
+        return JsonResponse({'error': 'Código de barras y cantidad requeridos.'}, status=400)
+    
+    entrada = indice_codigos.buscar(codigo_barras)
+    if entrada is None:
+        return JsonResponse({'error': f'Código {codigo_barras} no encontrado.'}, status=404)
+    if entrada.stock <= 0:
+        return JsonResponse({'error': f'"{entrada.descripcion}" sin stock.'}, status=409)
+    
+    cart = Cart(request)
+    item = cart.add_escaneado(entrada, cantidad)
+    
+    return JsonResponse({
+        'articulo_id': str(entrada.articulo_id),
+        'codigo': entrada.codigo_articulo,
+        'descripcion': entrada.descripcion,
+        'precio': item['centavos'] / 100,
+        'cantidad': item['cantidad'],
+        'stock_disponible': entrada.stock,
+        'total_items': cart.get_total_items(),
+        'total': float(cart.get_total_price()),
+    })
+
+@login_required
+@require_POST
+def cart_bulk_add(request):
+    """
+    API de carga masiva: agrega muchas líneas al carrito en una sola request.
+
+    Cuerpo JSON: {"lineas": [{"articulo_id": ..., "cantidad": n} o
+    {"codigo_barras": ..., "cantidad": n}, ...], "actualizar": false}.
+    Los artículos se resuelven con una consulta y el stock se valida sobre la
+    cantidad resultante en el carrito; las líneas con error no se agregan.
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+        entradas = data['lineas']
+        actualizar = bool(data.get('actualizar', False))
+        if not isinstance(entradas, list):
+            raise TypeError
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'error': 'Solicitud inválida.'}, status=400)
+    
+    if len(entradas) > settings.CART_LOTE_MAX_LINEAS:
+        return JsonResponse(
+            {'error': f'Máximo {settings.CART_LOTE_MAX_LINEAS} líneas por solicitud.'}, status=400
+        )
+    
+    errores, pedidas = [], []
+    for indice, entrada in enumerate(entradas):
+        try:
+            cantidad = int(entrada.get('cantidad', 1))
+            articulo_id = entrada.get('articulo_id')
+            codigo_barras = str(entrada.get('codigo_barras') or '').strip()
+            if articulo_id:
+                clave = ('articulo_id', uuid.UUID(str(articulo_id)))
+            elif codigo_barras:
+                clave = ('codigo_barras', codigo_barras)
+            else:
+                raise ValueError
+        except (ValueError, TypeError, AttributeError):
+            errores.append({'indice': indice, 'error': 'Línea inválida.'})
+            continue
+        if cantidad <= 0:
+            errores.append({'indice': indice, 'error': 'Cantidad inválida.'})
+            continue
+        pedidas.append((indice, clave, cantidad))
+    
+    # Una sola consulta para todos los ids y códigos de barras
+    ids = {valor for _, (campo, valor), _ in pedidas if campo == 'articulo_id'}
+    codigos = {valor for _, (campo, valor), _ in pedidas if campo == 'codigo_barras'}
+    por_clave = {}
+    if pedidas:
+        for articulo in Articulo.objects.con_precio().filter(
+            Q(articulo_id__in=ids) | Q(codigo_barras__in=codigos), estado=EstadoEntidades.ACTIVO
+        ).order_by('pk'):
+            por_clave[('articulo_id', articulo.articulo_id)] = articulo
+            por_clave.setdefault(('codigo_barras', articulo.codigo_barras), articulo)
+    
+    # Cantidad pedida por artículo (un mismo artículo puede venir en varias líneas)
+    por_articulo = {}
+    for indice, clave, cantidad in pedidas:
+        articulo = por_clave.get(clave)
+        if articulo is None:
+            errores.append({'indice': indice, 'error': f'Artículo {clave[1]} no encontrado.'})
+            continue
+        lineas = por_articulo.setdefault(articulo.articulo_id, (articulo, []))[1]
+        lineas.append((indice, cantidad))
+    
+    cart = Cart(request)
+    aceptadas = []
+    for articulo, lineas in por_articulo.values():
+        cantidad = sum(cantidad for _, cantidad in lineas)
+        actual = cart.cart.get(str(articulo.articulo_id), {}).get('cantidad', 0)
+        resultante = cantidad if actualizar else actual + cantidad
+        if resultante > articulo.stock:
+            errores.extend(
+                {'indice': indice, 'error': f'Stock insuficiente para "{articulo.descripcion}". '
+                                            f'Disponible: {articulo.stock}'}
+                for indice, _ in lineas
+            )
+        else:
+            aceptadas.append((articulo, cantidad))
+    
+    if aceptadas:
+        cart.add_lote(aceptadas, update_cantidad=actualizar)
+    
+    return JsonResponse({
+        'lineas': [
+            {
+                'articulo_id': str(articulo.articulo_id),
+                'codigo': articulo.codigo_articulo,
+                'descripcion': articulo.descripcion,
+                'cantidad': cart.cart[str(articulo.articulo_id)]['cantidad'],
+                'precio': cart.cart[str(articulo.articulo_id)]['centavos'] / 100,
+            }
+            for articulo, _ in aceptadas
+        ],
+        'errores': sorted(errores, key=lambda error: error['indice']),
+        'total_items': cart.get_total_items(),
+        'cantidad_total': len(cart),
+        'total': float(cart.get_total_price()),
+    })
+
+@login_required
+@require_POST
+def sync_sales(request):
+    """
+    API de sincronización de cajas sin conexión: carga un lote de ventas ya
+    realizadas (ver core/sincronizacion.py). Reenviar el mismo lote es seguro.
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+        ventas = data['ventas']
+        if not isinstance(ventas, list):
+            raise TypeError
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'error': 'Solicitud inválida.'}, status=400)
+    
+    if len(ventas) > settings.SYNC_LOTE_MAX_VENTAS:
+        return JsonResponse(
+            {'error': f'Máximo {settings.SYNC_LOTE_MAX_VENTAS} ventas por lote.'}, status=400
+        )
+    
+    return JsonResponse(sincronizar_ventas(ventas, request.user))
+
+@login_required
+def export_data(request, nombre):
+    """Exportación en streaming (CSV/JSONL) para contabilidad y sincronización con el ERP"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'No tienes permiso para exportar datos.'}, status=403)
+    
+    formato = request.GET.get('formato', 'csv')
+    try:
+        columnas, filas = filas_exportacion(
+            nombre,
+            desde=request.GET.get('desde'),
+            hasta=request.GET.get('hasta'),
+            estado=request.GET.get('estado'),
+            despues=request.GET.get('despues'),
+        )
+        lineas = serializar(columnas, filas, formato)
+    except ValueError as e:
         return JsonResponse({'error': str(e)}, status=400)
+    
+    content_type = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(lineas, content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return response
+
+@login_required
+def cache_stats(request):
+    """Aciertos y fallos de la caché de artículos en este proceso"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'No tienes permiso para ver estas estadísticas.'}, status=403)
+    
+    datos = cache_articulos.estadisticas.como_dict()
+    datos['backend'] = settings.ARTICULOS_CACHE_BACKEND
+    return JsonResponse(datos)
 
 # ========================================
 # FUNCIONES DE PDF
@@ -659,80 +825,19 @@ def generate_pdf_order(request, pedido_id):
     """Generar PDF para una orden usando ReportLab"""
     
     try:
-        orden = get_object_or_404(OrdenCompraCliente, pedido_id=pedido_id)
+        # Los items solo se leen si el PDF no está guardado
+        orden = get_object_or_404(documentos.ordenes_para_documento(items=False), pedido_id=pedido_id)
         
         # Verificar que el usuario puede acceder a esta orden
         if not request.user.is_staff and orden.cliente.correo_electronico != request.user.email:
             messages.error(request, 'No tienes permiso para ver esta orden.')
             return redirect('dashboard')
         
-        # Crear un buffer para el PDF
-        buffer = BytesIO()
-        
-        # Crear el PDF
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-        
-        # Título
-        p.setFont("Helvetica-Bold", 18)
-        p.drawString(50, height - 50, f"Orden de Compra #{orden.nro_pedido}")
-        
-        # Fecha
-        p.setFont("Helvetica", 12)
-        p.drawString(50, height - 80, f"Fecha: {orden.fecha_pedido}")
-        
-        # Estado
-        estado_display = dict(EstadoOrden.choices).get(orden.estado, "Desconocido")
-        p.drawString(50, height - 100, f"Estado: {estado_display}")
-        
-        # Información del cliente
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(50, height - 140, "Información del Cliente:")
-        
-        p.setFont("Helvetica", 12)
-        p.drawString(50, height - 160, f"Nombre: {orden.cliente.nombres}")
-        p.drawString(50, height - 180, f"Documento: {orden.cliente.tipo_identificacion.nombre_tipo_identificacion} {orden.cliente.nro_documento}")
-        p.drawString(50, height - 200, f"Email: {orden.cliente.correo_electronico}")
-        
-        # Tabla de items
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(50, height - 240, "Detalle de la Orden:")
-        
-        # Items de la orden
-        y = height - 280
-        p.setFont("Helvetica", 10)
-        p.drawString(50, y, "Item")
-        p.drawString(150, y, "Producto")
-        p.drawString(350, y, "Precio")
-        p.drawString(420, y, "Cantidad")
-        p.drawString(490, y, "Total")
-        
-        y -= 20
-        for item in orden.items_orden_compra.all():
-            p.drawString(50, y, str(item.nro_item))
-            p.drawString(150, y, item.articulo.descripcion[:25])
-            p.drawString(350, y, f"${item.precio_unitario}")
-            p.drawString(420, y, str(item.cantidad))
-            p.drawString(490, y, f"${item.total_item}")
-            y -= 15
-        
-        # Total
-        y -= 20
-        p.setFont("Helvetica-Bold", 12)
-        p.drawString(420, y, f"Total: ${orden.importe}")
-        
-        # Pie de página
-        p.setFont("Helvetica", 10)
-        p.drawString(50, 50, f"Generado el {timezone.now().strftime('%d/%m/%Y %H:%M:%S')}")
-        p.drawString(width - 200, 50, "Sistema POS © 2025")
-        
-        # Guardar el PDF
-        p.showPage()
-        p.save()
+        # Prerenderizado por el trabajador al confirmarse la orden (core/documentos.py)
+        contenido = documentos.pdf_orden_guardado(orden)
         
         # Preparar la respuesta
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
+        response = HttpResponse(contenido, content_type='application/pdf')
         response['Content-Disposition'] = f'inline; filename="orden_{orden.nro_pedido}.pdf"'
         
         return response
@@ -740,41 +845,3 @@ def generate_pdf_order(request, pedido_id):
     except Exception as e:
         messages.error(request, f'Error generando PDF: {str(e)}')
         return redirect('order_detail', pedido_id=pedido_id)
-
-# ========================================
-# FUNCIONES DE EMAIL (OPCIONAL)
-# ========================================
-
-def send_order_confirmation_email(orden):
-    """Enviar email de confirmación de orden"""
-    try:
-        subject = f'Confirmación de Orden #{orden.nro_pedido}'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        to_email = orden.cliente.correo_electronico
-        
-        # Renderizar el cuerpo del email en HTML
-        html_content = render_to_string('emails/order_confirmation.html', {
-            'orden': orden,
-            'items': orden.items_orden_compra.all(),
-        })
-        
-        # Versión de texto plano
-        text_content = strip_tags(html_content)
-        
-        # Crear el mensaje
-        email = EmailMultiAlternatives(
-            subject,
-            text_content,
-            from_email,
-            [to_email]
-        )
-        
-        # Adjuntar versión HTML
-        email.attach_alternative(html_content, "text/html")
-        
-        # Enviar el email
-        email.send()
-        return True
-    except Exception as e:
-        print(f"Error enviando email: {str(e)}")
-        return False
\ No newline at end of file
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_project.settings')
 
 application = get_asgi_application()
+
+# Precargar el índice de códigos de barras para que el primer escaneo no espere
+from core.escaner import precargar_indice  # noqa: E402
+precargar_indice()
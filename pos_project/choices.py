@@ -8,4 +8,10 @@ class EstadoOrden(models.IntegerChoices):
     PENDIENTE = 1, "Pendiente"
     PROCESANDO = 2, "Procesando"
     COMPLETADA = 3, "Completada"
-    CANCELADA = 4, "Cancelada"
\ No newline at end of file
+    CANCELADA = 4, "Cancelada"
+
+class EstadoTarea(models.IntegerChoices):
+    PENDIENTE = 1, "Pendiente"
+    EN_PROCESO = 2, "En proceso"
+    COMPLETADA = 3, "Completada"
+    FALLIDA = 4, "Fallida"
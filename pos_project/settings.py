@@ -115,6 +115,12 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Las transacciones toman el bloqueo de escritura al iniciar,
+                # así las reservas de stock concurrentes esperan en vez de fallar
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
         }
     }
 
@@ -177,6 +183,116 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_SECURE = get_config('SESSION_COOKIE_SECURE', default=False, cast=bool)
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 
+# ✅ CONFIGURACIÓN DEL CHECKOUT
+# Máximo de consultas SQL esperadas por checkout (se registra un aviso si se excede),
+# contando las tareas en segundo plano, el registro de compras conjuntas y la
+# actualización del índice de escaneo
+CHECKOUT_QUERY_BUDGET = get_config('CHECKOUT_QUERY_BUDGET', default=14, cast=int)
+# Si es True, las líneas sin stock suficiente se llenan parcialmente en vez de rechazar la orden
+CHECKOUT_PERMITIR_PARCIAL = get_config('CHECKOUT_PERMITIR_PARCIAL', default=False, cast=bool)
+# Horas que se conservan los tokens de idempotencia del checkout (purge_checkout_tokens)
+CHECKOUT_TOKEN_TTL_HORAS = get_config('CHECKOUT_TOKEN_TTL_HORAS', default=24, cast=int)
+# Horas tras las que una orden PENDIENTE se cancela y repone su stock (expire_pending_orders)
+PEDIDOS_PENDIENTES_VENCEN_HORAS = get_config('PEDIDOS_PENDIENTES_VENCEN_HORAS', default=72, cast=int)
+
+# ✅ CONFIGURACIÓN DE NUMERACIÓN DE PEDIDOS
+# Código de la tienda en el número de pedido (ORD-<tienda>-<secuencia>)
+POS_CODIGO_TIENDA = get_config('POS_CODIGO_TIENDA', default='001')
+# Números que cada proceso reserva de una vez en la base de datos
+POS_BLOQUE_NRO_PEDIDO = get_config('POS_BLOQUE_NRO_PEDIDO', default=50, cast=int)
+
+# ✅ CONFIGURACIÓN DE BÚSQUEDA DE ARTÍCULOS
+# Backend de búsqueda: 'auto', 'sqlite' (FTS5), 'postgres' (tsvector/trigramas) o 'q' (icontains)
+SEARCH_BACKEND = get_config('SEARCH_BACKEND', default='auto')
+# Máximo de resultados ordenados por relevancia que devuelve una búsqueda
+SEARCH_MAX_RESULTS = get_config('SEARCH_MAX_RESULTS', default=500, cast=int)
+
+# ✅ CONFIGURACIÓN DEL ESCANEO DE CÓDIGOS DE BARRAS
+# Cargar el índice de códigos de barras al arrancar el servidor
+SCAN_INDEX_PRECARGAR = get_config('SCAN_INDEX_PRECARGAR', default=True, cast=bool)
+# Cada cuántos segundos se recogen cambios hechos por otros procesos (0 = nunca)
+SCAN_INDEX_TTL = get_config('SCAN_INDEX_TTL', default=30, cast=int)
+# Segundos que cada sincronización vuelve a leer hacia atrás, para recoger
+# filas de transacciones que se confirmaron después de la anterior
+SCAN_INDEX_MARGEN = get_config('SCAN_INDEX_MARGEN', default=120, cast=int)
+
+# ✅ CONFIGURACIÓN DE PAGINACIÓN
+# Total de filas en listados: 'aproximado' (estimación/caché), 'exacto' o 'ninguno'
+PAGINACION_CONTEO = get_config('PAGINACION_CONTEO', default='aproximado')
+# Segundos que se reutiliza un conteo en caché (modo aproximado fuera de PostgreSQL)
+PAGINACION_CONTEO_TTL = get_config('PAGINACION_CONTEO_TTL', default=60, cast=int)
+
+# ✅ CONFIGURACIÓN DEL CARRITO
+# Dónde se guardan las líneas (core/cart_store.py): 'bd' (tabla propia),
+# 'cache' (caché CART_CACHE_ALIAS) o 'sesion' (dentro de la sesión). Los carritos
+# en el formato anterior se migran al leerlos en cualquiera de los tres; con 'bd'
+# y 'cache' el que quedó en la sesión se importa y se quita de ella
+CART_BACKEND = get_config('CART_BACKEND', default='bd')
+CART_CACHE_ALIAS = get_config('CART_CACHE_ALIAS', default='default')
+# Máximo de líneas por request en la API de carga masiva (api/carrito/lineas/)
+CART_LOTE_MAX_LINEAS = get_config('CART_LOTE_MAX_LINEAS', default=200, cast=int)
+
+# ✅ CONFIGURACIÓN DE SINCRONIZACIÓN DE CAJAS SIN CONEXIÓN
+# Máximo de ventas por lote en api/sincronizar/ventas/ (una transacción por lote)
+SYNC_LOTE_MAX_VENTAS = get_config('SYNC_LOTE_MAX_VENTAS', default=500, cast=int)
+
+# ✅ CONFIGURACIÓN DE TAREAS EN SEGUNDO PLANO (core/tareas.py, manage.py run_worker)
+# Procesos del trabajador y tareas que reclama cada uno por consulta
+TAREAS_PROCESOS = get_config('TAREAS_PROCESOS', default=2, cast=int)
+TAREAS_LOTE = get_config('TAREAS_LOTE', default=10, cast=int)
+# Segundos de espera entre consultas cuando la cola está vacía
+TAREAS_ESPERA = get_config('TAREAS_ESPERA', default=1.0, cast=float)
+# Segundos que una tarea reclamada es del trabajador; vencidos, otro la retoma
+TAREAS_VISIBILIDAD = get_config('TAREAS_VISIBILIDAD', default=300, cast=int)
+# Intentos antes de dejarla fallida; espera entre intentos: base * 2^(n-1), con tope
+TAREAS_MAX_INTENTOS = get_config('TAREAS_MAX_INTENTOS', default=5, cast=int)
+TAREAS_REINTENTO_BASE = get_config('TAREAS_REINTENTO_BASE', default=30, cast=int)
+TAREAS_REINTENTO_MAX = get_config('TAREAS_REINTENTO_MAX', default=3600, cast=int)
+# Cada cuántos segundos el trabajador registra profundidad y latencia de la cola
+TAREAS_METRICAS_INTERVALO = get_config('TAREAS_METRICAS_INTERVALO', default=60, cast=int)
+# Enviar el correo de confirmación de cada orden del checkout
+PEDIDO_CORREO_CONFIRMACION = get_config('PEDIDO_CORREO_CONFIRMACION', default=True, cast=bool)
+# Directorio privado del PDF prerenderizado de cada orden: fuera de MEDIA_ROOT (tiene
+# datos del cliente y solo se sirve por generate_pdf_order) y compartido por el
+# trabajador y los procesos web
+DOCUMENTOS_PDF_ROOT = get_config('DOCUMENTOS_PDF_ROOT', default=str(BASE_DIR / 'privado' / 'documentos_pdf'))
+
+# ✅ CONFIGURACIÓN DE PRODUCTOS RELACIONADOS
+# Órdenes con más artículos distintos que esto no cuentan para las compras conjuntas
+RELACIONADOS_MAX_ARTICULOS_ORDEN = get_config('RELACIONADOS_MAX_ARTICULOS_ORDEN', default=50, cast=int)
+
+# ✅ CONFIGURACIÓN DE CACHÉ
+# Backend de la caché de fichas de artículos (ver core/cache_articulos.py):
+# 'locmem' (un solo proceso), 'file' o 'db' (compartida entre procesos; 'db'
+# requiere ejecutar `python manage.py createcachetable`)
+ARTICULOS_CACHE_BACKEND = get_config('ARTICULOS_CACHE_BACKEND', default='locmem')
+# Segundos que se conserva una entrada; la invalidación es por versión, esto
+# solo limita el espacio que ocupan las entradas que ya no se leen
+ARTICULOS_CACHE_TIMEOUT = get_config('ARTICULOS_CACHE_TIMEOUT', default=86400, cast=int)
+
+_BACKENDS_CACHE_ARTICULOS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'articulos',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'articulos',
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_articulos',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'articulos': _BACKENDS_CACHE_ARTICULOS[ARTICULOS_CACHE_BACKEND],
+}
+
 # ✅ CONFIGURACIÓN DE MENSAJES
 from django.contrib.messages import constants as messages
 MESSAGE_TAGS = {
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pos_project.settings')
 
 application = get_wsgi_application()
+
+# Precargar el índice de códigos de barras para que el primer escaneo no espere
+from core.escaner import precargar_indice  # noqa: E402
+precargar_indice()